@@ -0,0 +1,395 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+
+from armazenamento import SubmissaoDuplicada, criar_armazenamento
+from backup_fila import FilaBackup
+from catalogo_blocos import Catalogo, diretorio_rodada
+from registro_eventos import iniciar_logging_assincrono
+from submissao import (
+    GRAUS_RELEVANCIA, OPCOES_SIM_NAO, comentario_pendente, linha_resposta, persistir_submissao,
+)
+
+# ============================================================
+# CONFIGURAÇÕES (mesmos caminhos e variáveis do app Streamlit)
+# ============================================================
+
+OUTPUT_DIR = "outputs"
+RODADA = int(os.getenv("DELPHI_RODADA", "1"))
+BASE_DIR = diretorio_rodada("base", RODADA)
+CATALOGO_PATH = os.path.join(
+    OUTPUT_DIR, "catalogo_blocos.json" if BASE_DIR == "base" else f"catalogo_blocos_rodada{RODADA}.json"
+)
+ARMAZENAMENTO = os.getenv("DELPHI_ARMAZENAMENTO", "sqlite")
+EXPORTAR_CSV = os.getenv("DELPHI_EXPORTAR_CSV", "1") != "0"
+BACKUP_FILA_DIR = os.path.join(OUTPUT_DIR, "backup", "fila")
+
+# Token exigido em "Authorization: Bearer <token>" (vazio = sem autenticação)
+API_TOKEN = os.getenv("DELPHI_API_TOKEN", "")
+
+MAX_CORPO_BYTES = 10 * 1024 * 1024
+MAX_SUBMISSOES_LOTE = 1000
+PADRAO_SUBMISSAO_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+logger = logging.getLogger("delphi_api")
+
+
+class ErroRequisicao(Exception):
+    """Erro do cliente, devolvido como JSON com o status HTTP informado."""
+
+    def __init__(self, status: int, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+# ============================================================
+# CAMADA: DOMÍNIO / VALIDAÇÃO DE SUBMISSÕES EXTERNAS
+# ============================================================
+
+def _sim(valor) -> bool:
+    return valor is True or str(valor).strip().lower() in ("sim", "true", "1")
+
+
+def id_idempotente(submissao: dict, rodada: int = RODADA) -> str:
+    """
+    Função: id_idempotente
+
+    Objetivo:
+        Definir o submissao_id de uma submissão da API. O id informado pelo
+        cliente é usado como está; sem id, deriva-se um hash do conteúdo e
+        da rodada efetiva (reenvio do mesmo payload na mesma rodada gera o
+        mesmo id e não duplica; as mesmas notas na rodada seguinte, não).
+    """
+    informado = str(submissao.get("submissao_id") or "").strip()
+    if informado:
+        if not PADRAO_SUBMISSAO_ID.match(informado):
+            raise ValueError("submissao_id inválido (até 64 caracteres: letras, números, _ . -)")
+        return informado
+    conteudo = {k: v for k, v in submissao.items() if k != "timestamp"}
+    conteudo["rodada"] = str(submissao.get("rodada") or rodada)
+    canonico = json.dumps(conteudo, sort_keys=True, ensure_ascii=False, default=str)
+    return "api-" + hashlib.sha256(canonico.encode("utf-8")).hexdigest()[:32]
+
+
+def validar_submissao(
+    submissao: dict, catalogo: Catalogo, rodada: int = RODADA
+) -> tuple[dict, list[dict], list[str]]:
+    """
+    Função: validar_submissao
+
+    Objetivo:
+        Aplicar a uma submissão externa as mesmas regras do formulário:
+        bloco válido no catálogo (validado por ler_bloco_csv, como em
+        carregar_itens), identificação e consentimento, uma avaliação por
+        item do bloco com valores permitidos e comentário obrigatório
+        quando Aceitação ou Aplicabilidade = Não. Só a rodada em andamento
+        é aceita (campo "rodada" opcional; ausente = rodada atual).
+
+    Saídas:
+        (registro, respostas, erros): registro e linhas prontos para
+        persistir_submissao; erros não vazio = submissão rejeitada.
+    """
+    erros: list[str] = []
+    if not isinstance(submissao, dict):
+        return {}, [], ["submissão deve ser um objeto JSON"]
+
+    try:
+        entrada = catalogo.bloco(str(submissao.get("bloco", "")))
+    except KeyError:
+        return {}, [], [f"bloco desconhecido: {submissao.get('bloco')!r}"]
+    except ValueError as e:
+        return {}, [], [str(e)]
+
+    nome = str(submissao.get("nome") or "").strip()
+    email = str(submissao.get("email") or "").strip()
+    if not nome or not email:
+        erros.append("identificação (nome e e-mail) é obrigatória")
+    if not _sim(submissao.get("consentimento")):
+        erros.append("consentimento é obrigatório")
+    if not _sim(submissao.get("concordancia_instr_delphi")):
+        erros.append("concordância com as instruções do Método Delphi é obrigatória")
+    if str(submissao.get("rodada") or rodada) != str(rodada):
+        erros.append(f"rodada {submissao.get('rodada')!r} não está aberta (rodada atual: {rodada})")
+
+    avaliacoes = submissao.get("respostas")
+    if not isinstance(avaliacoes, list):
+        return {}, [], erros + ["respostas deve ser uma lista"]
+    por_codigo: dict[str, dict] = {}
+    for a in avaliacoes:
+        codigo = str(a.get("codigo", "")).strip() if isinstance(a, dict) else ""
+        if not codigo:
+            erros.append("resposta sem codigo")
+        elif codigo in por_codigo:
+            erros.append(f"{codigo}: resposta repetida")
+        else:
+            por_codigo[codigo] = a
+
+    codigos_bloco = {item["codigo"] for item in entrada["itens"]}
+    desconhecidos = sorted(set(por_codigo) - codigos_bloco)
+    if desconhecidos:
+        erros.append(f"códigos fora do bloco: {', '.join(desconhecidos)}")
+
+    respostas: list[dict] = []
+    for item in entrada["itens"]:
+        a = por_codigo.get(item["codigo"])
+        if a is None:
+            erros.append(f"{item['codigo']}: sem resposta")
+            continue
+        try:
+            grau = int(a.get("grau_relevancia"))
+        except (TypeError, ValueError):
+            grau = None
+        resposta = {
+            "grau_relevancia": grau,
+            "aplicabilidade_nacional": a.get("aplicabilidade_nacional"),
+            "aceitacao_item": a.get("aceitacao_item"),
+            "comentarios_sugestoes": str(a.get("comentarios_sugestoes") or ""),
+        }
+        if grau not in GRAUS_RELEVANCIA:
+            erros.append(f"{item['codigo']}: grau_relevancia deve ser 1 a 5")
+        if resposta["aplicabilidade_nacional"] not in OPCOES_SIM_NAO:
+            erros.append(f"{item['codigo']}: aplicabilidade_nacional deve ser Sim ou Não")
+        if resposta["aceitacao_item"] not in OPCOES_SIM_NAO:
+            erros.append(f"{item['codigo']}: aceitacao_item deve ser Sim ou Não")
+        elif comentario_pendente(resposta):
+            erros.append(f"{item['codigo']}: comentário obrigatório (Aceitação ou Aplicabilidade = Não)")
+        respostas.append(linha_resposta(item, resposta))
+
+    registro = {
+        "bloco": entrada["bloco_id"],
+        "rodada": rodada,
+        "nome": nome,
+        "email": email,
+        "cpf": str(submissao.get("cpf") or "").strip(),
+        "concordancia_instr_delphi": "sim",
+        "consentimento": "sim",
+        "timestamp": str(submissao.get("timestamp") or datetime.now().isoformat(timespec="seconds")),
+    }
+    return registro, respostas, erros
+
+
+# ============================================================
+# CAMADA: API (ASGI, sem framework)
+# ============================================================
+
+class ApiSubmissoes:
+    """
+    Classe: ApiSubmissoes
+
+    Objetivo:
+        Serviço HTTP assíncrono (ASGI) para instituições parceiras:
+
+        - GET  /saude                 -> {"ok": true}
+        - GET  /blocos                -> catálogo (bloco_id, n_itens, hash, erro)
+        - GET  /blocos/{bloco_id}     -> itens do bloco
+        - POST /submissoes            -> lote {"submissoes": [...]}; resultado por submissão
+
+        Submissões válidas são gravadas pelo mesmo caminho do app
+        (persistir_submissao, backend SQLite) e o CSV exportado entra na
+        fila durável de backup, drenada pelo trabalhador do app Streamlit
+        (iniciado na partida do app; varre a fila periodicamente).
+        Cada submissão tem um submissao_id idempotente: reenvios respondem
+        "duplicada" sem gravar de novo.
+    """
+
+    def __init__(self, base_dir: str = BASE_DIR, output_dir: str = OUTPUT_DIR, tipo: str = ARMAZENAMENTO):
+        self.base_dir = base_dir
+        self.output_dir = output_dir
+        self.tipo = tipo
+        self.catalogo: Catalogo | None = None
+        self.armazenamento = None
+        self.fila: FilaBackup | None = None
+
+    def iniciar(self) -> None:
+        if self.catalogo is not None:
+            return
+        if self.tipo != "sqlite":
+            # A idempotência depende da chave única do SQLite
+            raise RuntimeError("A API de submissões requer DELPHI_ARMAZENAMENTO=sqlite.")
+        if not logger.handlers:
+            logger.setLevel(logging.INFO)
+            iniciar_logging_assincrono(logger, str(Path(self.output_dir) / "logs" / "api.log"))
+        caminho = CATALOGO_PATH if self.base_dir == BASE_DIR else os.path.join(self.base_dir, ".catalogo_blocos.json")
+        catalogo = Catalogo(self.base_dir, caminho)
+        self.armazenamento = criar_armazenamento(self.tipo, self.output_dir)
+        self.fila = FilaBackup(BACKUP_FILA_DIR if self.output_dir == OUTPUT_DIR
+                               else os.path.join(self.output_dir, "backup", "fila"))
+        self.catalogo = catalogo  # por último: marca a inicialização como completa
+        logger.info("API de submissões iniciada", extra={"evento": "api"})
+
+    def encerrar(self) -> None:
+        if self.armazenamento is not None:
+            self.armazenamento.fechar()
+
+    # --------------------------------------------------------
+    # ASGI
+    # --------------------------------------------------------
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._ciclo_de_vida(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        try:
+            self.iniciar()
+            status, corpo = await self._rotear(scope, receive)
+        except ErroRequisicao as e:
+            status, corpo = e.status, {"erro": e.mensagem}
+        except Exception:
+            logger.exception("Erro interno na API", extra={"evento": "api"})
+            status, corpo = 500, {"erro": "erro interno"}
+        dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json; charset=utf-8"),
+                        (b"content-length", str(len(dados)).encode())],
+        })
+        await send({"type": "http.response.body", "body": dados})
+
+    async def _ciclo_de_vida(self, receive, send) -> None:
+        while True:
+            mensagem = await receive()
+            if mensagem["type"] == "lifespan.startup":
+                try:
+                    self.iniciar()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif mensagem["type"] == "lifespan.shutdown":
+                self.encerrar()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _autorizado(self, scope) -> bool:
+        if not API_TOKEN:
+            return True
+        cabecalhos = dict(scope.get("headers") or [])
+        # Comparação em bytes: compare_digest recusa str com caracteres não ASCII
+        informado = cabecalhos.get(b"authorization", b"")
+        return hmac.compare_digest(informado, f"Bearer {API_TOKEN}".encode("utf-8"))
+
+    async def _ler_corpo(self, receive) -> dict:
+        partes, total = [], 0
+        while True:
+            mensagem = await receive()
+            parte = mensagem.get("body", b"")
+            total += len(parte)
+            if total > MAX_CORPO_BYTES:
+                raise ErroRequisicao(413, f"corpo maior que {MAX_CORPO_BYTES} bytes")
+            partes.append(parte)
+            if not mensagem.get("more_body"):
+                break
+        try:
+            return json.loads(b"".join(partes) or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise ErroRequisicao(400, "JSON inválido")
+
+    async def _rotear(self, scope, receive) -> tuple[int, dict]:
+        metodo, caminho = scope["method"], scope["path"].rstrip("/") or "/"
+        if caminho == "/saude":
+            return 200, {"ok": True}
+        if not self._autorizado(scope):
+            raise ErroRequisicao(401, "token ausente ou inválido")
+
+        if metodo == "GET" and caminho == "/blocos":
+            return 200, {"blocos": [
+                {k: b[k] for k in ("bloco_id", "arquivo", "n_itens", "hash", "erro")}
+                for b in self.catalogo.blocos()
+            ]}
+        if metodo == "GET" and caminho.startswith("/blocos/"):
+            try:
+                entrada = self.catalogo.bloco(caminho.split("/", 2)[2])
+            except KeyError:
+                raise ErroRequisicao(404, "bloco não encontrado")
+            except ValueError as e:
+                raise ErroRequisicao(409, str(e))
+            return 200, {"bloco_id": entrada["bloco_id"], "hash": entrada["hash"], "itens": entrada["itens"]}
+        if metodo == "POST" and caminho == "/submissoes":
+            corpo = await self._ler_corpo(receive)
+            submissoes = corpo.get("submissoes") if isinstance(corpo, dict) else None
+            if not isinstance(submissoes, list) or not submissoes:
+                raise ErroRequisicao(400, 'esperado {"submissoes": [...]}')
+            if len(submissoes) > MAX_SUBMISSOES_LOTE:
+                raise ErroRequisicao(413, f"no máximo {MAX_SUBMISSOES_LOTE} submissões por lote")
+            resultados = await asyncio.gather(*(self._processar(s) for s in submissoes))
+            resumo = {s: sum(r["status"] == s for r in resultados) for s in ("gravada", "duplicada", "rejeitada")}
+            return 200, {**resumo, "resultados": list(resultados)}
+        raise ErroRequisicao(404, "rota não encontrada")
+
+    async def _processar(self, submissao: dict) -> dict:
+        """
+        Validar e gravar uma submissão do lote (gravação fora do event loop).
+        Um erro inesperado rejeita só esta submissão: as demais do lote
+        seguem e a resposta informa o resultado de cada uma.
+        """
+        try:
+            return await self._processar_submissao(submissao)
+        except Exception:
+            logger.exception("Erro ao processar submissão via API", extra={"evento": "api"})
+            submissao_id = submissao.get("submissao_id") if isinstance(submissao, dict) else None
+            return {"submissao_id": submissao_id, "status": "rejeitada",
+                    "erros": ["erro interno ao gravar; reenvie a submissão"]}
+
+    async def _processar_submissao(self, submissao: dict) -> dict:
+        try:
+            submissao_id = id_idempotente(submissao if isinstance(submissao, dict) else {})
+        except ValueError as e:
+            return {"submissao_id": None, "status": "rejeitada", "erros": [str(e)]}
+        registro, respostas, erros = validar_submissao(submissao, self.catalogo)
+        if erros:
+            return {"submissao_id": submissao_id, "status": "rejeitada", "erros": erros}
+
+        registro["submissao_id"] = submissao_id
+        try:
+            csv_path = await asyncio.to_thread(
+                persistir_submissao, self.armazenamento, registro, respostas, self.output_dir, EXPORTAR_CSV
+            )
+        except SubmissaoDuplicada as e:
+            return {"submissao_id": e.submissao_id, "status": "duplicada"}
+
+        if csv_path:
+            try:
+                self.fila.enfileirar(csv_path, registro["bloco"])
+            except OSError:  # já gravada: o backup não pode virar rejeição
+                logger.exception("Backup não enfileirado: %s", csv_path,
+                                 extra={"evento": "backup", "submissao_id": submissao_id})
+        logger.info("Submissão via API salva: %s", registro["bloco"],
+                    extra={"evento": "salvamento", "submissao_id": submissao_id, "bloco": registro["bloco"]})
+        return {"submissao_id": submissao_id, "status": "gravada"}
+
+
+app = ApiSubmissoes()
+
+
+def main() -> None:
+    """
+    Função: main
+
+    Objetivo:
+        Subir a API com uvicorn (dependência opcional), a partir da raiz do
+        repositório: python app/api_submissoes.py [--porta 8600]
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="API headless de submissões Delphi (ASGI).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8600)
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn não instalado: pip install uvicorn (ou use outro servidor ASGI com api_submissoes:app)")
+    uvicorn.run(app, host=args.host, port=args.porta, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
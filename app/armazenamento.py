@@ -0,0 +1,719 @@
+import csv
+import glob
+import hashlib
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import Future
+from datetime import datetime
+
+# ============================================================
+# CAMADA: INFRA / ARMAZENAMENTO DE SUBMISSÕES (backends plugáveis)
+# ============================================================
+
+COLUNAS_REGISTRO = [
+    "submissao_id", "bloco", "rodada",
+    "nome", "email", "cpf",
+    "concordancia_instr_delphi",
+    "consentimento", "timestamp",
+    "hash_conteudo",
+]
+
+COLUNAS_RESPOSTA = [
+    "secao", "codigo", "tematica",
+    "pergunta", "respostas",
+    "grau_relevancia", "aplicabilidade_nacional", "aceitacao_item",
+    "comentarios_sugestoes",
+]
+
+# Ordem padronizada das colunas no CSV de exportação (uma linha por item)
+COLUNAS_CSV = [
+    "bloco", "secao", "codigo", "tematica",
+    "pergunta", "respostas",
+    "grau_relevancia", "aplicabilidade_nacional", "aceitacao_item",
+    "comentarios_sugestoes",
+    "nome", "email", "cpf",
+    "concordancia_instr_delphi",
+    "consentimento", "timestamp",
+    "rodada", "submissao_id", "hash_conteudo",
+]
+
+
+# Espera máxima pela confirmação do escritor SQLite (TimeoutError depois disso)
+TEMPO_MAX_GRAVACAO_S = 60
+
+
+class SubmissaoDuplicada(Exception):
+    """
+    Submissão repetida: mesmo submissao_id já gravado, ou conteúdo idêntico
+    à última versão do avaliador no bloco. `submissao_id` é o da gravada.
+    """
+
+    def __init__(self, submissao_id: str):
+        super().__init__(f"submissão já registrada: {submissao_id}")
+        self.submissao_id = submissao_id
+
+
+def chave_avaliador(registro: dict) -> tuple[str, str, str]:
+    """Chave da versão vigente: (e-mail normalizado, bloco, rodada); sem rodada = 1."""
+    return (
+        str(registro.get("email", "")).strip().lower(),
+        str(registro.get("bloco", "")),
+        str(registro.get("rodada") or 1),
+    )
+
+
+class IndiceVersoes:
+    """
+    Classe: IndiceVersoes
+
+    Objetivo:
+        Índice em memória (dict, consulta O(1)) da última versão gravada de
+        cada avaliador por bloco e rodada: chave_avaliador -> (hash_conteudo,
+        submissao_id). Reenvio com o mesmo conteúdo da última versão é
+        duplicata; conteúdo diferente é uma nova versão.
+
+        `reservar` confere e registra sob lock, para que dois envios
+        simultâneos do mesmo conteúdo não passem ambos.
+    """
+
+    def __init__(self):
+        self._versoes: dict[tuple[str, str, str], tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def carregar(self, versoes) -> None:
+        """Popular a partir de (email, bloco, rodada, hash, submissao_id) em ordem cronológica."""
+        with self._lock:
+            for email, bloco, rodada, h, submissao_id in versoes:
+                if h:
+                    self._versoes[chave_avaliador({"email": email, "bloco": bloco, "rodada": rodada})] = (h, submissao_id)
+
+    def reservar(self, registro: dict) -> tuple[str, str] | None:
+        """
+        Registrar o conteúdo como versão vigente.
+
+        Saídas:
+            a versão anterior (para `liberar` se a gravação falhar).
+
+        Efeitos colaterais:
+            - SubmissaoDuplicada se o conteúdo repete a versão vigente
+        """
+        h = registro.get("hash_conteudo", "")
+        if not h:
+            return None
+        chave = chave_avaliador(registro)
+        with self._lock:
+            anterior = self._versoes.get(chave)
+            if anterior is not None and anterior[0] == h:
+                raise SubmissaoDuplicada(anterior[1])
+            self._versoes[chave] = (h, registro["submissao_id"])
+            return anterior
+
+    def liberar(self, registro: dict, anterior: tuple[str, str] | None) -> None:
+        """Desfazer `reservar` após falha na gravação."""
+        if not registro.get("hash_conteudo"):
+            return
+        chave = chave_avaliador(registro)
+        with self._lock:
+            if self._versoes.get(chave, ("", ""))[1] != registro["submissao_id"]:
+                return
+            if anterior is None:
+                self._versoes.pop(chave, None)
+            else:
+                self._versoes[chave] = anterior
+
+    def confirmar(self, registro: dict, submissao_id: str) -> None:
+        """Apontar a versão vigente para a gravada por outro processo com o mesmo conteúdo."""
+        with self._lock:
+            self._versoes[chave_avaliador(registro)] = (registro["hash_conteudo"], submissao_id)
+
+    def __len__(self) -> int:
+        return len(self._versoes)
+
+
+def novo_submissao_id() -> str:
+    """
+    Função: novo_submissao_id
+
+    Objetivo:
+        Gerar identificador único de submissão, ordenável por tempo.
+    """
+    return f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{uuid.uuid4().hex[:12]}"
+
+
+def linhas_submissao(registro: dict, respostas: list[dict]) -> tuple[list[str], list[dict]]:
+    """
+    Função: linhas_submissao
+
+    Objetivo:
+        Achatar a submissão (metadados do registro repetidos em cada item),
+        no layout do CSV de saída.
+
+    Saídas:
+        (colunas, linhas): colunas na ordem padronizada e linhas como dict.
+    """
+    linhas = [{**r, **registro} for r in respostas]
+    extras = []
+    for linha in linhas:
+        extras.extend(c for c in linha if c not in COLUNAS_CSV and c not in extras)
+    presentes = set().union(*linhas) if linhas else set(registro)
+    colunas = [c for c in COLUNAS_CSV if c in presentes] + extras
+    return colunas, linhas
+
+
+def exportar_csv_submissao(registro: dict, respostas: list[dict], output_dir: str) -> str:
+    """
+    Função: exportar_csv_submissao
+
+    Objetivo:
+        Gravar a submissão como CSV individual (formato histórico
+        delphi_<bloco>_<nome>_<timestamp>.csv), usado pelo backup Git e
+        pela consolidação. Um hash do id da submissão entra no nome para
+        evitar colisões entre envios no mesmo segundo (ids informados por
+        clientes da API, como lote1-001 e lote2-001, diferem em qualquer
+        posição).
+
+    Saídas:
+        str: caminho completo do CSV gerado.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    safe_nome = re.sub(r"[^a-zA-Z0-9_-]+", "_", registro["nome"].strip())[:50] or "anon"
+    sufixo = hashlib.sha256(registro["submissao_id"].encode("utf-8")).hexdigest()[:12]
+    fname = f"delphi_{registro['bloco']}_{safe_nome}_{ts}_{sufixo}.csv"
+    out_path = os.path.join(output_dir, fname)
+
+    colunas, linhas = linhas_submissao(registro, respostas)
+    tmp = f"{out_path}.tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=colunas, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(linhas)
+    os.replace(tmp, out_path)
+    return out_path
+
+
+class ArmazenamentoCSV:
+    """
+    Classe: ArmazenamentoCSV
+
+    Objetivo:
+        Backend histórico: um CSV por submissão em output_dir. O índice de
+        versões é montado na partida a partir da coluna hash_conteudo dos
+        CSVs existentes (arquivos anteriores a ela não entram).
+    """
+
+    nome = "csv"
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.indice = IndiceVersoes()
+        self.indice.carregar(self._versoes_existentes())
+
+    def _versoes_existentes(self) -> list[tuple]:
+        versoes = []
+        for caminho in glob.glob(os.path.join(self.output_dir, "delphi_*.csv")):
+            try:
+                with open(caminho, newline="", encoding="utf-8-sig") as f:
+                    primeira = next(csv.DictReader(f), None)
+            except (OSError, csv.Error, UnicodeDecodeError):
+                continue
+            if primeira and primeira.get("hash_conteudo"):
+                versoes.append((
+                    primeira.get("timestamp", ""), primeira.get("submissao_id", ""),
+                    primeira.get("email", ""), primeira.get("bloco", ""), primeira.get("rodada", ""),
+                    primeira["hash_conteudo"],
+                ))
+        versoes.sort()
+        return [(email, bloco, rodada, h, sid) for _, sid, email, bloco, rodada, h in versoes]
+
+    def salvar(self, registro: dict, respostas: list[dict]) -> str:
+        """Gravar a submissão; retorna o caminho do CSV."""
+        anterior = self.indice.reservar(registro)
+        try:
+            return exportar_csv_submissao(registro, respostas, self.output_dir)
+        except BaseException:
+            self.indice.liberar(registro, anterior)
+            raise
+
+    def salvar_grupo(self, submissoes: list[tuple[dict, list[dict]]]) -> list[str | None]:
+        """
+        Gravar várias submissões; se uma falhar, os CSVs já gravados do grupo
+        são removidos. Retorna o caminho de cada CSV (None = versão repetida).
+        """
+        reservas, caminhos = [], []
+        try:
+            for registro, respostas in submissoes:
+                try:
+                    reservas.append((registro, self.indice.reservar(registro)))
+                except SubmissaoDuplicada:
+                    caminhos.append(None)
+                    continue
+                caminhos.append(exportar_csv_submissao(registro, respostas, self.output_dir))
+        except BaseException:
+            for caminho in filter(None, caminhos):
+                os.remove(caminho)
+            for registro, anterior in reversed(reservas):
+                self.indice.liberar(registro, anterior)
+            raise
+        return caminhos
+
+    def submissoes_desde(self, marca: frozenset | None = None) -> tuple[list[tuple[dict, list[dict]]], frozenset]:
+        """
+        Submissões em CSVs ainda não vistos (`marca` = arquivos já lidos),
+        para agregados incrementais. Retorna as submissões e a nova marca.
+        """
+        vistos = marca or frozenset()
+        novos = sorted(set(glob.glob(os.path.join(self.output_dir, "delphi_*.csv"))) - vistos)
+        submissoes = []
+        for caminho in novos:
+            try:
+                with open(caminho, newline="", encoding="utf-8-sig") as f:
+                    linhas = list(csv.DictReader(f))
+            except (OSError, csv.Error, UnicodeDecodeError):
+                continue
+            if linhas:
+                registro = {c: linhas[0].get(c, "") for c in COLUNAS_REGISTRO}
+                submissoes.append((registro, [{c: linha.get(c, "") for c in COLUNAS_RESPOSTA} for linha in linhas]))
+        return submissoes, vistos | frozenset(novos)
+
+    def fechar(self) -> None:
+        pass
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissoes (
+    submissao_id TEXT PRIMARY KEY,
+    bloco TEXT NOT NULL,
+    rodada INTEGER NOT NULL DEFAULT 1,
+    nome TEXT NOT NULL,
+    email TEXT NOT NULL,
+    cpf TEXT NOT NULL DEFAULT '',
+    concordancia_instr_delphi TEXT NOT NULL DEFAULT '',
+    consentimento TEXT NOT NULL DEFAULT '',
+    timestamp TEXT NOT NULL,
+    extras TEXT NOT NULL DEFAULT '{}',
+    gravado_em TEXT NOT NULL,
+    hash_conteudo TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_submissoes_bloco ON submissoes(bloco);
+CREATE INDEX IF NOT EXISTS idx_submissoes_email ON submissoes(email, bloco);
+
+CREATE TABLE IF NOT EXISTS respostas (
+    submissao_id TEXT NOT NULL REFERENCES submissoes(submissao_id),
+    ordem INTEGER NOT NULL,
+    bloco TEXT NOT NULL,
+    secao TEXT NOT NULL,
+    codigo TEXT NOT NULL,
+    tematica TEXT NOT NULL,
+    pergunta TEXT NOT NULL,
+    respostas TEXT NOT NULL,
+    grau_relevancia INTEGER,
+    aplicabilidade_nacional TEXT,
+    aceitacao_item TEXT,
+    comentarios_sugestoes TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (submissao_id, ordem)
+);
+CREATE INDEX IF NOT EXISTS idx_respostas_bloco_codigo ON respostas(bloco, codigo);
+"""
+
+
+# Colunas das leituras achatadas (layout do CSV exportado)
+_COLUNAS_CONSULTA = (
+    "r.bloco, r.secao, r.codigo, r.tematica, r.pergunta, r.respostas, "
+    "r.grau_relevancia, r.aplicabilidade_nacional, r.aceitacao_item, r.comentarios_sugestoes, "
+    "s.nome, s.email, s.cpf, s.concordancia_instr_delphi, s.consentimento, s.timestamp, "
+    "s.rodada, s.submissao_id"
+)
+
+
+class ArmazenamentoSQLite:
+    """
+    Classe: ArmazenamentoSQLite
+
+    Objetivo:
+        Backend padrão: SQLite em modo WAL com tabelas normalizadas
+        (submissoes 1:N respostas). Uma única thread escritora drena a fila de
+        pedidos e grava todas as submissões pendentes em uma transação
+        (group commit); cada chamada a salvar() ou salvar_grupo() espera a
+        confirmação. Um grupo é um único pedido: se falhar, falha inteiro.
+
+    Entradas:
+        caminho (str): arquivo do banco SQLite.
+
+    Regras:
+        - cada submissão é atômica (registro + todos os itens ou nada)
+        - submissao_id já gravado ou conteúdo igual à última versão do
+          avaliador no bloco é rejeitado (SubmissaoDuplicada); o IndiceVersoes
+          em memória barra o reenvio antes da fila, e o escritor confere de
+          novo no banco, dentro da transação, o que outro processo (app, API,
+          importação) tenha gravado depois da partida
+    """
+
+    nome = "sqlite"
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        conn = self._conectar()
+        conn.executescript(_SCHEMA)
+        self._migrar(conn)
+        self.indice = IndiceVersoes()
+        self.indice.carregar(conn.execute(
+            "SELECT email, bloco, rodada, hash_conteudo, submissao_id FROM submissoes "
+            "ORDER BY timestamp, submissao_id"
+        ))
+        conn.close()
+
+        self._fila: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._escritor, name="delphi-sqlite", daemon=True)
+        self._thread.start()
+
+    def _conectar(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _migrar(conn: sqlite3.Connection) -> None:
+        # Bancos anteriores ao hash de conteúdo: coluna nova, preenchida sob demanda
+        colunas = {linha[1] for linha in conn.execute("PRAGMA table_info(submissoes)")}
+        if "hash_conteudo" not in colunas:
+            conn.execute("ALTER TABLE submissoes ADD COLUMN hash_conteudo TEXT")
+        # Anteriores às rodadas: tudo o que já existe é da 1ª rodada
+        if "rodada" not in colunas:
+            conn.execute("ALTER TABLE submissoes ADD COLUMN rodada INTEGER NOT NULL DEFAULT 1")
+        # Versão vigente do avaliador (conferida dentro da transação de gravação)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_submissoes_versao ON submissoes(lower(email), bloco, rodada)"
+        )
+
+    def salvar(self, registro: dict, respostas: list[dict]) -> str:
+        """
+        Função: salvar
+
+        Objetivo:
+            Conferir o índice de versões, enfileirar a submissão para o
+            escritor e aguardar o commit.
+
+        Saídas:
+            str: submissao_id gravado.
+
+        Efeitos colaterais:
+            - SubmissaoDuplicada para reenvio (id ou conteúdo repetido)
+            - TimeoutError se o escritor não confirmar em TEMPO_MAX_GRAVACAO_S
+        """
+        anterior = self.indice.reservar(registro)
+        futuro: Future = Future()
+        self._fila.put(([(registro, respostas)], futuro))
+        try:
+            gravado = futuro.result(timeout=TEMPO_MAX_GRAVACAO_S)[0]
+        except BaseException:
+            self._liberar_se_falhar(futuro, [(registro, anterior)])
+            raise
+        if gravado != registro["submissao_id"]:
+            self.indice.confirmar(registro, gravado)
+            raise SubmissaoDuplicada(gravado)
+        return gravado
+
+    def salvar_grupo(self, submissoes: list[tuple[dict, list[dict]]]) -> list[str | None]:
+        """
+        Função: salvar_grupo
+
+        Objetivo:
+            Gravar várias submissões (ex.: todos os blocos de um avaliador)
+            em uma única transação: ou todas entram, ou nenhuma. As que
+            repetem a versão vigente do avaliador no bloco são puladas.
+
+        Saídas:
+            list[str | None]: submissao_id gravado de cada submissão, ou
+            None para as puladas por repetirem a versão vigente.
+
+        Efeitos colaterais:
+            - SubmissaoDuplicada se algum submissao_id já estiver gravado
+              (o grupo inteiro não é gravado)
+        """
+        reservas, novas, ids = [], [], []
+        for registro, respostas in submissoes:
+            try:
+                reservas.append((registro, self.indice.reservar(registro)))
+            except SubmissaoDuplicada:
+                ids.append(None)
+                continue
+            novas.append((registro, respostas))
+            ids.append(registro["submissao_id"])
+        if not novas:
+            return ids
+
+        futuro: Future = Future()
+        self._fila.put((novas, futuro))
+        try:
+            gravados = futuro.result(timeout=TEMPO_MAX_GRAVACAO_S)
+        except BaseException:
+            self._liberar_se_falhar(futuro, reservas)
+            raise
+        pulados = {
+            registro["submissao_id"]: gravado
+            for (registro, _), gravado in zip(novas, gravados) if gravado != registro["submissao_id"]
+        }
+        for registro, _ in novas:
+            if registro["submissao_id"] in pulados:
+                self.indice.confirmar(registro, pulados[registro["submissao_id"]])
+        return [None if i in pulados else i for i in ids]
+
+    def _liberar_se_falhar(self, futuro: Future, reservas: list) -> None:
+        """
+        Desfazer as reservas do pedido se a gravação falhar. Após um
+        TimeoutError o escritor ainda pode confirmar o pedido: a reserva
+        fica até o futuro ser resolvido, para o reenvio seguinte continuar
+        barrado.
+        """
+
+        def _resolvido(f: Future) -> None:
+            if f.cancelled() or f.exception() is not None:
+                for registro, anterior in reversed(reservas):
+                    self.indice.liberar(registro, anterior)
+
+        futuro.add_done_callback(_resolvido)
+
+    def fechar(self) -> None:
+        """Encerrar a thread escritora após gravar o que estiver na fila."""
+        self._fila.put(None)
+        self._thread.join()
+
+    def _escritor(self) -> None:
+        conn = self._conectar()
+        while True:
+            pedido = self._fila.get()
+            if pedido is None:
+                break
+            lote = [pedido]
+            fim = False
+            while True:
+                try:
+                    pedido = self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                if pedido is None:
+                    fim = True
+                    break
+                lote.append(pedido)
+
+            try:
+                pulados = self._gravar(conn, lote)
+                for submissoes, futuro in lote:
+                    futuro.set_result(self._gravados(submissoes, pulados))
+            except Exception:
+                # Falha no lote (banco ou dado inválido: campo ausente, extra
+                # não serializável...): regrava pedido a pedido para isolar o
+                # inválido (um grupo continua atômico). Nenhuma exceção pode
+                # encerrar a thread, senão todo salvar() seguinte fica parado.
+                for pedido in lote:
+                    submissoes, futuro = pedido
+                    try:
+                        pulados = self._gravar(conn, [pedido])
+                        futuro.set_result(self._gravados(submissoes, pulados))
+                    except sqlite3.IntegrityError as e:
+                        if "submissoes.submissao_id" in str(e):
+                            futuro.set_exception(SubmissaoDuplicada(submissoes[0][0]["submissao_id"]))
+                        else:
+                            futuro.set_exception(e)
+                    except Exception as e:
+                        futuro.set_exception(e)
+            if fim:
+                break
+        conn.close()
+
+    @staticmethod
+    def _gravados(submissoes: list, pulados: dict[str, str]) -> list[str]:
+        """Resultado do pedido: submissao_id gravado, ou o da versão vigente igual (pulada)."""
+        return [pulados.get(registro["submissao_id"], registro["submissao_id"]) for registro, _ in submissoes]
+
+    def _gravar(self, conn: sqlite3.Connection, lote: list) -> dict[str, str]:
+        """
+        Gravar o lote em uma transação. Sob o lock de escrita (BEGIN
+        IMMEDIATE, exclusivo entre processos), cada submissão é conferida
+        contra a versão vigente no banco: conteúdo igual não é gravado.
+
+        Saídas:
+            dict: submissao_id pulado -> submissao_id da versão vigente igual.
+        """
+        gravado_em = datetime.now().isoformat(timespec="seconds")
+        pulados: dict[str, str] = {}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for registro, respostas in (sub for submissoes, _ in lote for sub in submissoes):
+                vigente = self._versao_vigente(conn, registro)
+                if vigente is not None and vigente["hash_conteudo"] == registro["hash_conteudo"]:
+                    pulados[registro["submissao_id"]] = vigente["submissao_id"]
+                    continue
+                extras = {k: v for k, v in registro.items() if k not in COLUNAS_REGISTRO}
+                conn.execute(
+                    "INSERT INTO submissoes (submissao_id, bloco, rodada, nome, email, cpf, concordancia_instr_delphi, "
+                    "consentimento, timestamp, extras, gravado_em, hash_conteudo) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        registro["submissao_id"], registro["bloco"], int(registro.get("rodada") or 1),
+                        registro["nome"], registro["email"], registro.get("cpf", ""),
+                        registro.get("concordancia_instr_delphi", ""),
+                        registro.get("consentimento", ""),
+                        registro["timestamp"],
+                        json.dumps(extras, ensure_ascii=False),
+                        gravado_em,
+                        registro.get("hash_conteudo"),
+                    ),
+                )
+                conn.executemany(
+                    "INSERT INTO respostas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            registro["submissao_id"], ordem, registro["bloco"],
+                            r["secao"], r["codigo"], r["tematica"],
+                            r["pergunta"], r.get("respostas", ""),
+                            r["grau_relevancia"], r["aplicabilidade_nacional"], r["aceitacao_item"],
+                            r.get("comentarios_sugestoes", ""),
+                        )
+                        for ordem, r in enumerate(respostas)
+                    ],
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return pulados
+
+    @staticmethod
+    def _versao_vigente(conn: sqlite3.Connection, registro: dict) -> sqlite3.Row | None:
+        """Última versão gravada (timestamp, submissao_id) do avaliador no bloco e na rodada."""
+        if not registro.get("hash_conteudo"):
+            return None
+        _, bloco, rodada = chave_avaliador(registro)
+        return conn.execute(
+            "SELECT hash_conteudo, submissao_id FROM submissoes "
+            "WHERE lower(email) = lower(?) AND bloco = ? AND rodada = ? "
+            "ORDER BY timestamp DESC, submissao_id DESC LIMIT 1",
+            (str(registro["email"]).strip(), bloco, int(rodada)),
+        ).fetchone()
+
+    def consultar(self, bloco: str | None = None, codigo: str | None = None, email: str | None = None) -> list[dict]:
+        """
+        Função: consultar
+
+        Objetivo:
+            Listar respostas (achatadas com os metadados da submissão),
+            filtrando por bloco, código do item e/ou e-mail do avaliador.
+        """
+        filtros, params = [], []
+        for coluna, valor in (("r.bloco", bloco), ("r.codigo", codigo), ("s.email", email)):
+            if valor is not None:
+                filtros.append(f"{coluna} = ?")
+                params.append(valor)
+        where = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+        sql = (
+            f"SELECT {_COLUNAS_CONSULTA} FROM respostas r JOIN submissoes s USING (submissao_id) {where} "
+            "ORDER BY s.submissao_id, r.ordem"
+        )
+        conn = self._conectar()
+        try:
+            return [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def respostas_desde(self, marca: int | None = None) -> tuple[list[dict], int]:
+        """
+        Função: respostas_desde
+
+        Objetivo:
+            Leitura incremental completa para a consolidação: respostas
+            (achatadas como em consultar) das submissões gravadas depois de
+            `marca` (rowid; None = desde o início), em ordem de gravação.
+
+        Saídas:
+            (linhas, marca): linhas como dict e a nova marca.
+        """
+        marca = marca or 0
+        conn = self._conectar()
+        try:
+            linhas = [
+                dict(row) for row in conn.execute(
+                    f"SELECT s.rowid AS _rowid, {_COLUNAS_CONSULTA} "
+                    "FROM respostas r JOIN submissoes s USING (submissao_id) "
+                    "WHERE s.rowid > ? ORDER BY s.rowid, r.ordem",
+                    (marca,),
+                )
+            ]
+        finally:
+            conn.close()
+        for linha in linhas:
+            marca = linha.pop("_rowid")
+        return linhas, marca
+
+    def submissoes_desde(self, marca: int | None = None) -> tuple[list[tuple[dict, list[dict]]], int]:
+        """
+        Função: submissoes_desde
+
+        Objetivo:
+            Leitura incremental para agregados ao vivo: submissões gravadas
+            depois de `marca` (rowid; None = desde o início), de qualquer
+            processo (app, API, importação), em ordem de gravação.
+
+        Saídas:
+            (submissoes, marca): pares (registro, respostas) e a nova marca.
+        """
+        marca = marca or 0
+        conn = self._conectar()
+        try:
+            linhas = conn.execute(
+                "SELECT s.rowid AS _rowid, s.submissao_id, s.bloco, s.rodada, s.nome, s.email, s.timestamp, "
+                "r.codigo, r.grau_relevancia, r.aplicabilidade_nacional, r.aceitacao_item "
+                "FROM submissoes s JOIN respostas r USING (submissao_id) "
+                "WHERE s.rowid > ? ORDER BY s.rowid, r.ordem",
+                (marca,),
+            ).fetchall()
+        finally:
+            conn.close()
+        submissoes: list[tuple[dict, list[dict]]] = []
+        for linha in linhas:
+            if linha["_rowid"] != marca:
+                marca = linha["_rowid"]
+                registro = {c: linha[c] for c in ("submissao_id", "bloco", "rodada", "nome", "email", "timestamp")}
+                submissoes.append((registro, []))
+            submissoes[-1][1].append({
+                c: linha[c] for c in ("codigo", "grau_relevancia", "aplicabilidade_nacional", "aceitacao_item")
+            })
+        return submissoes, marca
+
+    def contar_submissoes(self, bloco: str | None = None) -> int:
+        """Número de submissões gravadas (opcionalmente por bloco)."""
+        conn = self._conectar()
+        try:
+            if bloco is None:
+                return conn.execute("SELECT COUNT(*) FROM submissoes").fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM submissoes WHERE bloco = ?", (bloco,)).fetchone()[0]
+        finally:
+            conn.close()
+
+
+def criar_armazenamento(tipo: str, output_dir: str):
+    """
+    Função: criar_armazenamento
+
+    Objetivo:
+        Instanciar o backend de armazenamento configurado.
+
+    Entradas:
+        tipo (str): "sqlite" (padrão) ou "csv".
+        output_dir (str): diretório de saída.
+    """
+    if tipo == "sqlite":
+        return ArmazenamentoSQLite(os.path.join(output_dir, "submissoes.db"))
+    if tipo == "csv":
+        return ArmazenamentoCSV(output_dir)
+    raise ValueError(f"Backend de armazenamento desconhecido: {tipo}")
@@ -0,0 +1,418 @@
+import json
+import logging
+import os
+import random
+import shutil
+import subprocess
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from metricas import METRICAS
+
+# ============================================================
+# CAMADA: INFRA / BACKUP ASSÍNCRONO (fila em disco + espelho Git)
+# ============================================================
+
+logger = logging.getLogger("delphi_app")
+
+STATUS_PENDENTE = "pendente"
+STATUS_CONCLUIDO = "concluido"
+STATUS_FALHA = "falha"
+STATUS_DESCONHECIDO = "desconhecido"
+
+
+def _git(repo_dir: Path, *args: str, check: bool = True) -> subprocess.CompletedProcess:
+    """
+    Função: _git
+
+    Objetivo:
+        Executar um comando git no espelho local, capturando saída para
+        que falhas sejam registradas no log e não poluam o console.
+    """
+    return subprocess.run(
+        ["git", "-C", str(repo_dir), *args],
+        check=check,
+        text=True,
+        capture_output=True,
+    )
+
+
+class FilaBackup:
+    """
+    Classe: FilaBackup
+
+    Objetivo:
+        Fila durável em disco para pedidos de backup. Cada pedido é um
+        arquivo JSON em {fila_dir}/pendente; após o push ele é movido para
+        {fila_dir}/concluido. Pedidos sobrevivem a reinícios do processo.
+        Um pedido cujos arquivos falham repetidamente vai para
+        {fila_dir}/falha, para não travar os demais (reenfileirável movendo
+        o JSON de volta para pendente).
+
+    Entradas:
+        fila_dir (str | Path): diretório raiz da fila.
+    """
+
+    def __init__(self, fila_dir: str | Path):
+        self.fila_dir = Path(fila_dir)
+        self.pendente_dir = self.fila_dir / "pendente"
+        self.concluido_dir = self.fila_dir / "concluido"
+        self.falha_dir = self.fila_dir / "falha"
+        self.pendente_dir.mkdir(parents=True, exist_ok=True)
+        self.concluido_dir.mkdir(parents=True, exist_ok=True)
+        self.falha_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _gravar(self, path: Path, pedido: dict) -> None:
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(pedido, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def enfileirar(self, csv_path: str, bloco_id: str, extras: list[tuple[str, str]] = ()) -> str:
+        """
+        Função: enfileirar
+
+        Objetivo:
+            Registrar um pedido de backup de forma atômica (tmp + rename).
+            `extras` acrescenta outros (csv_path, bloco_id) ao mesmo pedido,
+            enviados sempre no mesmo commit (envio com vários blocos).
+
+        Saídas:
+            str: identificador do pedido (usado para consultar o status).
+        """
+        pedido_id = f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}_{uuid.uuid4().hex[:8]}"
+        pedido = {
+            "id": pedido_id,
+            "csv_path": str(csv_path),
+            "bloco_id": bloco_id,
+            "enfileirado_em": datetime.now().isoformat(timespec="seconds"),
+            "tentativas": 0,
+            "ultimo_erro": "",
+        }
+        if extras:
+            pedido["extras"] = [[str(c), b] for c, b in extras]
+        with self._lock:
+            self._gravar(self.pendente_dir / f"{pedido_id}.json", pedido)
+        return pedido_id
+
+    def pendentes(self) -> list[dict]:
+        """
+        Função: pendentes
+
+        Objetivo:
+            Listar pedidos pendentes em ordem de chegada.
+        """
+        pedidos = []
+        for p in sorted(self.pendente_dir.glob("*.json")):
+            try:
+                pedidos.append(json.loads(p.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                logger.exception("Pedido de backup ilegível: %s", p)
+        return pedidos
+
+    def tamanho(self) -> int:
+        """Número de pedidos aguardando backup."""
+        return sum(1 for _ in self.pendente_dir.glob("*.json"))
+
+    def concluir(self, pedidos: list[dict], commit: str) -> None:
+        """
+        Função: concluir
+
+        Objetivo:
+            Mover pedidos enviados para {fila_dir}/concluido, registrando o
+            commit que os contém.
+        """
+        concluido_em = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            for pedido in pedidos:
+                pedido = {**pedido, "commit": commit, "concluido_em": concluido_em, "ultimo_erro": ""}
+                self._gravar(self.concluido_dir / f"{pedido['id']}.json", pedido)
+                (self.pendente_dir / f"{pedido['id']}.json").unlink(missing_ok=True)
+
+    def registrar_falha(self, pedidos: list[dict], erro: str, limite: int = 0) -> list[dict]:
+        """
+        Função: registrar_falha
+
+        Objetivo:
+            Manter pedidos na fila, incrementando tentativas e guardando o
+            erro. Com `limite`, o pedido que atingir esse número de
+            tentativas sai da fila e vai para {fila_dir}/falha.
+
+        Saídas:
+            list[dict]: pedidos movidos para falha.
+        """
+        isolados = []
+        with self._lock:
+            for pedido in pedidos:
+                path = self.pendente_dir / f"{pedido['id']}.json"
+                if not path.exists():
+                    continue
+                pedido = {**pedido, "tentativas": pedido.get("tentativas", 0) + 1, "ultimo_erro": erro}
+                if limite and pedido["tentativas"] >= limite:
+                    self._gravar(self.falha_dir / f"{pedido['id']}.json", pedido)
+                    path.unlink(missing_ok=True)
+                    isolados.append(pedido)
+                else:
+                    self._gravar(path, pedido)
+        return isolados
+
+    def status(self, pedido_id: str) -> dict:
+        """
+        Função: status
+
+        Objetivo:
+            Consultar a situação de um pedido.
+
+        Saídas:
+            dict: {"status": pendente|concluido|falha|desconhecido, ...dados do pedido}
+        """
+        for pasta, status in (
+            (self.concluido_dir, STATUS_CONCLUIDO), (self.pendente_dir, STATUS_PENDENTE), (self.falha_dir, STATUS_FALHA),
+        ):
+            path = pasta / f"{pedido_id}.json"
+            if path.exists():
+                try:
+                    return {"status": status, **json.loads(path.read_text(encoding="utf-8"))}
+                except (OSError, ValueError):
+                    return {"status": status}
+        return {"status": STATUS_DESCONHECIDO}
+
+
+class EspelhoRepo:
+    """
+    Classe: EspelhoRepo
+
+    Objetivo:
+        Manter um clone local persistente ("espelho quente") do repositório
+        privado. O clone é feito uma única vez; depois, cada ciclo apenas
+        busca o topo remoto (fetch raso) e reposiciona o espelho.
+
+    Entradas:
+        repo_dir (str | Path): diretório do clone persistente.
+        repo_url (str): URL remota (HTTPS com token ou repositório bare local).
+        branch (str): branch de destino.
+        git_user_name / git_user_email (str): autor dos commits de backup.
+    """
+
+    def __init__(
+        self,
+        repo_dir: str | Path,
+        repo_url: str,
+        branch: str,
+        git_user_name: str = "delphi-bot",
+        git_user_email: str = "noreply@example.com",
+    ):
+        self.repo_dir = Path(repo_dir)
+        self.repo_url = repo_url
+        self.branch = branch
+        self.git_user_name = git_user_name
+        self.git_user_email = git_user_email
+
+    def sincronizar(self) -> None:
+        """
+        Função: sincronizar
+
+        Objetivo:
+            Garantir que o espelho existe e está alinhado ao topo remoto.
+            Como os commits de backup apenas adicionam arquivos, reposicionar
+            no topo remoto e reaplicar as cópias equivale a um rebase.
+        """
+        if not (self.repo_dir / ".git").exists():
+            if self.repo_dir.exists():
+                shutil.rmtree(self.repo_dir)
+            self.repo_dir.parent.mkdir(parents=True, exist_ok=True)
+            subprocess.run(
+                ["git", "clone", "--depth", "1", "--branch", self.branch, self.repo_url, str(self.repo_dir)],
+                check=True,
+                text=True,
+                capture_output=True,
+            )
+            return
+
+        # O token pode ter sido trocado entre execuções
+        _git(self.repo_dir, "remote", "set-url", "origin", self.repo_url)
+        _git(self.repo_dir, "fetch", "--depth", "1", "origin", self.branch)
+        _git(self.repo_dir, "reset", "--hard", f"origin/{self.branch}")
+        _git(self.repo_dir, "clean", "-fd")
+
+    def aplicar(self, pedidos: list[dict]) -> tuple[str, list[tuple[dict, str]]]:
+        """
+        Função: aplicar
+
+        Objetivo:
+            Copiar os CSVs dos pedidos (inclusive os extras de envios com
+            vários blocos) para respostas/{bloco_id}/ e criar um único
+            commit com todos eles.
+
+        Regras:
+            - arquivo ausente (ou caminho vazio/que não é arquivo) é ignorado
+            - pedido com erro ao copiar fica fora do commit (sem cópias
+              parciais) e é devolvido em `falhos`; os demais seguem
+
+        Saídas:
+            (commit, falhos): hash do commit (ou do HEAD, se nada mudou) e
+            lista de (pedido, erro) que não puderam ser aplicados.
+        """
+        nomes, falhos = [], []
+        for pedido in pedidos:
+            copiados = []
+            try:
+                for csv_path, bloco_id in [(pedido["csv_path"], pedido["bloco_id"]), *pedido.get("extras", [])]:
+                    origem = Path(csv_path)
+                    if not csv_path or not origem.is_file():
+                        logger.warning("Backup: arquivo ausente, ignorado: %r", csv_path)
+                        continue
+                    dest_rel = f"respostas/{bloco_id}/{origem.name}"
+                    (self.repo_dir / dest_rel).parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(origem, self.repo_dir / dest_rel)
+                    copiados.append(dest_rel)
+            except OSError as e:
+                for dest_rel in copiados:
+                    (self.repo_dir / dest_rel).unlink(missing_ok=True)
+                falhos.append((pedido, str(e)))
+                continue
+            nomes.extend(copiados)
+
+        if nomes:
+            _git(self.repo_dir, "add", "--", *nomes)
+
+        if _git(self.repo_dir, "status", "--porcelain").stdout.strip():
+            if len(nomes) == 1:
+                msg = f"Backup {nomes[0].split('/')[1]}: {os.path.basename(nomes[0])}"
+            else:
+                msg = f"Backup de {len(nomes)} submissões\n\n" + "\n".join(nomes)
+            _git(
+                self.repo_dir,
+                "-c", f"user.name={self.git_user_name}",
+                "-c", f"user.email={self.git_user_email}",
+                "commit", "-m", msg,
+            )
+
+        return _git(self.repo_dir, "rev-parse", "HEAD").stdout.strip(), falhos
+
+    def enviar(self) -> None:
+        """Executar push do branch de destino."""
+        _git(self.repo_dir, "push", "origin", f"HEAD:{self.branch}")
+
+
+class TrabalhadorBackup(threading.Thread):
+    """
+    Classe: TrabalhadorBackup
+
+    Objetivo:
+        Thread em segundo plano que esvazia a FilaBackup. Pedidos que chegam
+        dentro de uma janela de agregação viram um único commit/push; pushes
+        rejeitados (corrida com outro escritor) ou falhas de rede são
+        repetidos com backoff exponencial.
+
+    Entradas:
+        fila (FilaBackup): fila durável de pedidos.
+        espelho (EspelhoRepo): clone persistente do repositório privado.
+        janela_s (float): tempo de espera para agregar pedidos concorrentes.
+        tentativas (int): máximo de tentativas de push por ciclo.
+        backoff_s (float): espera base entre tentativas (dobra a cada falha).
+        intervalo_s (float): período de varredura da fila sem novos pedidos.
+        max_falhas (int): ciclos com erro nos próprios arquivos após os quais
+            o pedido vai para a pasta de falha (os demais seguem).
+    """
+
+    def __init__(
+        self,
+        fila: FilaBackup,
+        espelho: EspelhoRepo,
+        janela_s: float = 5.0,
+        tentativas: int = 5,
+        backoff_s: float = 2.0,
+        intervalo_s: float = 60.0,
+        max_falhas: int = 3,
+    ):
+        super().__init__(name="delphi-backup", daemon=True)
+        self.fila = fila
+        self.espelho = espelho
+        self.janela_s = janela_s
+        self.tentativas = tentativas
+        self.backoff_s = backoff_s
+        self.intervalo_s = intervalo_s
+        self.max_falhas = max_falhas
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+
+    def enfileirar(self, csv_path: str, bloco_id: str, extras: list[tuple[str, str]] = ()) -> str:
+        """Registrar o pedido na fila e acordar o trabalhador."""
+        pedido_id = self.fila.enfileirar(csv_path, bloco_id, extras)
+        self._acordar.set()
+        return pedido_id
+
+    def parar(self) -> None:
+        """Sinalizar término da thread (usado em testes e benchmarks)."""
+        self._parar.set()
+        self._acordar.set()
+
+    def run(self) -> None:
+        self._acordar.set()  # pedidos deixados por uma execução anterior
+        while not self._parar.is_set():
+            self._acordar.wait(timeout=self.intervalo_s)
+            self._acordar.clear()
+            if self._parar.is_set() or not self.fila.tamanho():
+                continue
+            # Janela de agregação: pedidos que chegarem agora entram no mesmo commit
+            self._parar.wait(timeout=self.janela_s)
+            self.processar_lote()
+
+    def processar_lote(self) -> bool:
+        """
+        Função: processar_lote
+
+        Objetivo:
+            Enviar todos os pedidos pendentes em um commit, com até
+            `tentativas` tentativas e backoff exponencial com jitter. Um
+            pedido cujos arquivos não podem ser copiados não bloqueia o lote:
+            fica na fila com o erro e, após `max_falhas` ciclos, vai para a
+            pasta de falha.
+
+        Saídas:
+            bool: True se o lote foi enviado (ou não havia pedidos).
+        """
+        pedidos = self.fila.pendentes()
+        if not pedidos:
+            return True
+
+        erro = ""
+        for tentativa in range(self.tentativas):
+            try:
+                with METRICAS.medir("backup_envio"):  # sync + commit + push, fora da sessão
+                    self.espelho.sincronizar()
+                    commit, falhos = self.espelho.aplicar(pedidos)
+                    self.espelho.enviar()
+                ids_falhos = {pedido["id"] for pedido, _ in falhos}
+                enviados = [p for p in pedidos if p["id"] not in ids_falhos]
+                self.fila.concluir(enviados, commit)
+                logger.info("Backup OK: %s pedido(s) | commit=%s", len(enviados), commit[:12],
+                            extra={"evento": "backup"})
+                for pedido, erro_pedido in falhos:
+                    logger.warning("Backup: pedido %s não aplicado: %s", pedido["id"], erro_pedido,
+                                   extra={"evento": "backup"})
+                    for isolado in self.fila.registrar_falha([pedido], erro_pedido, self.max_falhas):
+                        logger.error("Backup: pedido %s movido para a pasta de falha após %s tentativas",
+                                     isolado["id"], isolado["tentativas"], extra={"evento": "backup"})
+                return True
+            except subprocess.CalledProcessError as e:
+                erro = (e.stderr or str(e)).strip()
+            except OSError as e:
+                erro = str(e)
+            # Nunca persistir/logar a URL com token
+            erro = erro.replace(self.espelho.repo_url, "<remoto>")
+            logger.warning(
+                "Backup falhou (tentativa %s/%s): %s", tentativa + 1, self.tentativas, erro,
+                extra={"evento": "backup"},
+            )
+            if tentativa + 1 < self.tentativas:
+                espera = self.backoff_s * (2 ** tentativa) * (1 + random.random() / 2)
+                if self._parar.wait(timeout=espera):
+                    break
+
+        self.fila.registrar_falha(pedidos, erro)
+        logger.error("Backup adiado: %s pedido(s) permanecem na fila", len(pedidos), extra={"evento": "backup"})
+        return False
@@ -0,0 +1,92 @@
+import hashlib
+import threading
+from typing import Any, Callable
+
+# ============================================================
+# CAMADA: INFRA / CACHE DE BLOCOS (compartilhado entre sessões)
+# ============================================================
+
+
+def hash_arquivo(caminho: str) -> str:
+    """
+    Função: hash_arquivo
+
+    Objetivo:
+        Calcular o SHA-256 do conteúdo de um arquivo.
+    """
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class CacheBlocos:
+    """
+    Classe: CacheBlocos
+
+    Objetivo:
+        Guardar, por processo, os itens já compilados de cada bloco, evitando
+        recompilá-los a cada rerun do Streamlit.
+
+    Regras:
+        - chave: identificador do bloco
+        - validade: versão (hash de conteúdo) informada pelo chamador, a do
+          catálogo de blocos; nada é lido do disco aqui
+
+    Observação:
+        O valor retornado é compartilhado entre sessões e não deve ser
+        alterado pelo chamador.
+    """
+
+    def __init__(self):
+        self._entradas: dict[str, tuple[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def obter_versao(self, chave: str, versao: str, carregador: Callable[[], Any]) -> Any:
+        """
+        Função: obter_versao
+
+        Objetivo:
+            Retornar o valor em cache do bloco se a `versao` for a mesma;
+            senão, construí-lo com `carregador` e substituir a entrada.
+
+        Entradas:
+            chave (str): identificador do bloco.
+            versao (str): hash de conteúdo conhecido pelo chamador.
+            carregador (Callable): construtor do valor, chamado sem argumentos.
+        """
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada[0] == versao:
+                self.hits += 1
+                return entrada[1]
+
+        valor = carregador()
+        with self._lock:
+            self._entradas[chave] = (versao, valor)
+            self.misses += 1
+        return valor
+
+    def estatisticas(self) -> dict:
+        """
+        Função: estatisticas
+
+        Saídas:
+            dict: hits, misses, taxa de acerto e número de entradas.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "taxa_acerto": (self.hits / total) if total else 0.0,
+                "entradas": len(self._entradas),
+            }
+
+
+# Instância única por processo (módulos Python são carregados uma vez,
+# ao contrário do script do Streamlit, que é reexecutado a cada rerun)
+CACHE_BLOCOS = CacheBlocos()
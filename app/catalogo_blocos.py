@@ -0,0 +1,326 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from cache_blocos import hash_arquivo
+
+# ============================================================
+# CAMADA: DOMÍNIO / CATÁLOGO DE BLOCOS (pré-compilado)
+# ============================================================
+
+PADRAO_BLOCO = re.compile(r"bloco(\d+)_itens\.csv$")
+COLUNAS_OBRIGATORIAS = ["secao", "codigo", "tematica", "pergunta"]
+COLUNAS_ITEM = ["secao", "codigo", "tematica", "pergunta", "respostas"]
+VERSAO_FORMATO = 1
+
+
+def numero_bloco(arquivo: str) -> int:
+    """
+    Função: numero_bloco
+
+    Objetivo:
+        Extrair o número N de um nome blocoN_itens.csv (ordenação numérica).
+    """
+    m = PADRAO_BLOCO.match(arquivo)
+    return int(m.group(1)) if m else -1
+
+
+def diretorio_rodada(base_dir: str, rodada: int) -> str:
+    """
+    Função: diretorio_rodada
+
+    Objetivo:
+        Diretório dos blocos da rodada Delphi: base/rodadaN/ quando a rodada
+        tem itens próprios (ex.: itens reformulados após a rodada anterior);
+        caso contrário, os blocos de base/ valem para todas as rodadas.
+    """
+    especifico = os.path.join(base_dir, f"rodada{rodada}")
+    return especifico if os.path.isdir(especifico) else base_dir
+
+
+def descobrir_blocos(base_dir: str) -> list[str]:
+    """
+    Função: descobrir_blocos
+
+    Objetivo:
+        Listar arquivos blocoN_itens.csv em ordem numérica
+        (bloco2 antes de bloco10).
+    """
+    if not os.path.isdir(base_dir):
+        return []
+    return sorted((f for f in os.listdir(base_dir) if PADRAO_BLOCO.match(f)), key=numero_bloco)
+
+
+def ler_bloco_csv(caminho_csv: str) -> list[dict]:
+    """
+    Função: ler_bloco_csv
+
+    Objetivo:
+        Ler e normalizar o CSV de itens de um bloco (somente biblioteca padrão).
+
+    Saídas:
+        list[dict]: um dicionário por item, com colunas em minúsculas.
+
+    Regras/validações:
+        - colunas obrigatórias: secao, codigo, tematica, pergunta
+        - se existir 'texto' e não existir 'pergunta', cria pergunta=texto
+        - se não existir 'respostas', cria coluna vazia
+        - valores das colunas do item sem espaços nas bordas
+    """
+    with open(caminho_csv, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        cabecalho = [c.strip().lower() for c in next(reader, [])]
+        linhas = [linha for linha in reader if any(v.strip() for v in linha)]
+
+    if "pergunta" not in cabecalho and "texto" in cabecalho:
+        cabecalho_efetivo = cabecalho + ["pergunta"]
+        idx_texto = cabecalho.index("texto")
+        linhas = [linha + [linha[idx_texto] if idx_texto < len(linha) else ""] for linha in linhas]
+    else:
+        cabecalho_efetivo = cabecalho
+
+    faltando = [c for c in COLUNAS_OBRIGATORIAS if c not in cabecalho_efetivo]
+    if faltando:
+        raise ValueError(f"CSV sem colunas obrigatórias: {faltando}")
+
+    itens = []
+    for linha in linhas:
+        item = {c: (linha[i] if i < len(linha) else "") for i, c in enumerate(cabecalho_efetivo)}
+        item.setdefault("respostas", "")
+        for c in COLUNAS_ITEM:
+            item[c] = item[c].strip()
+        itens.append(item)
+    return itens
+
+
+def _compilar_bloco(base_dir: str, arquivo: str) -> dict:
+    caminho = os.path.join(base_dir, arquivo)
+    st_ = os.stat(caminho)
+    entrada = {
+        "bloco_id": arquivo.replace("_itens.csv", ""),
+        "arquivo": arquivo,
+        "numero": numero_bloco(arquivo),
+        "hash": hash_arquivo(caminho),
+        "mtime_ns": st_.st_mtime_ns,
+        "tamanho": st_.st_size,
+        "erro": "",
+        "n_itens": 0,
+        "secoes": [],
+        "tematicas": [],
+        "itens": [],
+    }
+    try:
+        itens = ler_bloco_csv(caminho)
+    except (ValueError, OSError, csv.Error) as e:
+        entrada["erro"] = str(e)
+        return entrada
+
+    entrada["itens"] = itens
+    entrada["n_itens"] = len(itens)
+    entrada["secoes"] = list(dict.fromkeys(i["secao"] for i in itens))
+    entrada["tematicas"] = list(dict.fromkeys(i["tematica"] for i in itens))
+    return entrada
+
+
+def compilar_catalogo(base_dir: str, anterior: dict | None = None) -> dict:
+    """
+    Função: compilar_catalogo
+
+    Objetivo:
+        Compilar todos os blocoN_itens.csv de base_dir em um único catálogo,
+        com itens validados e normalizados, hash por bloco e metadados.
+        Blocos cujo conteúdo não mudou são reaproveitados de `anterior`.
+
+    Saídas:
+        dict: catálogo (serializável em JSON).
+    """
+    anteriores = {b["arquivo"]: b for b in (anterior or {}).get("blocos", [])}
+    blocos = []
+    for arquivo in descobrir_blocos(base_dir):
+        antigo = anteriores.get(arquivo)
+        caminho = os.path.join(base_dir, arquivo)
+        if antigo is not None and _bloco_inalterado(antigo, caminho):
+            blocos.append(antigo)
+        else:
+            blocos.append(_compilar_bloco(base_dir, arquivo))
+
+    versao = hashlib.sha256("".join(b["hash"] for b in blocos).encode()).hexdigest()[:12]
+    return {
+        "versao_formato": VERSAO_FORMATO,
+        "versao_instrumento": versao,
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "n_blocos": len(blocos),
+        "n_itens": sum(b["n_itens"] for b in blocos),
+        "blocos": blocos,
+    }
+
+
+def _bloco_inalterado(entrada: dict, caminho: str) -> bool:
+    try:
+        st_ = os.stat(caminho)
+    except FileNotFoundError:
+        return False
+    if (st_.st_mtime_ns, st_.st_size) == (entrada["mtime_ns"], entrada["tamanho"]):
+        return True
+    if hash_arquivo(caminho) == entrada["hash"]:
+        entrada["mtime_ns"], entrada["tamanho"] = st_.st_mtime_ns, st_.st_size
+        return True
+    return False
+
+
+def catalogo_atualizado(catalogo: dict, base_dir: str) -> bool:
+    """
+    Função: catalogo_atualizado
+
+    Objetivo:
+        Verificar se o catálogo ainda corresponde aos CSVs de base_dir
+        (mesmo conjunto de arquivos e mesmo conteúdo).
+    """
+    if catalogo.get("versao_formato") != VERSAO_FORMATO:
+        return False
+    arquivos = descobrir_blocos(base_dir)
+    if arquivos != [b["arquivo"] for b in catalogo["blocos"]]:
+        return False
+    return all(_bloco_inalterado(b, os.path.join(base_dir, b["arquivo"])) for b in catalogo["blocos"])
+
+
+def salvar_catalogo(catalogo: dict, caminho: str) -> None:
+    """Gravar o catálogo em JSON de forma atômica (tmp + rename)."""
+    Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+    tmp = f"{caminho}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(catalogo, f, ensure_ascii=False)
+    os.replace(tmp, caminho)
+
+
+def carregar_catalogo(caminho: str) -> dict | None:
+    """Ler o catálogo de disco (None se ausente ou inválido)."""
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class Catalogo:
+    """
+    Classe: Catalogo
+
+    Objetivo:
+        Manter em memória o catálogo de blocos, carregado uma vez por processo
+        e recompilado automaticamente quando algum CSV de base_dir muda.
+        A verificação de mudança é limitada a uma a cada `intervalo_s`
+        segundos, para não varrer o diretório a cada rerun.
+
+    Entradas:
+        base_dir (str): diretório dos CSVs de bloco.
+        caminho (str): arquivo JSON do catálogo compilado.
+        intervalo_s (float): período mínimo entre verificações.
+    """
+
+    def __init__(self, base_dir: str, caminho: str, intervalo_s: float = 10.0):
+        self.base_dir = base_dir
+        self.caminho = caminho
+        self.intervalo_s = intervalo_s
+        self._lock = threading.Lock()
+        self._verificado_em = 0.0
+
+        dados = carregar_catalogo(caminho)
+        if dados is None or not catalogo_atualizado(dados, base_dir):
+            dados = compilar_catalogo(base_dir, dados)
+            self._salvar(dados)
+        self._definir(dados)
+        self._verificado_em = time.monotonic()
+
+    def _definir(self, dados: dict) -> None:
+        self.dados = dados
+        self._por_id = {b["bloco_id"]: b for b in dados["blocos"]}
+        self._por_arquivo = {b["arquivo"]: b for b in dados["blocos"]}
+
+    def _salvar(self, dados: dict) -> None:
+        try:
+            salvar_catalogo(dados, self.caminho)
+        except OSError:
+            # Sem permissão de escrita: o catálogo segue válido em memória
+            pass
+
+    def verificar(self) -> bool:
+        """
+        Função: verificar
+
+        Objetivo:
+            Recompilar o catálogo se os CSVs mudaram (respeitando intervalo_s).
+
+        Saídas:
+            bool: True se houve recompilação.
+        """
+        agora = time.monotonic()
+        if agora - self._verificado_em < self.intervalo_s:
+            return False
+        with self._lock:
+            if agora - self._verificado_em < self.intervalo_s:
+                return False
+            self._verificado_em = agora
+            if catalogo_atualizado(self.dados, self.base_dir):
+                return False
+            dados = compilar_catalogo(self.base_dir, self.dados)
+            self._salvar(dados)
+            self._definir(dados)
+            return True
+
+    def blocos(self) -> list[dict]:
+        """Entradas de bloco em ordem numérica."""
+        self.verificar()
+        return self.dados["blocos"]
+
+    def bloco(self, chave: str) -> dict:
+        """
+        Função: bloco
+
+        Objetivo:
+            Obter a entrada de um bloco por bloco_id ("bloco1") ou nome de
+            arquivo ("bloco1_itens.csv").
+
+        Regras:
+            - KeyError se o bloco não existe
+            - ValueError se o CSV do bloco não passou na validação
+        """
+        entrada = self._por_id.get(chave) or self._por_arquivo.get(chave)
+        if entrada is None:
+            raise KeyError(f"Bloco não encontrado no catálogo: {chave}")
+        if entrada["erro"]:
+            raise ValueError(entrada["erro"])
+        return entrada
+
+
+def main() -> None:
+    """
+    Função: main
+
+    Objetivo:
+        Etapa de build: compilar base/blocoN_itens.csv em um catálogo JSON.
+    """
+    root = Path(__file__).resolve().parents[1]
+    parser = argparse.ArgumentParser(description="Compila os blocos do instrumento em um catálogo JSON.")
+    parser.add_argument("--base-dir", default=str(root / "base"))
+    parser.add_argument("--saida", default=str(root / "outputs" / "catalogo_blocos.json"))
+    args = parser.parse_args()
+
+    catalogo = compilar_catalogo(args.base_dir)
+    salvar_catalogo(catalogo, args.saida)
+
+    print(f"OK. Catálogo gerado em {args.saida} (versão {catalogo['versao_instrumento']})")
+    for b in catalogo["blocos"]:
+        status = f"ERRO: {b['erro']}" if b["erro"] else f"{b['n_itens']} itens, {len(b['secoes'])} seção(ões)"
+        print(f"- {b['arquivo']}: {status}")
+
+
+if __name__ == "__main__":
+    main()
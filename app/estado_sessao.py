@@ -0,0 +1,121 @@
+import sys
+from typing import Iterator, Mapping
+
+# ============================================================
+# CAMADA: DOMÍNIO / ESTADO DA SESSÃO (respostas compactas por bloco)
+# ============================================================
+
+# Um byte por item: bits 0-2 = grau - 1, bit 3 = aplicabilidade "Não",
+# bit 4 = aceitação "Não", bit 5 = item visto. O byte 0 é "não visto".
+_GRAU = 0b0000_0111
+_APLIC_NAO = 0b0000_1000
+_ACEITA_NAO = 0b0001_0000
+_VISTO = 0b0010_0000
+
+
+def _codificar(resposta: dict) -> int:
+    grau = min(max(int(resposta["grau_relevancia"]), 1), 5) - 1
+    return (
+        _VISTO | grau
+        | (_APLIC_NAO if resposta["aplicabilidade_nacional"] == "Não" else 0)
+        | (_ACEITA_NAO if resposta["aceitacao_item"] == "Não" else 0)
+    )
+
+
+class RespostasBloco:
+    """
+    Classe: RespostasBloco
+
+    Objetivo:
+        Respostas de um bloco guardadas na sessão de forma compacta: um byte
+        por item (bytearray indexado pela posição do item no bloco) e só os
+        comentários não vazios, em vez de um dicionário de quatro campos por
+        item. As respostas como dict são montadas sob demanda.
+
+    Regras:
+        - item nunca visto não tem resposta (obter -> None) e não conta em
+          len(); a resposta usada no envio é a padrão
+        - cresce conforme os itens são vistos (não precisa do total do bloco)
+    """
+
+    __slots__ = ("_codigos", "_comentarios", "_vistos")
+
+    def __init__(self):
+        self._codigos = bytearray()
+        self._comentarios: dict[int, str] = {}
+        self._vistos = 0
+
+    def definir(self, indice: int, resposta: dict) -> None:
+        if indice >= len(self._codigos):
+            self._codigos.extend(bytes(indice + 1 - len(self._codigos)))
+        if not self._codigos[indice]:
+            self._vistos += 1
+        self._codigos[indice] = _codificar(resposta)
+        comentario = resposta["comentarios_sugestoes"]
+        if comentario:
+            self._comentarios[indice] = comentario
+        else:
+            self._comentarios.pop(indice, None)
+
+    def obter(self, indice: int) -> dict | None:
+        """Resposta do item (dict novo), ou None se o item não foi visto."""
+        codigo = self._codigos[indice] if indice < len(self._codigos) else 0
+        if not codigo:
+            return None
+        return {
+            "grau_relevancia": (codigo & _GRAU) + 1,
+            "aplicabilidade_nacional": "Não" if codigo & _APLIC_NAO else "Sim",
+            "aceitacao_item": "Não" if codigo & _ACEITA_NAO else "Sim",
+            "comentarios_sugestoes": self._comentarios.get(indice, ""),
+        }
+
+    def itens(self) -> Iterator[tuple[int, dict]]:
+        """(índice, resposta) dos itens vistos."""
+        for indice, codigo in enumerate(self._codigos):
+            if codigo:
+                yield indice, self.obter(indice)
+
+    def pendentes(self) -> int:
+        """Itens vistos com comentário obrigatório faltando (Aceitação ou Aplicabilidade = Não)."""
+        return sum(
+            1 for indice, codigo in enumerate(self._codigos)
+            if codigo & (_APLIC_NAO | _ACEITA_NAO) and not self._comentarios.get(indice, "").strip()
+        )
+
+    def __len__(self) -> int:
+        return self._vistos
+
+    def tamanho_bytes(self) -> int:
+        """Memória ocupada (estrutura, códigos e comentários)."""
+        return (
+            sys.getsizeof(self) + sys.getsizeof(self._codigos) + sys.getsizeof(self._comentarios)
+            + sum(sys.getsizeof(c) for c in self._comentarios.values())
+        )
+
+
+def tamanho_sessao(estado: Mapping) -> int:
+    """
+    Função: tamanho_sessao
+
+    Objetivo:
+        Estimar a memória de um st.session_state: chaves e valores, com um
+        nível de conteúdo para listas, conjuntos, tuplas e dicionários e o
+        tamanho próprio de RespostasBloco. Estimativa para acompanhamento
+        (objetos compartilhados entre sessões, como ItemBloco, não entram).
+    """
+    total = 0
+    for chave in list(estado.keys()):
+        try:
+            valor = estado[chave]
+        except KeyError:  # removida por outro fragmento no meio da leitura
+            continue
+        total += sys.getsizeof(chave)
+        if isinstance(valor, RespostasBloco):
+            total += valor.tamanho_bytes()
+        elif isinstance(valor, dict):
+            total += sys.getsizeof(valor) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in valor.items())
+        elif isinstance(valor, (list, tuple, set, frozenset)):
+            total += sys.getsizeof(valor) + sum(sys.getsizeof(v) for v in valor)
+        else:
+            total += sys.getsizeof(valor)
+    return total
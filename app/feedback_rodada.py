@@ -0,0 +1,237 @@
+import argparse
+import csv
+import hmac
+import json
+import math
+import os
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from pseudonimizacao import Pseudonimizador, carregar_chave
+
+# ============================================================
+# CAMADA: DOMÍNIO / FEEDBACK DA RODADA ANTERIOR (índice pré-calculado)
+# ============================================================
+
+NIVEIS = 5  # escala de relevância 1..5
+VERSAO_FORMATO = 2  # 2: respostas próprias chaveadas pelo pseudônimo HMAC do avaliador
+
+# Token do link individual (?avaliador=<token>) que libera a resposta própria:
+# HMAC do e-mail em domínio separado, para que o pseudônimo publicado nas
+# exportações não sirva de token
+DOMINIO_ACESSO = "acesso"
+
+
+def caminho_indice(output_dir: str, rodada: int) -> str:
+    """Arquivo do índice de feedback gerado a partir da rodada `rodada`."""
+    return os.path.join(output_dir, f"feedback_rodada{rodada}.json")
+
+
+def quantil_histograma(contagens: list[int], q: float) -> float:
+    """
+    Quantil (interpolação linear, a mesma de estatisticas_consenso) de notas
+    inteiras 1..NIVEIS a partir das contagens por nível.
+    """
+    n = sum(contagens)
+    if n == 0:
+        return math.nan
+    h = (n - 1) * q
+    lo = math.floor(h)
+    hi = min(lo + 1, n - 1)
+
+    def nota(k: int) -> int:
+        acumulado = 0
+        for nivel, c in enumerate(contagens, start=1):
+            acumulado += c
+            if acumulado > k:
+                return nivel
+        return NIVEIS
+
+    return nota(lo) + (h - lo) * (nota(hi) - nota(lo))
+
+
+def compilar_indice(linhas, rodada: int, avaliadores: Pseudonimizador | None = None) -> dict:
+    """
+    Função: compilar_indice
+
+    Objetivo:
+        Montar o índice de feedback de uma rodada a partir das linhas do
+        consolidado (uma por avaliador x item, já só com a versão vigente):
+        por item, n, mediana, Q1, Q3, IQR e % de aceitação do grupo; por
+        avaliador (pseudônimo), a própria resposta em cada item.
+
+    Entradas:
+        linhas (Iterable[dict]): linhas do consolidado (lidas em fluxo).
+        rodada (int): rodada a resumir; linhas sem rodada são da 1ª.
+        avaliadores (Pseudonimizador | None): para consolidados gerados com
+            --identificado (coluna email em vez de avaliador).
+
+    Saídas:
+        dict: índice serializável em JSON.
+    """
+    contagens: dict[tuple[str, str], list[int]] = defaultdict(lambda: [0] * NIVEIS)
+    totais: dict[tuple[str, str], list[int]] = defaultdict(lambda: [0, 0])  # [respostas, aceitações]
+    proprias: dict[str, dict[str, dict[str, list]]] = defaultdict(lambda: defaultdict(dict))
+    for linha in linhas:
+        if str(linha.get("rodada") or 1) != str(rodada):
+            continue
+        chave = (linha["bloco"], linha["codigo"])
+        try:
+            grau = int(float(linha["grau_relevancia"]))
+        except (TypeError, ValueError):
+            grau = None
+        if grau is not None and 1 <= grau <= NIVEIS:
+            contagens[chave][grau - 1] += 1
+        totais[chave][0] += 1
+        totais[chave][1] += str(linha.get("aceitacao_item", "")).strip() == "Sim"
+        avaliador = linha.get("avaliador")
+        if avaliador is None and avaliadores is not None:
+            avaliador = avaliadores(linha.get("email") or linha.get("nome"))
+        if avaliador:
+            proprias[avaliador][chave[0]][chave[1]] = [
+                grau, linha.get("aplicabilidade_nacional", ""), linha.get("aceitacao_item", ""),
+            ]
+
+    itens: dict[str, dict[str, dict]] = defaultdict(dict)
+    for (bloco, codigo), (n_total, n_aceita) in totais.items():
+        c = contagens[(bloco, codigo)]
+        q1, q3 = quantil_histograma(c, 0.25), quantil_histograma(c, 0.75)
+        estatisticas = {"mediana": quantil_histograma(c, 0.5), "q1": q1, "q3": q3, "iqr": q3 - q1}
+        itens[bloco][codigo] = {
+            "n": sum(c),
+            **{k: None if math.isnan(v) else v for k, v in estatisticas.items()},
+            "pct_aceitacao": n_aceita / n_total,
+        }
+    return {
+        "versao_formato": VERSAO_FORMATO,
+        "rodada": rodada,
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "n_avaliadores": len(proprias),
+        "itens": itens,
+        "proprias": proprias,
+    }
+
+
+def _fmt(valor: float) -> str:
+    return "–" if valor is None else f"{valor:g}".replace(".", ",")
+
+
+class IndiceFeedback:
+    """
+    Classe: IndiceFeedback
+
+    Objetivo:
+        Índice, em memória e somente leitura, do resultado da rodada anterior
+        mostrado junto a cada item: o texto do grupo é formatado uma vez, na
+        carga, e as consultas por item são dicionários (O(1)). Uma instância
+        é compartilhada por todas as sessões.
+
+        A resposta própria é encontrada pelo pseudônimo do e-mail, então só
+        aparece com a mesma chave de pseudonimização da consolidação, e só
+        para quem abriu o app pelo link individual (token de `acessos`): o
+        e-mail digitado sozinho não comprova a identidade.
+    """
+
+    def __init__(
+        self,
+        dados: dict,
+        avaliadores: Pseudonimizador | None = None,
+        acessos: Pseudonimizador | None = None,
+    ):
+        self.rodada = int(dados["rodada"])
+        self.gerado_em = dados.get("gerado_em", "")
+        self._grupo = {
+            (bloco, codigo): (
+                f"Grupo (n={e['n']}): mediana {_fmt(e['mediana'])} · "
+                f"IQR {_fmt(e['iqr'])} ({_fmt(e['q1'])}–{_fmt(e['q3'])}) · "
+                f"aceitação {e['pct_aceitacao']:.0%}"
+            )
+            for bloco, itens in dados["itens"].items()
+            for codigo, e in itens.items()
+        }
+        self._proprias = dados["proprias"]
+        self._avaliadores = avaliadores
+        self._acessos = acessos
+
+    @classmethod
+    def carregar(
+        cls, caminho: str, avaliadores: Pseudonimizador | None = None, acessos: Pseudonimizador | None = None
+    ) -> "IndiceFeedback | None":
+        """Ler o índice gerado por `compilar_indice` (None se ausente ou inválido)."""
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if dados.get("versao_formato") != VERSAO_FORMATO:
+            return None
+        return cls(dados, avaliadores, acessos)
+
+    def grupo(self, bloco_id: str, codigo: str) -> str | None:
+        """Resumo do grupo no item (markdown pronto), ou None se o item não foi avaliado."""
+        return self._grupo.get((bloco_id, codigo))
+
+    def autorizado(self, email: str, token: str) -> bool:
+        """O token do link individual confere com o e-mail informado."""
+        if not email.strip() or not token or self._acessos is None:
+            return False
+        return hmac.compare_digest(token.encode("utf-8"), self._acessos(email).encode("utf-8"))
+
+    def propria(self, email: str, token: str, bloco_id: str, codigo: str) -> str | None:
+        """Resposta do avaliador no item na rodada anterior (markdown), ou None sem link válido."""
+        if self._avaliadores is None or not self.autorizado(email, token):
+            return None
+        resposta = self._proprias.get(self._avaliadores(email), {}).get(bloco_id, {}).get(codigo)
+        if resposta is None:
+            return None
+        grau, aplic, aceita = resposta
+        return f"Sua resposta: relevância {grau if grau is not None else '–'} · aplicabilidade {aplic} · aceitação {aceita}"
+
+
+def main() -> None:
+    """
+    Função: main
+
+    Objetivo:
+        Gerar outputs/feedback_rodadaN.json a partir do consolidado, ao
+        encerrar a rodada N e antes de abrir a rodada N+1.
+    """
+    root = Path(__file__).resolve().parents[1]
+    parser = argparse.ArgumentParser(description="Gera o índice de feedback de uma rodada Delphi encerrada.")
+    parser.add_argument("--rodada", type=int, required=True, help="rodada encerrada (ex.: 1)")
+    parser.add_argument("--entrada", type=Path, default=root / "outputs" / "consolidado_respostas.csv")
+    parser.add_argument("--saida", type=Path, default=None, help="padrão: outputs/feedback_rodadaN.json")
+    parser.add_argument("--links", type=Path, default=None,
+                        help="arquivo com um e-mail por linha: gera outputs/links_rodadaN.csv com o link "
+                             "individual de cada avaliador (libera a resposta própria no app)")
+    parser.add_argument("--url", default="", help="endereço do app usado nos links (ex.: https://...)")
+    args = parser.parse_args()
+
+    chave = carregar_chave(str(root / "outputs"), criar=True)
+    avaliadores = Pseudonimizador(chave, "avaliador")
+    with open(args.entrada, newline="", encoding="utf-8") as f:
+        indice = compilar_indice(csv.DictReader(f), args.rodada, avaliadores)
+    saida = args.saida or Path(caminho_indice(str(root / "outputs"), args.rodada))
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    tmp = saida.with_suffix(".tmp")
+    tmp.write_text(json.dumps(indice, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, saida)
+
+    n_itens = sum(len(itens) for itens in indice["itens"].values())
+    print(f"OK. Feedback da rodada {args.rodada}: {n_itens} item(ns), "
+          f"{indice['n_avaliadores']} avaliador(es) -> {saida}")
+
+    if args.links is not None:
+        acessos = Pseudonimizador(chave, DOMINIO_ACESSO)
+        emails = [e.strip() for e in args.links.read_text(encoding="utf-8").splitlines() if e.strip()]
+        destino = root / "outputs" / f"links_rodada{args.rodada}.csv"
+        with open(destino, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["email", "link"])
+            writer.writerows([e, f"{args.url}?avaliador={acessos(e)}"] for e in emails)
+        print(f"{len(emails)} link(s) individual(is) -> {destino} (contém e-mails: acesso restrito)")
+
+
+if __name__ == "__main__":
+    main()
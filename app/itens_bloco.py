@@ -0,0 +1,73 @@
+from typing import Iterable
+
+# ============================================================
+# CAMADA: DOMÍNIO / ITENS DO FORMULÁRIO (modelo imutável e compacto)
+# ============================================================
+
+
+class ItemBloco:
+    """
+    Classe: ItemBloco
+
+    Objetivo:
+        Item de um bloco pronto para o formulário: campos do CSV, posição no
+        bloco (índice em RespostasBloco), uid, chaves dos widgets e trechos
+        de markdown calculados uma única vez por versão do bloco
+        (CACHE_BLOCOS), em vez de a cada rerun.
+
+    Regras:
+        - imutável e com __slots__ (sem __dict__ por item); compartilhado
+          entre sessões
+        - aceita leitura como mapeamento (item["codigo"], item.get(...)), o
+          formato usado por linha_resposta
+    """
+
+    __slots__ = (
+        "secao", "codigo", "tematica", "pergunta", "respostas",
+        "indice", "uid", "chave_grau", "chave_aplic", "chave_aceita", "chave_coment",
+        "titulo_md", "pergunta_md",
+    )
+
+    def __init__(self, bloco_id: str, indice: int, campos: dict):
+        definir = object.__setattr__
+        for campo in ("secao", "codigo", "tematica", "pergunta"):
+            definir(self, campo, str(campos[campo]))
+        definir(self, "respostas", str(campos.get("respostas", "")).strip())
+        uid = f"{bloco_id}__{self.codigo}__{indice}"
+        definir(self, "indice", indice)
+        definir(self, "uid", uid)
+        definir(self, "chave_grau", f"grau_{uid}")
+        definir(self, "chave_aplic", f"aplic_{uid}")
+        definir(self, "chave_aceita", f"aceita_{uid}")
+        definir(self, "chave_coment", f"coment_{uid}")
+        definir(self, "titulo_md", f"### {self.codigo} | Seção: {self.secao} | Temática: {self.tematica}")
+        definir(self, "pergunta_md", f"**Pergunta:** {self.pergunta}")
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError("ItemBloco é imutável")
+
+    def __delattr__(self, nome):
+        raise AttributeError("ItemBloco é imutável")
+
+    def __getitem__(self, campo: str):
+        try:
+            return getattr(self, campo)
+        except AttributeError:
+            raise KeyError(campo) from None
+
+    def get(self, campo: str, padrao=None):
+        return getattr(self, campo, padrao)
+
+    def __repr__(self) -> str:
+        return f"ItemBloco({self.uid!r})"
+
+
+def compilar_itens(bloco_id: str, registros: Iterable[dict]) -> tuple[ItemBloco, ...]:
+    """
+    Função: compilar_itens
+
+    Objetivo:
+        Converter os itens normalizados de um bloco (ler_bloco_csv ou
+        catálogo) na tupla de ItemBloco usada pelo formulário.
+    """
+    return tuple(ItemBloco(bloco_id, i, registro) for i, registro in enumerate(registros))
@@ -0,0 +1,302 @@
+import bisect
+import cProfile
+import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator
+
+# ============================================================
+# CAMADA: INFRA / MÉTRICAS DE DESEMPENHO
+# ============================================================
+
+# Limites dos buckets de latência (segundos), no padrão dos histogramas Prometheus
+BUCKETS_S = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Fases instrumentadas do run_app (ordem de exibição no painel)
+FASES = ("gate", "bloco", "identificacao", "itens", "validacao", "salvamento", "backup")
+
+MAX_SESSOES = 500
+
+
+class Histograma:
+    """
+    Classe: Histograma
+
+    Objetivo:
+        Contagens cumulativas por bucket, soma e total de observações
+        (mesma semântica de um histograma Prometheus). O registro custa uma
+        busca binária e um incremento sob lock.
+    """
+
+    def __init__(self, limites: tuple = BUCKETS_S):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)  # último = +Inf
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float) -> None:
+        self.contagens[bisect.bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def quantil(self, q: float) -> float:
+        """Estimativa por interpolação linear dentro do bucket (como histogram_quantile)."""
+        if not self.total:
+            return float("nan")
+        alvo = q * self.total
+        acumulado = 0
+        for i, c in enumerate(self.contagens):
+            if acumulado + c >= alvo and c:
+                if i == len(self.limites):
+                    return self.limites[-1]
+                inicio = self.limites[i - 1] if i else 0.0
+                return inicio + (self.limites[i] - inicio) * (alvo - acumulado) / c
+            acumulado += c
+        return self.limites[-1]
+
+
+class Metricas:
+    """
+    Classe: Metricas
+
+    Objetivo:
+        Registro de métricas do processo (compartilhado por todas as
+        sessões): latência por fase, reruns e memória estimada por sessão e
+        medidores lidos sob demanda (taxa de acerto do cache, profundidade
+        da fila de backup).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fases: dict[str, Histograma] = {f: Histograma() for f in FASES}
+        self._reruns: OrderedDict[str, int] = OrderedDict()
+        self._reruns_total = 0
+        self._memoria: OrderedDict[str, int] = OrderedDict()
+        self._medidores: dict[str, tuple[str, Callable[[], float]]] = {}
+
+    # --------------------------------------------------------
+    # Registro
+    # --------------------------------------------------------
+    def observar(self, fase: str, segundos: float) -> None:
+        with self._lock:
+            hist = self._fases.get(fase)
+            if hist is None:
+                hist = self._fases[fase] = Histograma()
+            hist.observar(segundos)
+
+    @contextmanager
+    def medir(self, fase: str) -> Iterator[None]:
+        """
+        Cronometrar um trecho. O tempo é registrado mesmo quando o trecho
+        termina por st.stop()/st.rerun() (exceções de controle do Streamlit).
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(fase, time.perf_counter() - inicio)
+
+    def contar_rerun(self, sessao_id: str) -> None:
+        with self._lock:
+            self._reruns_total += 1
+            self._reruns[sessao_id] = self._reruns.pop(sessao_id, 0) + 1
+            while len(self._reruns) > MAX_SESSOES:  # sessões mais antigas saem
+                self._reruns.popitem(last=False)
+
+    def registrar_memoria_sessao(self, sessao_id: str, n_bytes: int) -> None:
+        """Memória estimada do session_state de uma sessão (último valor medido)."""
+        with self._lock:
+            self._memoria.pop(sessao_id, None)
+            self._memoria[sessao_id] = n_bytes
+            while len(self._memoria) > MAX_SESSOES:
+                self._memoria.popitem(last=False)
+
+    def registrar_medidor(self, nome: str, ajuda: str, leitor: Callable[[], float]) -> None:
+        with self._lock:
+            self._medidores[nome] = (ajuda, leitor)
+
+    # --------------------------------------------------------
+    # Leitura / exportação
+    # --------------------------------------------------------
+    def resumo_fases(self) -> list[dict]:
+        """Linhas por fase: n, média, p50, p95, p99 (ms) para o painel de admin."""
+        with self._lock:
+            linhas = []
+            for fase, h in self._fases.items():
+                linhas.append({
+                    "fase": fase,
+                    "n": h.total,
+                    "media_ms": round(1000 * h.soma / h.total, 2) if h.total else None,
+                    "p50_ms": round(1000 * h.quantil(0.50), 2) if h.total else None,
+                    "p95_ms": round(1000 * h.quantil(0.95), 2) if h.total else None,
+                    "p99_ms": round(1000 * h.quantil(0.99), 2) if h.total else None,
+                })
+            return linhas
+
+    def reruns(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._reruns)
+
+    def memoria_sessoes(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._memoria)
+
+    def ler_medidores(self) -> dict[str, float]:
+        with self._lock:
+            medidores = dict(self._medidores)
+        valores = {}
+        for nome, (_, leitor) in medidores.items():
+            try:
+                valores[nome] = float(leitor())
+            except Exception:  # um medidor com falha não derruba a exportação
+                valores[nome] = float("nan")
+        return valores
+
+    def exportar_prometheus(self) -> str:
+        """Todas as métricas no formato de texto do Prometheus (exposition format 0.0.4)."""
+        linhas = [
+            "# HELP delphi_fase_duracao_segundos Duração de cada fase do run_app.",
+            "# TYPE delphi_fase_duracao_segundos histogram",
+        ]
+        with self._lock:
+            for fase, h in self._fases.items():
+                acumulado = 0
+                for limite, c in zip((*h.limites, "+Inf"), h.contagens):
+                    acumulado += c
+                    linhas.append(f'delphi_fase_duracao_segundos_bucket{{fase="{fase}",le="{limite}"}} {acumulado}')
+                linhas.append(f'delphi_fase_duracao_segundos_sum{{fase="{fase}"}} {h.soma:.6f}')
+                linhas.append(f'delphi_fase_duracao_segundos_count{{fase="{fase}"}} {h.total}')
+
+            linhas += [
+                "# HELP delphi_reruns_total Reruns do script (todas as sessões).",
+                "# TYPE delphi_reruns_total counter",
+                f"delphi_reruns_total {self._reruns_total}",
+                "# HELP delphi_sessao_reruns Reruns por sessão (sessões mais recentes).",
+                "# TYPE delphi_sessao_reruns gauge",
+            ]
+            linhas += [f'delphi_sessao_reruns{{sessao="{s}"}} {n}' for s, n in self._reruns.items()]
+            linhas += [
+                "# HELP delphi_sessao_memoria_bytes Memória estimada do session_state por sessão.",
+                "# TYPE delphi_sessao_memoria_bytes gauge",
+            ]
+            linhas += [f'delphi_sessao_memoria_bytes{{sessao="{s}"}} {n}' for s, n in self._memoria.items()]
+            ajudas = {nome: ajuda for nome, (ajuda, _) in self._medidores.items()}
+
+        for nome, valor in self.ler_medidores().items():
+            linhas += [f"# HELP {nome} {ajudas[nome]}", f"# TYPE {nome} gauge", f"{nome} {valor}"]
+        return "\n".join(linhas) + "\n"
+
+
+METRICAS = Metricas()
+
+
+# ============================================================
+# EXPORTAÇÃO (arquivo .prom e endpoint HTTP opcional)
+# ============================================================
+
+class ExportadorMetricas(threading.Thread):
+    """
+    Classe: ExportadorMetricas
+
+    Objetivo:
+        Thread de fundo que regrava o arquivo de métricas (formato texto do
+        Prometheus, lido pelo textfile collector do node_exporter) a cada
+        `intervalo_s` e, se `porta` for informada, serve GET /metrics em
+        `endereco` (por padrão só na interface local).
+    """
+
+    def __init__(
+        self,
+        metricas: Metricas,
+        arquivo: str,
+        intervalo_s: float = 15.0,
+        porta: int | None = None,
+        endereco: str = "127.0.0.1",
+    ):
+        super().__init__(name="exportador-metricas", daemon=True)
+        self.metricas = metricas
+        self.arquivo = arquivo
+        self.intervalo_s = intervalo_s
+        self.porta = porta
+        self.endereco = endereco
+        self.servidor: ThreadingHTTPServer | None = None
+        self._parar = threading.Event()
+
+    def gravar(self) -> None:
+        os.makedirs(os.path.dirname(self.arquivo), exist_ok=True)
+        tmp = f"{self.arquivo}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.metricas.exportar_prometheus())
+        os.replace(tmp, self.arquivo)
+
+    def _iniciar_servidor(self) -> None:
+        metricas = self.metricas
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa: N802 (API do http.server)
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                corpo = metricas.exportar_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):  # silencia o log de acesso no stderr
+                pass
+
+        self.servidor = ThreadingHTTPServer((self.endereco, self.porta), _Handler)
+        threading.Thread(target=self.servidor.serve_forever, name="metricas-http", daemon=True).start()
+
+    def parar(self) -> None:
+        self._parar.set()
+        if self.servidor is not None:
+            self.servidor.shutdown()
+
+    def run(self) -> None:
+        if self.porta:
+            self._iniciar_servidor()
+        while True:
+            try:
+                self.gravar()
+            except OSError:
+                pass  # disco indisponível: tenta de novo no próximo ciclo
+            if self._parar.wait(self.intervalo_s):
+                break
+
+
+# ============================================================
+# PERFIL (cProfile em reruns amostrados)
+# ============================================================
+
+@contextmanager
+def perfil_amostrado(taxa: float, destino_dir: str, rotulo: str = "rerun") -> Iterator[bool]:
+    """
+    Função: perfil_amostrado
+
+    Objetivo:
+        Com probabilidade `taxa` (0 desliga), executar o trecho sob cProfile
+        e gravar o .prof em `destino_dir` (abrir com snakeviz/pstats).
+
+    Saídas:
+        bool: se este rerun foi amostrado.
+    """
+    if taxa <= 0 or random.random() >= taxa:
+        yield False
+        return
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield True
+    finally:
+        perfil.disable()
+        os.makedirs(destino_dir, exist_ok=True)
+        nome = f"{rotulo}_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.prof"
+        perfil.dump_stats(os.path.join(destino_dir, nome))
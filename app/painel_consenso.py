@@ -0,0 +1,208 @@
+import threading
+import time
+from collections import defaultdict
+
+from feedback_rodada import NIVEIS, quantil_histograma
+from regras_consenso import LIMIARES_CONSENSO, condicoes_consenso
+
+# ============================================================
+# CAMADA: DOMÍNIO / PAINEL DE CONSENSO AO VIVO (agregados incrementais)
+# ============================================================
+
+
+def classificar_item(e: dict, limiares: dict = LIMIARES_CONSENSO) -> str:
+    """
+    Função: classificar_item
+
+    Objetivo:
+        Decisão de um item (manter / revisar / descartar) pela regra de
+        regras_consenso, a mesma das estatísticas offline. Item sem notas
+        fica em "revisar".
+    """
+    if e["n"] == 0:
+        return "revisar"
+    manter, descartar = condicoes_consenso(e, limiares)
+    return "manter" if manter else "descartar" if descartar else "revisar"
+
+
+class PainelConsenso:
+    """
+    Classe: PainelConsenso
+
+    Objetivo:
+        Agregados de participação e consenso da rodada em andamento, mantidos
+        em memória (uma instância por processo) e atualizados a cada
+        submissão, sem reler o acervo:
+
+        - por item: histograma das notas 1..5 e contagens de aceitação e
+          aplicabilidade
+        - por avaliador e bloco: as linhas da versão vigente, para descontar
+          quando chega uma versão mais nova (mesma regra da consolidação)
+
+        `aplicar` é o gancho chamado logo após cada gravação no processo;
+        `sincronizar` lê do armazenamento só o que foi gravado desde a última
+        leitura (outros processos: API, importação), no máximo uma vez a cada
+        `intervalo_s`. `resumo` é recalculado apenas quando algo mudou, então
+        vários espectadores do painel não geram carga.
+
+    Entradas:
+        rodada (int): rodada acompanhada (submissões de outras são ignoradas).
+        intervalo_s (float): período mínimo entre sincronizações.
+    """
+
+    def __init__(self, rodada: int, intervalo_s: float = 5.0):
+        self.rodada = str(rodada)
+        self.intervalo_s = intervalo_s
+        self._lock = threading.Lock()
+        self._lock_sincronizar = threading.Lock()
+        self._vigentes: dict[tuple[str, str], tuple[tuple[str, str], list[tuple]]] = {}
+        self._notas: dict[tuple[str, str], list[int]] = defaultdict(lambda: [0] * NIVEIS)
+        self._totais: dict[tuple[str, str], list[int]] = defaultdict(lambda: [0, 0, 0])  # respostas, aceita, aplic
+        self._marca = None
+        self._sincronizado_em = float("-inf")
+        self.versao = 0
+        self.atualizado_em = ""
+        self._resumo: dict | None = None
+        self._resumo_versao = -1
+
+    # --------------------------------------------------------
+    # Atualização incremental
+    # --------------------------------------------------------
+    def _somar(self, bloco: str, linhas: list[tuple], sinal: int) -> None:
+        for codigo, grau, aplic, aceita in linhas:
+            chave = (bloco, codigo)
+            if grau is not None:
+                self._notas[chave][grau - 1] += sinal
+            totais = self._totais[chave]
+            totais[0] += sinal
+            totais[1] += sinal * (aceita == "Sim")
+            totais[2] += sinal * (aplic == "Sim")
+
+    def aplicar(self, registro: dict, respostas: list[dict]) -> bool:
+        """
+        Função: aplicar
+
+        Objetivo:
+            Somar uma submissão gravada aos agregados. Se o avaliador já tinha
+            versão vigente no bloco, ela é descontada; versão igual ou mais
+            antiga que a vigente é ignorada (idempotente).
+
+        Saídas:
+            bool: True se os agregados mudaram.
+        """
+        if str(registro.get("rodada") or 1) != self.rodada:
+            return False
+        bloco = str(registro["bloco"])
+        chave = ((registro.get("email") or registro.get("nome") or "").strip().lower(), bloco)
+        versao = (str(registro.get("timestamp", "")), str(registro.get("submissao_id", "")))
+        linhas = []
+        for r in respostas:
+            try:
+                grau = int(r["grau_relevancia"])
+            except (TypeError, ValueError):
+                grau = None
+            linhas.append((
+                str(r["codigo"]), grau if grau is not None and 1 <= grau <= NIVEIS else None,
+                str(r["aplicabilidade_nacional"]).strip(), str(r["aceitacao_item"]).strip(),
+            ))
+        with self._lock:
+            atual = self._vigentes.get(chave)
+            if atual is not None and atual[0] >= versao:
+                return False
+            if atual is not None:
+                self._somar(bloco, atual[1], -1)
+            self._somar(bloco, linhas, 1)
+            self._vigentes[chave] = (versao, linhas)
+            self.versao += 1
+            self.atualizado_em = max(self.atualizado_em, versao[0])
+        return True
+
+    def sincronizar(self, armazenamento, forcar: bool = False) -> int:
+        """
+        Função: sincronizar
+
+        Objetivo:
+            Aplicar as submissões gravadas no armazenamento desde a última
+            leitura (armazenamento.submissoes_desde), respeitando intervalo_s.
+
+        Saídas:
+            int: submissões que alteraram os agregados.
+        """
+        if not forcar and time.monotonic() - self._sincronizado_em < self.intervalo_s:
+            return 0
+        with self._lock_sincronizar:
+            if not forcar and time.monotonic() - self._sincronizado_em < self.intervalo_s:
+                return 0
+            submissoes, self._marca = armazenamento.submissoes_desde(self._marca)
+            self._sincronizado_em = time.monotonic()
+        return sum(self.aplicar(registro, respostas) for registro, respostas in submissoes)
+
+    # --------------------------------------------------------
+    # Leitura
+    # --------------------------------------------------------
+    def resumo(self, limiares: dict = LIMIARES_CONSENSO) -> dict:
+        """
+        Função: resumo
+
+        Objetivo:
+            Estatísticas por item (n, mediana, IQR, % de notas 4–5, % de
+            aceitação e de aplicabilidade, decisão) e por bloco (avaliadores
+            e decisões), recalculadas só quando os agregados mudaram.
+
+        Saídas:
+            dict: "itens", "blocos", "avaliadores", "submissoes",
+            "atualizado_em".
+        """
+        with self._lock:
+            if self._resumo is not None and self._resumo_versao == self.versao and limiares is LIMIARES_CONSENSO:
+                return self._resumo
+            versao = self.versao
+            notas = {k: list(v) for k, v in self._notas.items()}
+            totais = {k: list(v) for k, v in self._totais.items()}
+            chaves = list(self._vigentes)
+            atualizado_em = self.atualizado_em
+
+        itens = []
+        for (bloco, codigo), (n_respostas, n_aceita, n_aplic) in sorted(totais.items()):
+            if n_respostas <= 0:
+                continue
+            c = notas.get((bloco, codigo), [0] * NIVEIS)
+            n = sum(c)
+            q1, q3 = quantil_histograma(c, 0.25), quantil_histograma(c, 0.75)
+            e = {
+                "bloco": bloco,
+                "codigo": codigo,
+                "n_respostas": n_respostas,
+                "n": n,
+                "mediana": quantil_histograma(c, 0.5),
+                "iqr": q3 - q1,
+                "pct_relevante": (c[3] + c[4]) / n if n else float("nan"),
+                "pct_aceitacao": n_aceita / n_respostas,
+                "pct_aplicabilidade": n_aplic / n_respostas,
+            }
+            e["decisao"] = classificar_item(e, limiares)
+            itens.append(e)
+
+        avaliadores_bloco: dict[str, int] = defaultdict(int)
+        for _, bloco in chaves:
+            avaliadores_bloco[bloco] += 1
+        blocos: dict[str, dict] = {}
+        for e in itens:
+            b = blocos.setdefault(e["bloco"], {
+                "bloco": e["bloco"], "avaliadores": avaliadores_bloco[e["bloco"]], "itens": 0,
+                "manter": 0, "revisar": 0, "descartar": 0,
+            })
+            b["itens"] += 1
+            b[e["decisao"]] += 1
+
+        resumo = {
+            "itens": itens,
+            "blocos": list(blocos.values()),
+            "avaliadores": len({email for email, _ in chaves}),
+            "submissoes": len(chaves),
+            "atualizado_em": atualizado_em,
+        }
+        if limiares is LIMIARES_CONSENSO:
+            with self._lock:
+                self._resumo, self._resumo_versao = resumo, versao
+        return resumo
@@ -0,0 +1,107 @@
+import hashlib
+import hmac
+import os
+import secrets
+from typing import Iterable
+
+# ============================================================
+# CAMADA: DOMÍNIO / PSEUDONIMIZAÇÃO (LGPD: exportações de análise)
+# ============================================================
+
+# Chave secreta do HMAC: DELPHI_PSEUDONIMO_CHAVE (secrets/env) ou, sem ela,
+# ARQUIVO_CHAVE na pasta de saída da exportação (outputs/ por padrão; gerado
+# na primeira consolidação e ignorado pelo .gitignore). A mesma chave em
+# todas as rodadas mantém os pseudônimos estáveis; trocá-la (ou perdê-la)
+# desfaz o vínculo entre rodadas.
+CHAVE_ENV = "DELPHI_PSEUDONIMO_CHAVE"
+ARQUIVO_CHAVE = "pseudonimizacao.chave"
+
+# Identificadores diretos: nunca saem nas exportações de análise
+IDENTIFICADORES_DIRETOS = ("nome", "email", "cpf")
+
+TAMANHO_PSEUDONIMO = 20  # caracteres hex (80 bits)
+
+
+def normalizar_identificador(valor) -> str:
+    """E-mail (ou nome, sem e-mail) como a consolidação compara avaliadores: sem espaços nas pontas e minúsculo."""
+    return str(valor or "").strip().lower()
+
+
+def carregar_chave(output_dir: str, criar: bool = False) -> bytes | None:
+    """
+    Função: carregar_chave
+
+    Objetivo:
+        Obter a chave do HMAC: variável DELPHI_PSEUDONIMO_CHAVE ou o arquivo
+        pseudonimizacao.chave em `output_dir`.
+
+    Entradas:
+        output_dir (str): pasta do arquivo da chave.
+        criar (bool): gerar o arquivo (32 bytes aleatórios, permissão 600)
+            se não houver chave.
+
+    Saídas:
+        bytes | None: chave, ou None se não configurada (e criar=False).
+    """
+    valor = os.getenv(CHAVE_ENV, "").strip()
+    if valor:
+        return valor.encode("utf-8")
+    caminho = os.path.join(output_dir, ARQUIVO_CHAVE)
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return f.read().strip().encode("utf-8")
+    except FileNotFoundError:
+        if not criar:
+            return None
+    os.makedirs(output_dir, exist_ok=True)
+    try:
+        fd = os.open(caminho, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:  # outro processo criou no meio tempo
+        return carregar_chave(output_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(secrets.token_hex(32))
+    return carregar_chave(output_dir)
+
+
+class Pseudonimizador:
+    """
+    Classe: Pseudonimizador
+
+    Objetivo:
+        Trocar identificadores por pseudônimos HMAC-SHA256 com chave secreta:
+        estáveis (mesmo avaliador, mesmo pseudônimo em todas as rodadas e
+        exportações) e irreversíveis sem a chave (um hash simples do e-mail
+        seria revertido por dicionário).
+
+    Regras:
+        - cada valor distinto é hasheado uma única vez (memória por instância)
+        - `dominio` separa os espaços de pseudônimos (avaliador, arquivo...)
+        - vazio continua vazio
+    """
+
+    def __init__(self, chave: bytes, dominio: str = "avaliador"):
+        if not chave:
+            raise ValueError("chave de pseudonimização vazia")
+        self._chave = chave
+        self._prefixo = dominio.encode("utf-8") + b"\x00"
+        self._memo: dict[str, str] = {"": ""}
+
+    def __call__(self, valor) -> str:
+        valor = normalizar_identificador(valor)
+        pseudonimo = self._memo.get(valor)
+        if pseudonimo is None:
+            pseudonimo = hmac.new(
+                self._chave, self._prefixo + valor.encode("utf-8"), hashlib.sha256
+            ).hexdigest()[:TAMANHO_PSEUDONIMO]
+            self._memo[valor] = pseudonimo
+        return pseudonimo
+
+    def mapear(self, valores: Iterable) -> list[str]:
+        """
+        Pseudônimos de uma coluna: os valores distintos são hasheados uma vez
+        e mapeados de volta (com pd.factorize, passe só os distintos e
+        indexe o resultado pelos códigos).
+        """
+        valores = list(valores)
+        mapa = {v: self(v) for v in set(valores)}
+        return [mapa[v] for v in valores]
@@ -0,0 +1,252 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+logger = logging.getLogger("delphi_app")
+
+# ============================================================
+# CAMADA: INFRA / RASCUNHOS (autosave de avaliações em andamento)
+# ============================================================
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rascunhos (
+    email TEXT NOT NULL,
+    bloco TEXT NOT NULL,
+    item_uid TEXT NOT NULL,
+    grau_relevancia INTEGER,
+    aplicabilidade_nacional TEXT,
+    aceitacao_item TEXT,
+    comentarios_sugestoes TEXT NOT NULL DEFAULT '',
+    atualizado_em TEXT NOT NULL,
+    PRIMARY KEY (email, bloco, item_uid)
+);
+CREATE INDEX IF NOT EXISTS idx_rascunhos_atualizado ON rascunhos(atualizado_em);
+"""
+
+CAMPOS_RESPOSTA = ("grau_relevancia", "aplicabilidade_nacional", "aceitacao_item", "comentarios_sugestoes")
+
+
+def chave_rascunho(email: str, bloco_id: str) -> tuple[str, str]:
+    """Rascunhos são do avaliador (e-mail, sem caixa/espaços) em um bloco."""
+    return email.strip().lower(), bloco_id
+
+
+class GravadorRascunhos(threading.Thread):
+    """
+    Classe: GravadorRascunhos
+
+    Objetivo:
+        Guardar em SQLite (arquivo próprio, independente do backend de
+        submissões) as respostas ainda não enviadas, para retomar a
+        avaliação após queda de conexão ou sessão reciclada.
+
+        As alterações chegam como deltas por item e ficam em memória; a
+        thread grava quando o avaliador para de mexer por `debounce_s` (ou
+        após `espera_max_s` de edição contínua), em uma transação. Um item
+        alterado várias vezes na janela gera uma única escrita.
+
+    Entradas:
+        caminho (str): arquivo do banco de rascunhos.
+        debounce_s (float): silêncio exigido antes de gravar.
+        espera_max_s (float): atraso máximo de um delta pendente.
+        validade_dias (int): rascunhos sem alteração há mais tempo são
+            descartados (varredura na partida e a cada `intervalo_expurgo_s`).
+    """
+
+    def __init__(
+        self,
+        caminho: str,
+        debounce_s: float = 2.0,
+        espera_max_s: float = 10.0,
+        validade_dias: int = 30,
+        intervalo_expurgo_s: float = 3600.0,
+    ):
+        super().__init__(name="delphi-rascunhos", daemon=True)
+        self.caminho = caminho
+        self.debounce_s = debounce_s
+        self.espera_max_s = espera_max_s
+        self.validade_dias = validade_dias
+        self.intervalo_expurgo_s = intervalo_expurgo_s
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        conn = self._conectar()
+        conn.executescript(_SCHEMA)
+        conn.close()
+
+        self._pendentes: dict[tuple[str, str], dict[str, dict]] = {}
+        self._primeiro = 0.0   # instante do delta pendente mais antigo
+        self._ultimo = 0.0     # instante do delta mais recente
+        self._estado = threading.Condition()
+        self._io = threading.Lock()  # serializa gravação e descarte no banco
+        self._parar = False
+        self.gravacoes = 0
+
+    def _conectar(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.caminho, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # --------------------------------------------------------
+    # API usada pela sessão
+    # --------------------------------------------------------
+    def registrar(self, email: str, bloco_id: str, item_uid: str, resposta: dict) -> None:
+        """Registrar a nova resposta de um item (só em memória até o debounce)."""
+        chave = chave_rascunho(email, bloco_id)
+        if not chave[0]:
+            return
+        agora = time.monotonic()
+        with self._estado:
+            if not self._pendentes:
+                self._primeiro = agora
+            self._pendentes.setdefault(chave, {})[item_uid] = {c: resposta[c] for c in CAMPOS_RESPOSTA}
+            self._ultimo = agora
+            self._estado.notify()
+
+    def carregar(self, email: str, bloco_id: str) -> tuple[dict[str, dict], str]:
+        """
+        Função: carregar
+
+        Objetivo:
+            Ler o rascunho do avaliador no bloco, incluindo deltas ainda
+            não gravados.
+
+        Saídas:
+            (respostas, atualizado_em): respostas por item_uid e horário da
+            última gravação ("" sem rascunho em disco).
+        """
+        chave = chave_rascunho(email, bloco_id)
+        conn = self._conectar()
+        try:
+            linhas = conn.execute(
+                "SELECT item_uid, grau_relevancia, aplicabilidade_nacional, aceitacao_item, "
+                "comentarios_sugestoes, atualizado_em FROM rascunhos WHERE email = ? AND bloco = ?",
+                chave,
+            ).fetchall()
+        finally:
+            conn.close()
+        respostas = {linha[0]: dict(zip(CAMPOS_RESPOSTA, linha[1:5])) for linha in linhas}
+        atualizado_em = max((linha[5] for linha in linhas), default="")
+        with self._estado:
+            respostas.update(self._pendentes.get(chave, {}))
+        return respostas, atualizado_em
+
+    def descartar(self, email: str, bloco_id: str) -> None:
+        """Apagar o rascunho (após a submissão ser gravada)."""
+        chave = chave_rascunho(email, bloco_id)
+        with self._io:
+            with self._estado:
+                self._pendentes.pop(chave, None)
+            conn = self._conectar()
+            try:
+                conn.execute("DELETE FROM rascunhos WHERE email = ? AND bloco = ?", chave)
+            finally:
+                conn.close()
+
+    def pendentes(self) -> int:
+        """Itens alterados aguardando gravação."""
+        with self._estado:
+            return sum(len(itens) for itens in self._pendentes.values())
+
+    def parar(self) -> None:
+        """Gravar o que estiver pendente e encerrar a thread."""
+        with self._estado:
+            self._parar = True
+            self._estado.notify()
+        self.join()
+
+    # --------------------------------------------------------
+    # Thread
+    # --------------------------------------------------------
+    def run(self) -> None:
+        proximo_expurgo = time.monotonic()
+        while True:
+            with self._estado:
+                while not self._parar:
+                    agora = time.monotonic()
+                    if self._pendentes:
+                        prazo = min(self._ultimo + self.debounce_s, self._primeiro + self.espera_max_s)
+                    else:
+                        prazo = proximo_expurgo
+                    if agora >= prazo:
+                        break
+                    self._estado.wait(timeout=prazo - agora)
+                parar = self._parar
+            try:
+                self.gravar_pendentes()
+                if time.monotonic() >= proximo_expurgo:
+                    proximo_expurgo = time.monotonic() + self.intervalo_expurgo_s
+                    self.expurgar()
+            except sqlite3.Error:
+                # Deltas voltam para a memória; nova tentativa no próximo prazo
+                logger.exception("Falha ao gravar rascunhos", extra={"evento": "rascunho"})
+            if parar:
+                break
+
+    def gravar_pendentes(self) -> int:
+        """
+        Função: gravar_pendentes
+
+        Objetivo:
+            Gravar todos os deltas pendentes em uma transação (upsert por
+            item), preservando os demais itens do rascunho.
+
+        Saídas:
+            int: número de itens gravados.
+        """
+        with self._io:
+            with self._estado:
+                pendentes, self._pendentes = self._pendentes, {}
+            if not pendentes:
+                return 0
+            atualizado_em = datetime.now().isoformat(timespec="seconds")
+            linhas = [
+                (email, bloco, item_uid, *(r[c] for c in CAMPOS_RESPOSTA), atualizado_em)
+                for (email, bloco), itens in pendentes.items()
+                for item_uid, r in itens.items()
+            ]
+            conn = self._conectar()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT INTO rascunhos VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (email, bloco, item_uid) DO UPDATE SET "
+                    "grau_relevancia = excluded.grau_relevancia, "
+                    "aplicabilidade_nacional = excluded.aplicabilidade_nacional, "
+                    "aceitacao_item = excluded.aceitacao_item, "
+                    "comentarios_sugestoes = excluded.comentarios_sugestoes, "
+                    "atualizado_em = excluded.atualizado_em",
+                    linhas,
+                )
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                # Devolve os deltas (sem sobrescrever alterações mais novas)
+                with self._estado:
+                    for chave, itens in pendentes.items():
+                        atuais = self._pendentes.setdefault(chave, {})
+                        for item_uid, r in itens.items():
+                            atuais.setdefault(item_uid, r)
+                    self._primeiro = self._ultimo = time.monotonic()
+                raise
+            finally:
+                conn.close()
+            self.gravacoes += 1
+            return len(linhas)
+
+    def expurgar(self) -> int:
+        """Remover rascunhos sem alteração há mais de `validade_dias`."""
+        limite = (datetime.now() - timedelta(days=self.validade_dias)).isoformat(timespec="seconds")
+        with self._io:
+            conn = self._conectar()
+            try:
+                return conn.execute(
+                    "DELETE FROM rascunhos WHERE (email, bloco) IN ("
+                    "SELECT email, bloco FROM rascunhos GROUP BY email, bloco "
+                    "HAVING MAX(atualizado_em) < ?)",
+                    (limite,),
+                ).rowcount
+            finally:
+                conn.close()
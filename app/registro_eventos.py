@@ -0,0 +1,175 @@
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+# ============================================================
+# CAMADA: INFRA / LOGGING ESTRUTURADO ASSÍNCRONO
+# ============================================================
+
+# Contexto da execução atual (cada rerun do Streamlit roda em sua thread)
+SESSAO_ID: contextvars.ContextVar[str] = contextvars.ContextVar("sessao_id", default="")
+
+# Eventos de auditoria: nunca descartados pelo filtro de ruído
+EVENTOS_AUDITORIA = {"submissao", "bloco", "salvamento", "backup"}
+
+_CAMPOS_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class FiltroContexto(logging.Filter):
+    """
+    Classe: FiltroContexto
+
+    Objetivo:
+        Anexar sessao_id (do contexto atual) a cada registro. Roda na thread
+        que emitiu o log, antes de o registro entrar na fila.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sessao_id", ""):
+            record.sessao_id = SESSAO_ID.get()
+        return True
+
+
+class FiltroRuido(logging.Filter):
+    """
+    Classe: FiltroRuido
+
+    Objetivo:
+        Reduzir eventos repetidos a cada rerun (marcados com extra
+        {"ruidoso": True}): por sessão e evento, só passa quando a mensagem
+        muda ou, se igual, no máximo uma vez a cada `intervalo_s` segundos.
+        Eventos de EVENTOS_AUDITORIA e registros não marcados sempre passam.
+    """
+
+    def __init__(self, intervalo_s: float = 300.0, max_chaves: int = 10_000):
+        super().__init__()
+        self.intervalo_s = intervalo_s
+        self.max_chaves = max_chaves
+        self._ultimos: dict[tuple, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "ruidoso", False) or getattr(record, "evento", "") in EVENTOS_AUDITORIA:
+            return True
+        chave = (getattr(record, "sessao_id", ""), getattr(record, "evento", "") or record.msg)
+        mensagem = record.getMessage()
+        agora = time.monotonic()
+        with self._lock:
+            anterior = self._ultimos.get(chave)
+            if anterior is not None and anterior[0] == mensagem and agora - anterior[1] < self.intervalo_s:
+                return False
+            if len(self._ultimos) >= self.max_chaves:
+                self._ultimos.clear()
+            self._ultimos[chave] = (mensagem, agora)
+        return True
+
+
+class FormatadorJSON(logging.Formatter):
+    """
+    Classe: FormatadorJSON
+
+    Objetivo:
+        Uma linha JSON por evento: ts, nivel, msg, evento, sessao_id e
+        demais campos passados em `extra` (ex.: submissao_id, bloco).
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        dados = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "msg": record.getMessage(),
+        }
+        for k, v in vars(record).items():
+            if k not in _CAMPOS_PADRAO and k != "ruidoso" and v not in ("", None):
+                dados[k] = v
+        if record.exc_info:
+            dados["excecao"] = self.formatException(record.exc_info)
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class ArquivoRotativo(TimedRotatingFileHandler):
+    """
+    Classe: ArquivoRotativo
+
+    Objetivo:
+        Rotação por tempo (ex.: diária) e também por tamanho, o que ocorrer
+        primeiro. Nenhum arquivo rotacionado é sobrescrito: a rotação por
+        tamanho leva a hora em que ocorreu e, se o nome já existir (várias
+        no mesmo segundo), ganha um índice (.001, .002...).
+    """
+
+    def __init__(self, filename: str, max_bytes: int, when: str = "midnight", backup_count: int = 14):
+        super().__init__(filename, when=when, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.max_bytes = max_bytes
+        self.suffix = "%Y-%m-%d_%H-%M-%S"
+        self.extMatch = re.compile(r"^\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}(\.\w+)?$", re.ASCII)
+        self._por_tamanho = False
+
+    def shouldRollover(self, record: logging.LogRecord) -> int:
+        self._por_tamanho = False
+        if super().shouldRollover(record):
+            return 1
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            if self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes:
+                self._por_tamanho = True
+                return 1
+        return 0
+
+    def rotation_filename(self, default_name: str) -> str:
+        # A base nomeia pelo início do período (meia-noite): rotações por
+        # tamanho no mesmo dia teriam todas o mesmo nome
+        if self._por_tamanho:
+            default_name = f"{self.baseFilename}.{time.strftime(self.suffix)}"
+        nome = super().rotation_filename(default_name)
+        candidato, indice = nome, 0
+        while os.path.exists(candidato):
+            indice += 1
+            candidato = f"{nome}.{indice:03d}"
+        return candidato
+
+
+def iniciar_logging_assincrono(
+    logger: logging.Logger,
+    arquivo: str,
+    max_bytes: int = 10 * 1024 * 1024,
+    intervalo_ruido_s: float = 300.0,
+) -> QueueListener:
+    """
+    Função: iniciar_logging_assincrono
+
+    Objetivo:
+        Ligar o logger a um QueueHandler; um QueueListener em thread própria
+        grava no console (texto) e no arquivo (JSON Lines com rotação), de
+        modo que a thread da requisição nunca espera o disco.
+
+    Saídas:
+        QueueListener: listener iniciado (parado automaticamente no exit).
+    """
+    os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(message)s"))
+
+    arquivo_handler = ArquivoRotativo(arquivo, max_bytes=max_bytes)
+    arquivo_handler.setFormatter(FormatadorJSON())
+
+    fila: queue.Queue = queue.Queue(-1)
+    qh = QueueHandler(fila)
+    qh.addFilter(FiltroContexto())
+    qh.addFilter(FiltroRuido(intervalo_ruido_s))
+    logger.addHandler(qh)
+
+    listener = QueueListener(fila, console, arquivo_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
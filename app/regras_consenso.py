@@ -0,0 +1,49 @@
+# ============================================================
+# CAMADA: DOMÍNIO / REGRAS DE CONSENSO (limiares e decisão por item)
+# ============================================================
+
+# Limiares de decisão por item, únicos para o painel ao vivo
+# (app/painel_consenso.py) e as estatísticas offline
+# (scripts/estatisticas_consenso.py, que os expõe na linha de comando)
+LIMIARES_CONSENSO = {
+    "manter_mediana_min": 4.0,
+    "manter_iqr_max": 1.0,
+    "manter_concordancia_min": 0.75,
+    "manter_aceitacao_min": 0.75,
+    "descartar_mediana_max": 2.0,
+    "descartar_concordancia_max": 0.50,
+}
+
+
+def condicoes_consenso(e, limiares: dict = LIMIARES_CONSENSO):
+    """
+    Função: condicoes_consenso
+
+    Objetivo:
+        Avaliar a regra de decisão de consenso de um item (dict de números)
+        ou de vários (DataFrame, avaliação vetorizada): só operadores de
+        comparação e & / |, que valem para os dois.
+
+        - manter: mediana, IQR, % de notas 4–5 e % de aceitação dentro dos
+          limiares
+        - descartar: mediana baixa ou concordância baixa
+        - revisar: demais casos (nenhuma das duas)
+
+    Entradas:
+        e: mapeamento com "mediana", "iqr", "pct_relevante" e "pct_aceitacao".
+        limiares (dict): limiares de decisão (ver LIMIARES_CONSENSO).
+
+    Saídas:
+        (manter, descartar): bool ou Series booleanas; manter tem prioridade.
+    """
+    manter = (
+        (e["mediana"] >= limiares["manter_mediana_min"])
+        & (e["iqr"] <= limiares["manter_iqr_max"])
+        & (e["pct_relevante"] >= limiares["manter_concordancia_min"])
+        & (e["pct_aceitacao"] >= limiares["manter_aceitacao_min"])
+    )
+    descartar = (
+        (e["mediana"] <= limiares["descartar_mediana_max"])
+        | (e["pct_relevante"] < limiares["descartar_concordancia_max"])
+    )
+    return manter, descartar
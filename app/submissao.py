@@ -0,0 +1,143 @@
+import hashlib
+import json
+
+from armazenamento import ArmazenamentoCSV, chave_avaliador, exportar_csv_submissao, novo_submissao_id
+
+# ============================================================
+# CAMADA: DOMÍNIO / SUBMISSÃO (regras comuns à UI e à API)
+# ============================================================
+
+GRAUS_RELEVANCIA = (1, 2, 3, 4, 5)
+OPCOES_SIM_NAO = ("Sim", "Não")
+
+
+def comentario_pendente(resposta: dict) -> bool:
+    """
+    Função: comentario_pendente
+
+    Objetivo:
+        Regra metodológica: comentário obrigatório quando Aceitação=Não OU
+        Aplicabilidade=Não.
+    """
+    return (
+        resposta["aceitacao_item"] == "Não" or resposta["aplicabilidade_nacional"] == "Não"
+    ) and not resposta["comentarios_sugestoes"].strip()
+
+
+def linha_resposta(item: dict, resposta: dict) -> dict:
+    """
+    Função: linha_resposta
+
+    Objetivo:
+        Combinar o item do bloco e a avaliação Delphi na linha gravada por
+        submissão (mesmo layout para UI e API).
+    """
+    return {
+        "secao": item["secao"],
+        "codigo": item["codigo"],
+        "tematica": item["tematica"],
+        "pergunta": item["pergunta"],
+        "respostas": item.get("respostas", ""),
+        "grau_relevancia": resposta["grau_relevancia"],
+        "aplicabilidade_nacional": resposta["aplicabilidade_nacional"],
+        "aceitacao_item": resposta["aceitacao_item"],
+        "comentarios_sugestoes": resposta["comentarios_sugestoes"].strip(),
+    }
+
+
+def hash_conteudo(registro: dict, respostas: list[dict]) -> str:
+    """
+    Função: hash_conteudo
+
+    Objetivo:
+        Hash canônico (SHA-256) do conteúdo da submissão: avaliador (e-mail
+        normalizado), bloco e avaliação de cada item. Não inclui nome,
+        horário nem id, então um reenvio idêntico tem o mesmo hash. A rodada
+        já separa as versões (chave_avaliador), então também fica de fora.
+    """
+    email, bloco, _ = chave_avaliador(registro)
+    canonico = json.dumps(
+        [email, bloco, [
+            [str(r["codigo"]), str(r["grau_relevancia"]), r["aplicabilidade_nacional"],
+             r["aceitacao_item"], str(r.get("comentarios_sugestoes", "")).strip()]
+            for r in respostas
+        ]],
+        ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(canonico.encode("utf-8")).hexdigest()
+
+
+def persistir_submissao(
+    armazenamento,
+    registro: dict,
+    respostas: list[dict],
+    output_dir: str,
+    exportar_csv: bool = True,
+) -> str:
+    """
+    Função: persistir_submissao
+
+    Objetivo:
+        Gravar a submissão no backend (transação atômica com id único) e,
+        opcionalmente, exportá-la como CSV individual. Reenvios são
+        barrados antes de qualquer arquivo ou backup.
+
+    Saídas:
+        str: caminho do CSV exportado ("" se a exportação estiver desligada).
+
+    Efeitos colaterais:
+        - acrescenta registro["submissao_id"] e registro["hash_conteudo"]
+        - SubmissaoDuplicada se o submissao_id já existir ou o conteúdo
+          repetir a última versão do avaliador no bloco
+    """
+    registro.setdefault("submissao_id", novo_submissao_id())
+    registro["hash_conteudo"] = hash_conteudo(registro, respostas)
+
+    ref = armazenamento.salvar(registro, respostas)
+    if isinstance(armazenamento, ArmazenamentoCSV):
+        return ref
+    if exportar_csv:
+        return exportar_csv_submissao(registro, respostas, output_dir)
+    return ""
+
+
+def persistir_envio(
+    armazenamento,
+    submissoes: list[tuple[dict, list[dict]]],
+    output_dir: str,
+    exportar_csv: bool = True,
+) -> list[str | None]:
+    """
+    Função: persistir_envio
+
+    Objetivo:
+        Gravar várias submissões de um avaliador (uma por bloco) como um
+        envio único: mesma transação no backend e o mesmo envio_id em todas.
+        Blocos sem alteração desde a versão vigente são pulados.
+
+    Saídas:
+        list[str | None]: caminho do CSV exportado de cada submissão ("" se
+        a exportação estiver desligada; None para bloco pulado).
+
+    Efeitos colaterais:
+        - acrescenta submissao_id, hash_conteudo e envio_id a cada registro
+        - SubmissaoDuplicada se o envio já tiver sido gravado
+    """
+    envio_id = novo_submissao_id()
+    for registro, respostas in submissoes:
+        registro.setdefault("submissao_id", novo_submissao_id())
+        registro["hash_conteudo"] = hash_conteudo(registro, respostas)
+        registro.setdefault("envio_id", envio_id)
+
+    refs = armazenamento.salvar_grupo(submissoes)
+    if isinstance(armazenamento, ArmazenamentoCSV):
+        return refs
+    caminhos: list[str | None] = []
+    for ref, (registro, respostas) in zip(refs, submissoes):
+        if ref is None:
+            caminhos.append(None)
+        elif exportar_csv:
+            caminhos.append(exportar_csv_submissao(registro, respostas, output_dir))
+        else:
+            caminhos.append("")
+    return caminhos
@@ -0,0 +1,217 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from consolidar_respostas import OUTPUTS
+from estatisticas_consenso import NIVEIS, filtrar_rodada, quantis_por_histograma
+
+
+REAMOSTRAGENS_PADRAO = 10_000
+SEMENTE_PADRAO = 20240601
+NIVEL_CONFIANCA = 0.95
+LOTE_REAMOSTRAGENS = 1_000
+
+
+def carregar_avaliacoes(caminho: Path, rodada: int | None = None) -> pd.DataFrame:
+    """
+    Ler o consolidado (CSV, Parquet ou a pasta consolidado_parquet/) com as
+    colunas da análise, só da `rodada` (padrão: a mais recente), e manter só
+    a última nota de cada avaliador por item. O avaliador é o pseudônimo do
+    consolidado (ou o e-mail normalizado, em consolidados gerados com
+    --identificado).
+    """
+    colunas = ["bloco", "codigo", "timestamp", "grau_relevancia"]
+    if caminho.is_dir() or caminho.suffix == ".parquet":
+        import pyarrow.dataset as pads
+
+        # Pasta = dataset particionado (consolidado_parquet/rodada=.../bloco=...)
+        presentes = set(pads.dataset(caminho, format="parquet", partitioning="hive").schema.names)
+        df = pd.read_parquet(caminho, columns=[c for c in (*colunas, "avaliador", "email", "rodada") if c in presentes])
+    else:
+        df = pd.read_csv(caminho, usecols=lambda c: c in (*colunas, "avaliador", "email", "rodada"),
+                         dtype=str, keep_default_na=False)
+    df, _ = filtrar_rodada(df, rodada)
+    df["grau_relevancia"] = pd.to_numeric(df["grau_relevancia"], errors="coerce")
+    if "avaliador" not in df.columns:
+        df["avaliador"] = df["email"].astype("string").str.strip().str.lower()
+    df = df[df["grau_relevancia"].between(1, NIVEIS)]
+    return (
+        df.sort_values("timestamp", kind="stable")
+        .drop_duplicates(["bloco", "codigo", "avaliador"], keep="last")
+        [["bloco", "codigo", "avaliador", "grau_relevancia"]]
+    )
+
+
+def bootstrap_itens(notas: pd.DataFrame, reamostragens: int, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    IC bootstrap (percentil) da mediana e da % de notas 4–5 de cada item.
+
+    Reamostrar com reposição as n notas de um item equivale a sortear as
+    contagens por nível de uma Multinomial(n, p̂). As contagens de todos os
+    itens saem de uma chamada vetorizada por lote de réplicas (matriz
+    lote x itens x 5), e a mediana vem do histograma acumulado, sem
+    expandir B x n índices.
+    """
+    contagens = (
+        notas.groupby(["codigo", "grau_relevancia"]).size()
+        .unstack(fill_value=0)
+        .reindex(columns=range(1, NIVEIS + 1), fill_value=0)
+    )
+    n = contagens.sum(axis=1).to_numpy()
+    p = contagens.to_numpy() / n[:, None]
+
+    medianas = np.empty((reamostragens, len(n)))
+    relevantes = np.empty((reamostragens, len(n)))
+    for ini in range(0, reamostragens, LOTE_REAMOSTRAGENS):  # memória limitada
+        b = min(LOTE_REAMOSTRAGENS, reamostragens - ini)
+        amostras = rng.multinomial(n, p, size=(b, len(n)))  # b x G x 5
+        medianas[ini:ini + b] = quantis_por_histograma(amostras.reshape(-1, NIVEIS), 0.5).reshape(b, len(n))
+        relevantes[ini:ini + b] = amostras[:, :, 3:].sum(axis=2) / n
+
+    alfa = (1 - NIVEL_CONFIANCA) / 2
+    cont = contagens.to_numpy()
+    return pd.DataFrame({
+        "codigo": contagens.index,
+        "n": n,
+        "mediana": quantis_por_histograma(cont, 0.5),
+        "mediana_ic_inf": np.quantile(medianas, alfa, axis=0),
+        "mediana_ic_sup": np.quantile(medianas, 1 - alfa, axis=0),
+        "pct_relevante": cont[:, 3:].sum(axis=1) / n,
+        "pct_relevante_ic_inf": np.quantile(relevantes, alfa, axis=0),
+        "pct_relevante_ic_sup": np.quantile(relevantes, 1 - alfa, axis=0),
+    })
+
+
+def kendall_w(matriz: np.ndarray) -> tuple[float, float, int]:
+    """
+    W de Kendall (com correção de empates) para uma matriz itens x avaliadores
+    completa.
+
+    Saídas:
+        (W, qui-quadrado, graus de liberdade)
+    """
+    n, m = matriz.shape
+    if n < 2 or m < 2:
+        return np.nan, np.nan, max(n - 1, 0)
+    postos = pd.DataFrame(matriz).rank(axis=0, method="average").to_numpy()
+    r = postos.sum(axis=1)
+    s = ((r - r.mean()) ** 2).sum()
+
+    # Correção de empates: soma de (t^3 - t) por avaliador
+    empates = 0.0
+    for j in range(NIVEIS):
+        t = (matriz == j + 1).sum(axis=0)
+        empates += (t ** 3 - t).sum()
+    denom = m ** 2 * (n ** 3 - n) - m * empates
+    w = 12 * s / denom if denom > 0 else np.nan
+    return w, m * (n - 1) * w, n - 1
+
+
+def icc_dois_fatores(matriz: np.ndarray) -> tuple[float, float]:
+    """
+    ICC(2,1) e ICC(2,k) de Shrout & Fleiss (dois fatores aleatórios,
+    concordância absoluta) para matriz itens x avaliadores completa.
+    """
+    n, k = matriz.shape
+    if n < 2 or k < 2:
+        return np.nan, np.nan
+    media = matriz.mean()
+    linhas = matriz.mean(axis=1)
+    colunas = matriz.mean(axis=0)
+    msr = k * ((linhas - media) ** 2).sum() / (n - 1)
+    msc = n * ((colunas - media) ** 2).sum() / (k - 1)
+    residuo = matriz - linhas[:, None] - colunas[None, :] + media
+    mse = (residuo ** 2).sum() / ((n - 1) * (k - 1))
+    icc_1 = (msr - mse) / (msr + (k - 1) * mse + k * (msc - mse) / n)
+    icc_k = (msr - mse) / (msr + (msc - mse) / n)
+    return icc_1, icc_k
+
+
+def analisar_bloco(args: tuple) -> tuple[pd.DataFrame, dict]:
+    """Bootstrap por item e concordância entre avaliadores de um bloco (executado no pool)."""
+    bloco, notas, reamostragens, semente = args
+    rng = np.random.default_rng(semente)
+
+    itens = bootstrap_itens(notas, reamostragens, rng)
+    itens.insert(0, "bloco", bloco)
+
+    # Concordância: apenas avaliadores que avaliaram todos os itens do bloco
+    matriz = notas.pivot(index="codigo", columns="avaliador", values="grau_relevancia")
+    completos = matriz.dropna(axis=1).to_numpy(dtype=float)
+    w, qui2, gl = kendall_w(completos)
+    icc_1, icc_k = icc_dois_fatores(completos)
+    resumo = {
+        "bloco": bloco,
+        "n_itens": matriz.shape[0],
+        "n_avaliadores": matriz.shape[1],
+        "n_avaliadores_completos": completos.shape[1],
+        "kendall_w": w,
+        "kendall_qui2": qui2,
+        "kendall_gl": gl,
+        "icc_2_1": icc_1,
+        "icc_2_k": icc_k,
+    }
+    return itens, resumo
+
+
+def analisar(
+    df: pd.DataFrame,
+    reamostragens: int = REAMOSTRAGENS_PADRAO,
+    semente: int = SEMENTE_PADRAO,
+    workers: int | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Distribuir os blocos em um pool de processos. Cada bloco recebe uma
+    semente derivada (SeedSequence.spawn) na ordem alfabética dos blocos,
+    de modo que o resultado não depende do agendamento do pool.
+    """
+    blocos = sorted(df["bloco"].unique())
+    sementes = np.random.SeedSequence(semente).spawn(len(blocos))
+    tarefas = [
+        (bloco, df[df["bloco"] == bloco], reamostragens, s)
+        for bloco, s in zip(blocos, sementes)
+    ]
+    workers = min(workers or os.cpu_count() or 1, max(len(tarefas), 1))
+    if workers <= 1:
+        resultados = list(map(analisar_bloco, tarefas))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            resultados = list(pool.map(analisar_bloco, tarefas))
+
+    itens = pd.concat([r[0] for r in resultados], ignore_index=True) if resultados else pd.DataFrame()
+    blocos_df = pd.DataFrame([r[1] for r in resultados])
+    return itens, blocos_df
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="IC bootstrap por item e concordância entre avaliadores (W de Kendall, ICC).")
+    parser.add_argument("--entrada", type=Path, default=OUTPUTS / "consolidado_respostas.csv",
+                        help="consolidado (CSV, Parquet ou a pasta consolidado_parquet/)")
+    parser.add_argument("--saida", type=Path, default=OUTPUTS)
+    parser.add_argument("--reamostragens", type=int, default=REAMOSTRAGENS_PADRAO)
+    parser.add_argument("--semente", type=int, default=SEMENTE_PADRAO)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rodada", type=int, default=None, help="rodada a analisar (padrão: a mais recente)")
+    args = parser.parse_args()
+
+    if not args.entrada.exists():
+        print(f"Consolidado não encontrado: {args.entrada}. Rode scripts/consolidar_respostas.py antes.")
+        return
+
+    avaliacoes = carregar_avaliacoes(args.entrada, args.rodada)
+    itens, blocos = analisar(avaliacoes, args.reamostragens, args.semente, args.workers)
+
+    args.saida.mkdir(parents=True, exist_ok=True)
+    itens.to_csv(args.saida / "resumo_bootstrap_itens.csv", index=False)
+    blocos.to_csv(args.saida / "resumo_concordancia_blocos.csv", index=False)
+    print(f"OK. {len(itens)} item(ns), {len(blocos)} bloco(s), {args.reamostragens} reamostragens (semente {args.semente})")
+    print("- resumo_bootstrap_itens.csv")
+    print("- resumo_concordancia_blocos.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from consolidar_respostas import OUTPUTS, ROOT, consolidar
+
+APP_DIR = ROOT / "app"
+sys.path.insert(0, str(APP_DIR))
+
+BENCH_DIR = OUTPUTS / "benchmark"
+ITENS_PADRAO = "10,100,1000"
+ARQUIVOS_PADRAO = "10,1000,10000"
+ITENS_POR_SUBMISSAO = 20
+PEDIDOS_BACKUP = (1, 10, 100)
+TOLERANCIA_PADRAO = 0.20
+MODULOS_IMPORTACAO = ("app_delphi",)
+MODULOS_PESADOS = ("pandas", "numpy", "pyarrow")
+
+TEMATICAS = ["Sociodemográfico", "Ergonomia", "Riscos químicos", "Saúde mental", "Acidentes", "Organização do trabalho"]
+RESPOSTAS_FECHADAS = ["", "Sim; Não", "Nunca; Às vezes; Sempre", "1; 2; 3; 4; 5"]
+
+
+# ============================================================
+# DADOS SINTÉTICOS
+# ============================================================
+
+def gerar_bloco(caminho: Path, numero: int, n_itens: int, rng: random.Random) -> None:
+    """Gerar um blocoN_itens.csv com `n_itens` itens no layout de base/."""
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["codigo", "secao", "tematica", "pergunta", "respostas"])
+        for i in range(1, n_itens + 1):
+            w.writerow([
+                f"{numero}.{i}",
+                f"SEÇÃO {1 + (i - 1) // 25} - SEÇÃO SINTÉTICA",
+                rng.choice(TEMATICAS),
+                f"Pergunta sintética {i} do bloco {numero}: " + "texto " * rng.randint(5, 30),
+                rng.choice(RESPOSTAS_FECHADAS),
+            ])
+
+
+def respostas_sinteticas(itens: list[dict], rng: random.Random) -> list[dict]:
+    """Respostas válidas (comentário presente quando a regra do app exige)."""
+    respostas = []
+    for item in itens:
+        grau = rng.choices(range(1, 6), weights=[1, 1, 2, 4, 4])[0]
+        aplic = rng.choice(["Sim", "Sim", "Não"])
+        aceita = rng.choice(["Sim", "Sim", "Sim", "Não"])
+        exige = grau <= 2 or aplic == "Não" or aceita == "Não"
+        respostas.append({
+            **item,
+            "grau_relevancia": grau,
+            "aplicabilidade_nacional": aplic,
+            "aceitacao_item": aceita,
+            "comentarios_sugestoes": "Comentário sintético." if exige else "",
+        })
+    return respostas
+
+
+def registro_sintetico(bloco_id: str, i: int) -> dict:
+    return {
+        "bloco": bloco_id,
+        "nome": f"Avaliador {i}",
+        "email": f"avaliador{i}@exemplo.org",
+        "cpf": "",
+        "concordancia_instr_delphi": "sim",
+        "consentimento": "sim",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def gerar_acervo(destino: Path, n_arquivos: int, itens: list[dict], rng: random.Random) -> Path:
+    """
+    Gerar `n_arquivos` CSVs de submissão (formato exportado pelo app).
+    Reaproveita o acervo se já existir com o mesmo número de arquivos.
+    """
+    from armazenamento import exportar_csv_submissao
+
+    pronto = destino / ".completo"
+    if pronto.exists() and pronto.read_text() == str(n_arquivos):
+        return destino
+    shutil.rmtree(destino, ignore_errors=True)
+    destino.mkdir(parents=True)
+    for i in range(n_arquivos):
+        registro = registro_sintetico("bloco900", i)
+        registro["submissao_id"] = f"bench-{i:06d}"
+        exportar_csv_submissao(registro, respostas_sinteticas(itens, rng), str(destino))
+    pronto.write_text(str(n_arquivos))
+    return destino
+
+
+def criar_repo_bare(dir_: Path, branch: str = "main") -> str:
+    """Repositório bare local com um commit inicial (destino do backup)."""
+    remoto, semente = dir_ / "remoto.git", dir_ / "semente"
+    shutil.rmtree(dir_, ignore_errors=True)
+    subprocess.run(["git", "init", "-q", "--bare", "-b", branch, str(remoto)], check=True)
+    subprocess.run(["git", "init", "-q", "-b", branch, str(semente)], check=True)
+    git = ["git", "-C", str(semente), "-c", "user.name=bench", "-c", "user.email=bench@exemplo.org"]
+    subprocess.run([*git, "commit", "-q", "--allow-empty", "-m", "inicio"], check=True)
+    subprocess.run([*git, "push", "-q", str(remoto), branch], check=True)
+    return str(remoto)
+
+
+# ============================================================
+# MEDIÇÃO
+# ============================================================
+
+def medir(funcao, repeticoes: int, preparar=None) -> dict:
+    """
+    Executar `funcao` `repeticoes` vezes (tempo de parede, sem tracemalloc)
+    e mais uma vez sob tracemalloc para o pico de memória Python.
+    `preparar` roda antes de cada execução, fora da medição.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+
+    if preparar:
+        preparar()
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "ms": round(statistics.median(tempos), 3),
+        "ms_min": round(min(tempos), 3),
+        "mb_pico": round(pico / 2**20, 3),
+        "repeticoes": repeticoes,
+    }
+
+
+SCRIPT_FORMULARIO = """
+import sys
+sys.path.insert(0, {app_dir!r})
+from app_delphi import carregar_itens, render_items_form
+render_items_form(carregar_itens({csv!r}), "bloco900")
+"""
+
+
+def bench_itens(trabalho: Path, tamanhos: list[int], repeticoes: int, rng: random.Random) -> list[dict]:
+    """carregar_itens, listar_blocos (catálogo frio e quente), render_items_form e salvar_respostas."""
+    import app_delphi
+    from streamlit.testing.v1 import AppTest
+
+    resultados = []
+    for n in tamanhos:
+        base = trabalho / f"base_{n}"
+        shutil.rmtree(base, ignore_errors=True)
+        for numero in range(1, 11):
+            gerar_bloco(base / f"bloco{numero}_itens.csv", numero, n, rng)
+        gerar_bloco(base / "bloco900_itens.csv", 900, n, rng)
+        csv_bloco = str(base / "bloco900_itens.csv")
+        param = {"itens": n}
+
+        def _catalogo_frio():
+            app_delphi.obter_catalogo.clear()
+            for p in base.glob(".catalogo_blocos.json"):
+                p.unlink()
+
+        resultados.append({"etapa": "carregar_itens", **param,
+                           **medir(lambda: app_delphi.carregar_itens(csv_bloco), repeticoes)})
+        resultados.append({"etapa": "listar_blocos_frio", **param,
+                           **medir(lambda: app_delphi.listar_blocos(str(base)), repeticoes, _catalogo_frio)})
+        app_delphi.listar_blocos(str(base))
+        resultados.append({"etapa": "listar_blocos", **param,
+                           **medir(lambda: app_delphi.listar_blocos(str(base)), repeticoes)})
+
+        script = SCRIPT_FORMULARIO.format(app_dir=str(APP_DIR), csv=csv_bloco)
+        estado = {}
+
+        def _novo_app():
+            estado["at"] = AppTest.from_string(script, default_timeout=120)
+
+        resultados.append({"etapa": "render_items_form", **param,
+                           **medir(lambda: estado["at"].run(), repeticoes, _novo_app)})
+        _novo_app()
+        estado["at"].run()
+        resultados.append({"etapa": "render_items_form_rerun", **param,
+                           **medir(lambda: estado["at"].run(), repeticoes)})
+
+        itens = app_delphi.ler_bloco_csv(csv_bloco)
+        respostas = respostas_sinteticas(itens, rng)
+        saida = str(trabalho / f"saida_{n}")
+        contador = iter(range(10**9))
+        resultados.append({"etapa": "salvar_respostas", **param, **medir(
+            lambda: app_delphi.salvar_respostas(registro_sintetico("bloco900", next(contador)), respostas, saida),
+            repeticoes,
+        )})
+        app_delphi.obter_armazenamento(saida).fechar()
+        app_delphi.obter_armazenamento.clear()
+        shutil.rmtree(saida, ignore_errors=True)
+    return resultados
+
+
+def bench_backup(trabalho: Path, repeticoes: int, rng: random.Random) -> list[dict]:
+    """Um lote de backup (sincronizar + commit + push) para um repositório bare local."""
+    from backup_fila import EspelhoRepo, FilaBackup, TrabalhadorBackup
+
+    resultados = []
+    itens = [{"codigo": f"900.{i}", "secao": "S", "tematica": "T", "pergunta": "P", "respostas": ""}
+             for i in range(ITENS_POR_SUBMISSAO)]
+    for n in PEDIDOS_BACKUP:
+        dir_ = trabalho / f"backup_{n}"
+        remoto = criar_repo_bare(dir_ / "git")
+        acervo = gerar_acervo(dir_ / "acervo", n * (repeticoes + 1), itens, rng)
+        arquivos = iter(sorted(str(p) for p in acervo.glob("*.csv")))
+        trabalhador = TrabalhadorBackup(
+            FilaBackup(dir_ / "fila"), EspelhoRepo(dir_ / "espelho", remoto, "main"), janela_s=0
+        )
+        trabalhador.espelho.sincronizar()  # clone inicial fora da medição
+
+        def _enfileirar():
+            for _ in range(n):
+                trabalhador.fila.enfileirar(next(arquivos), "bloco900")
+
+        resultados.append({"etapa": "backup_lote", "pedidos": n,
+                           **medir(trabalhador.processar_lote, repeticoes, _enfileirar)})
+    return resultados
+
+
+def bench_consolidacao(trabalho: Path, tamanhos: list[int], repeticoes: int, rng: random.Random) -> list[dict]:
+    """Consolidação (completa e sem novos arquivos), estatísticas de consenso e concordância."""
+    from analise_concordancia import analisar, carregar_avaliacoes
+    from estatisticas_consenso import calcular_consenso, carregar_consolidado
+
+    resultados = []
+    itens = [{"codigo": f"900.{i}", "secao": f"S{i // 5}", "tematica": TEMATICAS[i % len(TEMATICAS)],
+              "pergunta": f"Pergunta {i}", "respostas": ""} for i in range(ITENS_POR_SUBMISSAO)]
+    for n in tamanhos:
+        acervo = gerar_acervo(trabalho / "acervos" / f"arquivos_{n}", n, itens, rng)
+        saida, estado = trabalho / f"consolidado_{n}", trabalho / f"consolidado_{n}" / "estado"
+        param = {"arquivos": n}
+
+        resultados.append({"etapa": "consolidacao", **param, **medir(
+            lambda: consolidar(acervo, saida, estado, reconstruir=True), repeticoes)})
+        resultados.append({"etapa": "consolidacao_sem_novos", **param, **medir(
+            lambda: consolidar(acervo, saida, estado), repeticoes)})
+
+        consolidado = saida / "consolidado_respostas.csv"
+        resultados.append({"etapa": "estatisticas_consenso", **param, **medir(
+            lambda: calcular_consenso(carregar_consolidado(consolidado)), repeticoes)})
+        resultados.append({"etapa": "analise_concordancia", **param, **medir(
+            lambda: analisar(carregar_avaliacoes(consolidado), reamostragens=1000, workers=1), repeticoes)})
+    return resultados
+
+
+def _importtime(modulo: str) -> tuple[float, dict[str, float], float]:
+    """
+    Importar `modulo` em um interpretador novo com `-X importtime`.
+    Retorna o tempo acumulado do módulo (ms), o acumulado de cada módulo
+    importado (ms) e o pico de RSS do processo (MB).
+    """
+    codigo = f"import resource, {modulo}; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], cwd=APP_DIR,
+                       capture_output=True, text=True, check=True)
+    acumulados = {}
+    for linha in r.stderr.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, acumulado, nome = linha[len("import time:"):].split("|")
+        acumulados[nome.strip()] = int(acumulado) / 1000
+    return acumulados[modulo], acumulados, int(r.stdout.split()[-1]) / 1024
+
+
+def bench_importacao(repeticoes: int) -> list[dict]:
+    """
+    Partida a frio: importação do app (caminho do avaliador) em processo novo.
+    Registra os módulos mais lentos e se algum módulo pesado (pandas etc.)
+    entrou na importação.
+    """
+    resultados = []
+    for modulo in MODULOS_IMPORTACAO:
+        medicoes = [_importtime(modulo) for _ in range(repeticoes)]
+        tempos = [m[0] for m in medicoes]
+        acumulados = medicoes[-1][1]
+        filhos = {nome: ms for nome, ms in acumulados.items() if nome != modulo and "." not in nome}
+        resultados.append({
+            "etapa": "importacao", "modulo": modulo,
+            "ms": round(statistics.median(tempos), 3),
+            "ms_min": round(min(tempos), 3),
+            "mb_pico": round(max(m[2] for m in medicoes), 3),
+            "repeticoes": repeticoes,
+            "mais_lentos": sorted(filhos.items(), key=lambda kv: -kv[1])[:10],
+            "pesados": sorted(set(MODULOS_PESADOS) & set(acumulados)),
+        })
+    return resultados
+
+
+# ============================================================
+# RELATÓRIO / COMPARAÇÃO
+# ============================================================
+
+def chave(resultado: dict) -> str:
+    param = next(f"{k}={resultado[k]}" for k in ("itens", "arquivos", "pedidos", "modulo") if k in resultado)
+    return f"{resultado['etapa']}[{param}]"
+
+
+def comparar(atual: list[dict], baseline: list[dict], tolerancia: float) -> list[dict]:
+    """
+    Diferença de tempo (mediana) e pico de memória por medição presente nos
+    dois relatórios. Regressão: mais lento que baseline * (1 + tolerância)
+    e ao menos 1 ms pior.
+    """
+    anteriores = {chave(r): r for r in baseline}
+    linhas = []
+    for r in atual:
+        b = anteriores.get(chave(r))
+        if b is None:
+            continue
+        delta_ms = r["ms"] - b["ms"]
+        linhas.append({
+            "medicao": chave(r),
+            "ms_baseline": b["ms"],
+            "ms": r["ms"],
+            "delta_ms": round(delta_ms, 3),
+            "delta_pct": round(100 * delta_ms / b["ms"], 1) if b["ms"] else None,
+            "mb_baseline": b["mb_pico"],
+            "mb_pico": r["mb_pico"],
+            "delta_mb": round(r["mb_pico"] - b["mb_pico"], 3),
+            "regressao": r["ms"] > b["ms"] * (1 + tolerancia) and delta_ms >= 1.0,
+        })
+    return linhas
+
+
+def _versao_git() -> str:
+    r = subprocess.run(["git", "-C", str(ROOT), "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+    return r.stdout.strip()
+
+
+def _lista(valor: str) -> list[int]:
+    return [int(v) for v in valor.split(",") if v.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark do app Delphi com blocos e acervos sintéticos.")
+    parser.add_argument("--itens", type=_lista, default=_lista(ITENS_PADRAO), help="itens por bloco (ex.: 10,100,1000)")
+    parser.add_argument("--arquivos", type=_lista, default=_lista(ARQUIVOS_PADRAO),
+                        help="arquivos de submissão por acervo (ex.: 10,1000,10000,100000)")
+    parser.add_argument("--etapas", default="importacao,itens,backup,consolidacao", help="grupos a executar")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--trabalho", type=Path, default=BENCH_DIR / "dados",
+                        help="dados sintéticos (acervos são reaproveitados entre execuções)")
+    parser.add_argument("--saida", type=Path, default=BENCH_DIR / "resultado.json")
+    parser.add_argument("--baseline", type=Path, default=None, help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO)
+    parser.add_argument("--salvar-baseline", action="store_true", help="gravar também em outputs/benchmark/baseline.json")
+    args = parser.parse_args()
+
+    rng = random.Random(args.semente)
+    args.trabalho.mkdir(parents=True, exist_ok=True)
+    etapas = set(args.etapas.split(","))
+
+    resultados = []
+    if "importacao" in etapas:
+        resultados += bench_importacao(args.repeticoes)
+    if "itens" in etapas:
+        resultados += bench_itens(args.trabalho, args.itens, args.repeticoes, rng)
+    if "backup" in etapas:
+        resultados += bench_backup(args.trabalho, args.repeticoes, rng)
+    if "consolidacao" in etapas:
+        resultados += bench_consolidacao(args.trabalho, args.arquivos, args.repeticoes, rng)
+
+    relatorio = {
+        "meta": {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "commit": _versao_git(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "resultados": resultados,
+    }
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        relatorio["comparacao"] = comparar(resultados, baseline["resultados"], args.tolerancia)
+
+    args.saida.parent.mkdir(parents=True, exist_ok=True)
+    args.saida.write_text(json.dumps(relatorio, ensure_ascii=False, indent=2), encoding="utf-8")
+    if args.salvar_baseline:
+        (BENCH_DIR / "baseline.json").write_text(json.dumps(relatorio, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    for r in resultados:
+        print(f"{chave(r):<45} {r['ms']:>10.1f} ms {r['mb_pico']:>9.1f} MB")
+    regressoes = [c for c in relatorio.get("comparacao", []) if c["regressao"]]
+    pesados = [r for r in resultados if r.get("pesados")]
+    for r in pesados:
+        print(f"{chave(r)} importou {', '.join(r['pesados'])} no caminho do avaliador  <-- REGRESSÃO")
+    for c in relatorio.get("comparacao", []):
+        marca = "  <-- REGRESSÃO" if c["regressao"] else ""
+        print(f"{c['medicao']:<45} {c['delta_ms']:>+10.1f} ms ({c['delta_pct']}%) {c['delta_mb']:>+8.1f} MB{marca}")
+    print(f"Resultado em {args.saida}")
+    if regressoes or pesados:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
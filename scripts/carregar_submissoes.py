@@ -0,0 +1,213 @@
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from consolidar_respostas import (
+    COLUNAS, COLUNAS_ANONIMAS, ERROS_LEITURA, ESTADO_DIR, OUTPUTS, colunas_exportacao, descobrir_submissoes,
+    pasta_chave, registrar_erro_leitura,
+)
+from pseudonimizacao import Pseudonimizador, carregar_chave  # app/ no sys.path via consolidar_respostas
+
+
+# Tipos explícitos: nada é inferido arquivo a arquivo
+DTYPES = {c: "string" for c in {*COLUNAS, *COLUNAS_ANONIMAS}}
+DTYPES["grau_relevancia"] = "Int8"
+
+def ler_arquivo(caminho: str, engine: str = "c") -> pd.DataFrame:
+    """
+    Ler um CSV de submissão com tipos explícitos e colunas no layout do
+    consolidado (colunas ausentes ficam nulas; extras são descartadas).
+    Arquivos anteriores às rodadas (sem a coluna, ou vazia) são da 1ª
+    rodada, como em ler_submissao. Executado nos processos do pool.
+    """
+    cabecalho = pd.read_csv(caminho, nrows=0, engine="c").columns
+    usar = [c for c in cabecalho if c in DTYPES]
+    df = pd.read_csv(
+        caminho,
+        usecols=usar,
+        dtype={c: DTYPES[c] for c in usar},
+        engine=engine,
+        keep_default_na=False,
+    )
+    df["arquivo_origem"] = os.path.basename(caminho)
+    df = df.reindex(columns=COLUNAS).astype({c: DTYPES[c] for c in COLUNAS})
+    df["rodada"] = df["rodada"].fillna("1").replace("", "1")
+    return df
+
+
+def _pseudonimos(serie: pd.Series, pseudonimizador: Pseudonimizador) -> pd.Series:
+    codigos, distintos = pd.factorize(serie.fillna(""), sort=False)
+    valores = np.asarray(pseudonimizador.mapear(distintos), dtype=object)
+    return pd.Series(valores[codigos], index=serie.index, dtype="string")
+
+
+def anonimizar_lote(df: pd.DataFrame, avaliadores: Pseudonimizador, arquivos: Pseudonimizador) -> pd.DataFrame:
+    """
+    Etapa de anonimização vetorizada de um lote: avaliador (e-mail, ou nome
+    sem e-mail) e arquivo_origem viram pseudônimos HMAC e nome/e-mail/CPF
+    saem. Cada valor distinto do lote passa uma única vez pelo HMAC
+    (pd.factorize) e o resultado volta às linhas por indexação.
+    """
+    identificador = df["email"].fillna("").str.strip().str.lower()
+    sem_email = identificador == ""
+    identificador[sem_email] = df.loc[sem_email, "nome"].fillna("").str.strip().str.lower()
+    df["avaliador"] = _pseudonimos(identificador, avaliadores)
+    df["arquivo_origem"] = _pseudonimos(df["arquivo_origem"], arquivos)
+    return df.reindex(columns=COLUNAS_ANONIMAS)
+
+
+def _ler_seguro(caminho: str, engine: str) -> tuple[str, pd.DataFrame | None, str, str]:
+    try:
+        return caminho, ler_arquivo(caminho, engine), "", ""
+    except Exception as e:  # o erro volta ao processo principal para o log
+        return caminho, None, type(e).__name__, str(e)
+
+
+class _EscritorParquet:
+    def __init__(self, destino: Path, colunas: list[str]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.schema = pa.Schema.from_pandas(pd.DataFrame({c: pd.Series(dtype=DTYPES[c]) for c in colunas}),
+                                            preserve_index=False)
+        self._writer = pq.ParquetWriter(destino, self.schema, compression="zstd")
+
+    def escrever(self, df: pd.DataFrame) -> None:
+        self._writer.write_table(self._pa.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+
+    def fechar(self) -> None:
+        self._writer.close()
+
+
+class _EscritorCSV:
+    def __init__(self, destino: Path, colunas: list[str]):
+        self.destino = destino
+        self.colunas = colunas
+        self._primeiro = True
+
+    def escrever(self, df: pd.DataFrame) -> None:
+        df.to_csv(self.destino, mode="w" if self._primeiro else "a", header=self._primeiro, index=False)
+        self._primeiro = False
+
+    def fechar(self) -> None:
+        if self._primeiro:
+            pd.DataFrame(columns=self.colunas).to_csv(self.destino, index=False)
+
+
+def carregar_em_lote(
+    arquivos: list[str],
+    destino: Path,
+    workers: int | None = None,
+    engine: str = "c",
+    linhas_por_lote: int = 200_000,
+    log_erros: Path = ERROS_LEITURA,
+    identificado: bool = False,
+    chave: bytes | None = None,
+) -> dict:
+    """
+    Ler submissões em paralelo (pool de processos) e gravá-las em um único
+    dataset colunar (Parquet; CSV se destino terminar em .csv).
+
+    A memória fica limitada: no máximo `workers * 4` arquivos em leitura ao
+    mesmo tempo e até `linhas_por_lote` linhas acumuladas antes de cada
+    gravação (um row group por lote).
+
+    Entradas:
+        arquivos (list[str]): CSVs de submissão.
+        destino (Path): arquivo de saída (.parquet ou .csv).
+        workers (int | None): processos do pool (padrão: os.cpu_count()).
+        engine (str): motor do pandas.read_csv ("c" ou "pyarrow").
+        linhas_por_lote (int): linhas por gravação.
+        log_erros (Path): log JSON Lines de arquivos ilegíveis.
+        identificado (bool): manter nome, e-mail e CPF (padrão: cada lote
+            passa por anonimizar_lote antes da gravação).
+        chave (bytes | None): chave dos pseudônimos (padrão: carregar_chave
+            em pasta_chave do destino).
+
+    Saídas:
+        dict: arquivos lidos, linhas gravadas e erros.
+    """
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    colunas = colunas_exportacao(identificado)
+    if not identificado:
+        chave = chave or carregar_chave(str(pasta_chave(destino.parent)), criar=True)
+        avaliadores, arquivos_origem = Pseudonimizador(chave, "avaliador"), Pseudonimizador(chave, "arquivo")
+    escritor = _EscritorCSV(destino, colunas) if destino.suffix == ".csv" else _EscritorParquet(destino, colunas)
+    workers = workers or os.cpu_count() or 1
+    em_voo_max = workers * 4
+
+    lote: list[pd.DataFrame] = []
+    linhas_lote = 0
+    r = {"arquivos": len(arquivos), "lidos": 0, "linhas": 0, "erros": 0}
+
+    def _descarregar() -> None:
+        nonlocal lote, linhas_lote
+        if lote:
+            df = pd.concat(lote, ignore_index=True)
+            escritor.escrever(df if identificado else anonimizar_lote(df, avaliadores, arquivos_origem))
+            r["linhas"] += linhas_lote
+            lote, linhas_lote = [], 0
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pendentes = iter(arquivos)
+            em_voo: deque = deque()
+            for caminho in pendentes:
+                em_voo.append(pool.submit(_ler_seguro, caminho, engine))
+                if len(em_voo) >= em_voo_max:
+                    break
+            while em_voo:
+                caminho, df, tipo, erro = em_voo.popleft().result()
+                proximo = next(pendentes, None)
+                if proximo is not None:
+                    em_voo.append(pool.submit(_ler_seguro, proximo, engine))
+
+                if df is None:
+                    r["erros"] += 1
+                    registrar_erro_leitura(caminho, tipo, erro, log_erros)
+                    continue
+                r["lidos"] += 1
+                lote.append(df)
+                linhas_lote += len(df)
+                if linhas_lote >= linhas_por_lote:
+                    _descarregar()
+        _descarregar()
+    finally:
+        escritor.fechar()
+    return r
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Carga paralela de arquivos de submissão em dataset colunar.")
+    parser.add_argument("--entrada", type=Path, default=None,
+                        help="pasta com submissões (busca recursiva); padrão: outputs/")
+    parser.add_argument("--destino", type=Path, default=ESTADO_DIR / "respostas.parquet",
+                        help="arquivo de saída (.parquet ou .csv)")
+    parser.add_argument("--workers", type=int, default=None, help="processos em paralelo (padrão: nº de CPUs)")
+    parser.add_argument("--engine", choices=["c", "pyarrow"], default="c", help="motor de leitura CSV")
+    parser.add_argument("--linhas-por-lote", type=int, default=200_000)
+    parser.add_argument("--identificado", action="store_true",
+                        help="mantém nome, e-mail e CPF (uso restrito; padrão: pseudônimos)")
+    args = parser.parse_args()
+
+    entrada = args.entrada or OUTPUTS
+    arquivos = descobrir_submissoes(entrada, recursivo=args.entrada is not None)
+    if not arquivos:
+        print(f"Nenhum arquivo de submissão encontrado em {entrada}")
+        return
+
+    r = carregar_em_lote(arquivos, args.destino, args.workers, args.engine, args.linhas_por_lote,
+                         identificado=args.identificado)
+    print(f"OK. {r['lidos']}/{r['arquivos']} arquivo(s), {r['linhas']} linha(s) em {args.destino}")
+    if r["erros"]:
+        print(f"{r['erros']} arquivo(s) ilegível(is); detalhes em {ERROS_LEITURA}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,81 +1,649 @@
+import argparse
+import csv
 import glob
+import hashlib
+import json
 import os
+import shutil
+import sys
+from collections import Counter
+from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
-
 
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+
+from armazenamento import ArmazenamentoSQLite  # noqa: E402
+from pseudonimizacao import IDENTIFICADORES_DIRETOS, Pseudonimizador, carregar_chave  # noqa: E402
+
 OUTPUTS = ROOT / "outputs"
+ESTADO_DIR = OUTPUTS / "consolidacao"
+ERROS_LEITURA = ESTADO_DIR / "erros_leitura.jsonl"
 
+PADRAO_SUBMISSOES = "delphi_*_*.csv"
+BANCO_SUBMISSOES = "submissoes.db"  # backend SQLite do app, da API e da importação
 
-def main() -> None:
-    OUTPUTS.mkdir(parents=True, exist_ok=True)
+# Colunas do consolidado (mesma ordem do CSV exportado pelo app)
+COLUNAS = [
+    "bloco", "secao", "codigo", "tematica",
+    "pergunta", "respostas",
+    "grau_relevancia", "aplicabilidade_nacional", "aceitacao_item",
+    "comentarios_sugestoes",
+    "nome", "email", "cpf",
+    "concordancia_instr_delphi",
+    "consentimento", "timestamp",
+    "rodada", "submissao_id", "arquivo_origem",
+]
 
-    files = sorted(glob.glob(str(OUTPUTS / "respostas_bloco1_*.csv")))
-    if not files:
-        print("Nenhum arquivo encontrado em outputs/ com padrão respostas_bloco1_*.csv")
-        return
+# Colunas das exportações de análise (padrão): sem identificadores diretos;
+# o avaliador vira um pseudônimo HMAC estável entre rodadas e o nome do
+# arquivo de origem (que contém o nome do avaliador) também é pseudonimizado
+COLUNAS_ANONIMAS = [
+    "bloco", "secao", "codigo", "tematica",
+    "pergunta", "respostas",
+    "grau_relevancia", "aplicabilidade_nacional", "aceitacao_item",
+    "comentarios_sugestoes",
+    "avaliador",
+    "concordancia_instr_delphi",
+    "consentimento", "timestamp",
+    "rodada", "submissao_id", "arquivo_origem",
+]
 
-    dfs = []
-    for fp in files:
-        try:
-            dfs.append(pd.read_csv(fp))
-        except Exception as e:
-            print(f"Falha ao ler {fp}: {e}")
+# Exportações colunares/planilha
+COLUNAS_PARTICAO = ["rodada", "bloco"]
+COLUNAS_DICIONARIO = ["pergunta", "respostas", "tematica", "avaliador"]
+LINHAS_POR_ABA_XLSX = 1_048_575  # limite do Excel, sem o cabeçalho
 
-    if not dfs:
-        print("Nenhum arquivo pôde ser lido.")
-        return
+# Agregados parciais persistidos: nome -> colunas de agrupamento
+AGREGADOS = {
+    "total": ["aceitacao_item"],
+    "tematica": ["tematica", "aceitacao_item"],
+    "item": ["rodada", "bloco", "codigo", "aceitacao_item"],
+}
+
+
+def _hash_arquivo(caminho: str) -> str:
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _ler_json(caminho: Path, padrao):
+    try:
+        return json.loads(caminho.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return padrao
+
+
+def _gravar_json(caminho: Path, dados) -> None:
+    tmp = caminho.with_suffix(".tmp")
+    tmp.write_text(json.dumps(dados, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, caminho)
+
+
+def registrar_erro_leitura(caminho: str, tipo: str, erro: str, log_path: Path = ERROS_LEITURA) -> dict:
+    """
+    Registrar falha de leitura em log estruturado (JSON Lines), em vez de print.
+
+    Saídas:
+        dict: o registro gravado.
+    """
+    registro = {
+        "quando": datetime.now().isoformat(timespec="seconds"),
+        "arquivo": str(caminho),
+        "tipo": tipo,
+        "erro": erro.strip()[:500],
+    }
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    return registro
+
+
+def descobrir_submissoes(entrada: Path, recursivo: bool) -> list[str]:
+    """
+    Listar arquivos de submissão (delphi_<bloco>_*.csv). Com `recursivo`,
+    percorre subpastas (ex.: clone do repositório de backup, respostas/<bloco>/).
+    """
+    padrao = str(entrada / "**" / PADRAO_SUBMISSOES) if recursivo else str(entrada / PADRAO_SUBMISSOES)
+    return sorted(glob.glob(padrao, recursive=recursivo))
+
+
+def versao_submissao(linhas: list[dict]) -> tuple[tuple[str, str, str], tuple[str, str]] | tuple[None, None]:
+    """
+    Chave do avaliador no bloco e na rodada (e-mail normalizado, ou nome sem
+    e-mail) e ordem da versão (timestamp, submissao_id) de uma submissão lida.
+    """
+    if not linhas:
+        return None, None
+    p = linhas[0]
+    avaliador = (p.get("email") or p.get("nome") or "").strip().lower()
+    return (avaliador, p.get("bloco", ""), p["rodada"]), (p.get("timestamp", ""), p.get("submissao_id", ""))
+
+
+def ler_submissao(caminho: str) -> list[dict]:
+    """
+    Ler um CSV de submissão como lista de linhas (sem pandas). Arquivos
+    anteriores às rodadas (sem a coluna) são da 1ª rodada.
+    """
+    with open(caminho, newline="", encoding="utf-8-sig") as f:
+        linhas = list(csv.DictReader(f))
+    origem = os.path.basename(caminho)
+    for linha in linhas:
+        linha["arquivo_origem"] = origem
+        linha["rodada"] = linha.get("rodada") or "1"
+    return linhas
+
+
+def ler_banco(banco: Path, marca: int) -> tuple[dict[str, list[dict]], int]:
+    """
+    Ler do banco SQLite as submissões gravadas depois de `marca` (rowid),
+    como linhas no mesmo formato de ler_submissao (valores em texto). Cada
+    submissão tem origem própria, <banco>#<submissao_id>.
+
+    Saídas:
+        (submissoes, marca): origem -> linhas, e a nova marca.
+    """
+    armazenamento = ArmazenamentoSQLite(str(banco))
+    try:
+        linhas, marca = armazenamento.respostas_desde(marca)
+    finally:
+        armazenamento.fechar()
+    submissoes: dict[str, list[dict]] = {}
+    for linha in linhas:
+        linha = {c: "" if v is None else str(v) for c, v in linha.items()}
+        origem = f"{banco}#{linha['submissao_id']}"
+        linha["arquivo_origem"] = os.path.basename(origem)
+        submissoes.setdefault(origem, []).append(linha)
+    return submissoes, marca
+
+
+def pasta_chave(saida: Path) -> Path:
+    """
+    Pasta do arquivo da chave de pseudonimização para uma exportação em
+    `saida`: outputs/ para tudo que fica dentro de outputs/ (mesma chave do
+    app e do feedback da rodada); fora dele, a própria pasta de saída.
+    """
+    saida = Path(saida).resolve()
+    return OUTPUTS if saida == OUTPUTS or OUTPUTS in saida.parents else saida
+
+
+def colunas_exportacao(identificado: bool = False) -> list[str]:
+    """Colunas do consolidado: anônimas (padrão) ou com nome/e-mail/CPF (--identificado)."""
+    return COLUNAS if identificado else COLUNAS_ANONIMAS
+
+
+def anonimizar_linhas(linhas: list[dict], avaliadores: Pseudonimizador, arquivos: Pseudonimizador) -> None:
+    """
+    Etapa de anonimização (no lugar): avaliador (e-mail, ou nome sem
+    e-mail) e arquivo_origem viram pseudônimos HMAC e os identificadores
+    diretos saem da linha. Cada valor distinto do lote é hasheado uma vez.
+    """
+    ids = avaliadores.mapear([linha.get("email") or linha.get("nome") or "" for linha in linhas])
+    origens = arquivos.mapear([linha["arquivo_origem"] for linha in linhas])
+    for linha, avaliador, origem in zip(linhas, ids, origens):
+        for coluna in IDENTIFICADORES_DIRETOS:
+            linha.pop(coluna, None)
+        linha["avaliador"] = avaliador
+        linha["arquivo_origem"] = origem
+
+
+def _cabecalho(caminho: Path) -> list[str] | None:
+    try:
+        with open(caminho, newline="", encoding="utf-8") as f:
+            return next(csv.reader(f), None)
+    except OSError:
+        return None
+
+
+class EstadoConsolidacao:
+    """
+    Estado persistido entre execuções em outputs/consolidacao/:
+
+    - manifesto.json: arquivos já processados (tamanho, mtime, hash, linhas,
+      avaliador/bloco, versão e se foi substituído por versão mais nova)
+    - agregados.json: contagens parciais de cada resumo
+
+    Arquivos novos são lidos uma única vez e somados aos agregados. Se um
+    arquivo já processado mudar de conteúdo ou desaparecer, a consolidação
+    é refeita do zero (as submissões são imutáveis no fluxo normal).
+    Só a versão mais recente de cada avaliador por bloco e rodada fica no
+    consolidado.
+
+    Submissões lidas do banco SQLite entram no manifesto como
+    <banco>#<submissao_id> (marcadas com "banco"); o rowid da última lida
+    fica em banco.json, para a próxima execução ler só as novas.
+    """
+
+    def __init__(self, estado_dir: Path):
+        self.estado_dir = estado_dir
+        self.manifesto_path = estado_dir / "manifesto.json"
+        self.agregados_path = estado_dir / "agregados.json"
+        self.banco_path = estado_dir / "banco.json"
+        self.manifesto: dict = _ler_json(self.manifesto_path, {})
+        self.marca_banco: int = _ler_json(self.banco_path, {}).get("marca", 0)
+        brutos = _ler_json(self.agregados_path, {})
+        self.agregados: dict[str, Counter] = {
+            nome: Counter({tuple(k[:-1]): k[-1] for k in brutos.get(nome, [])}) for nome in AGREGADOS
+        }
+
+    def limpar(self) -> None:
+        self.manifesto = {}
+        self.marca_banco = 0
+        self.agregados = {nome: Counter() for nome in AGREGADOS}
+
+    def hashes_processados(self) -> set[str]:
+        return {m["hash"] for m in self.manifesto.values()}
+
+    def submissoes_processadas(self) -> set[str]:
+        return {m["versao"][1] for m in self.manifesto.values() if m.get("versao")}
+
+    def tem_banco(self) -> bool:
+        return any(m.get("banco") for m in self.manifesto.values())
+
+    def formato_antigo(self) -> bool:
+        """Manifesto sem avaliador/versão ou sem rodada na chave (formatos anteriores)."""
+        return any(m["linhas"] and len(m.get("chave", ())) != 3 for m in self.manifesto.values())
+
+    def vigentes(self) -> dict[tuple, tuple[tuple, str]]:
+        """(avaliador, bloco, rodada) -> (versão, arquivo) da versão consolidada."""
+        return {
+            tuple(m["chave"]): (tuple(m["versao"]), p)
+            for p, m in self.manifesto.items() if m.get("chave") and not m.get("substituido")
+        }
+
+    def somar(self, linhas: list[dict], sinal: int = 1) -> None:
+        for nome, chaves in AGREGADOS.items():
+            contagem = self.agregados[nome]
+            for linha in linhas:
+                contagem[tuple(linha.get(c, "") for c in chaves)] += sinal
+            if sinal < 0:
+                contagem += Counter()  # descarta contagens zeradas
 
-    df = pd.concat(dfs, ignore_index=True)
+    def salvar(self) -> None:
+        self.estado_dir.mkdir(parents=True, exist_ok=True)
+        _gravar_json(self.manifesto_path, self.manifesto)
+        _gravar_json(self.banco_path, {"marca": self.marca_banco})
+        _gravar_json(
+            self.agregados_path,
+            {nome: [[*k, n] for k, n in c.items()] for nome, c in self.agregados.items()},
+        )
 
-    # Consolidação detalhada
-    consolidado_csv = OUTPUTS / "consolidado_respostas.csv"
-    df.to_csv(consolidado_csv, index=False)
 
-    # Resumo de contagens por voto (total)
-    resumo_total = (
-        df.groupby(["voto_delphi"])
-        .size()
-        .reset_index(name="n")
-        .sort_values("n", ascending=False)
+def classificar_arquivos(estado: EstadoConsolidacao, arquivos: list[str]) -> tuple[list[str], bool]:
+    """
+    Comparar os arquivos atuais com o manifesto.
+
+    Saídas:
+        (novos, reconstruir): arquivos ainda não processados e se algum
+        arquivo já processado mudou/desapareceu (exigindo reconstrução).
+    """
+    atuais = set(arquivos)
+    if any(p not in atuais for p, m in estado.manifesto.items() if not m.get("banco")):
+        return arquivos, True
+
+    novos = []
+    for p in arquivos:
+        m = estado.manifesto.get(p)
+        if m is None:
+            novos.append(p)
+            continue
+        st_ = os.stat(p)
+        if (st_.st_size, st_.st_mtime_ns) == (m["tamanho"], m["mtime_ns"]):
+            continue
+        if st_.st_size == m["tamanho"] and _hash_arquivo(p) == m["hash"]:
+            m["mtime_ns"] = st_.st_mtime_ns
+            continue
+        return arquivos, True
+    return novos, False
+
+
+def _incorporar(
+    estado: EstadoConsolidacao,
+    vigentes: dict,
+    substituidas: set[str],
+    origem: str,
+    registro: dict,
+    linhas: list[dict],
+) -> list[dict]:
+    """
+    Registrar no manifesto uma submissão lida (arquivo ou banco) e retornar
+    suas linhas, se for a versão mais recente do avaliador; a versão que ela
+    substitui vai para `substituidas`.
+    """
+    registro["linhas"] = len(linhas)
+    chave_avaliador, versao = versao_submissao(linhas)
+    if chave_avaliador is not None:
+        registro["chave"], registro["versao"] = list(chave_avaliador), list(versao)
+        atual = vigentes.get(chave_avaliador)
+        if atual is not None and atual[0] >= versao:
+            registro["substituido"] = True
+            linhas = []
+        else:
+            if atual is not None:
+                estado.manifesto[atual[1]]["substituido"] = True
+                substituidas.add(os.path.basename(atual[1]))
+            vigentes[chave_avaliador] = (versao, origem)
+    estado.manifesto[origem] = registro
+    return linhas
+
+
+def _remover_do_consolidado(
+    caminho: Path, origens: set[str], estado: EstadoConsolidacao, colunas: list[str] = COLUNAS
+) -> int:
+    """
+    Reescrever o consolidado sem as linhas de versões substituídas
+    (arquivo_origem em `origens`, já pseudonimizado no modo anônimo) e
+    descontá-las dos agregados.
+    """
+    removidas = []
+    tmp = caminho.with_suffix(".tmp")
+    with open(caminho, newline="", encoding="utf-8") as f, open(tmp, "w", newline="", encoding="utf-8") as out:
+        writer = csv.DictWriter(out, fieldnames=colunas, extrasaction="ignore")
+        writer.writeheader()
+        for linha in csv.DictReader(f):
+            if linha["arquivo_origem"] in origens:
+                removidas.append(linha)
+            else:
+                writer.writerow(linha)
+    os.replace(tmp, caminho)
+    estado.somar(removidas, sinal=-1)
+    return len(removidas)
+
+
+def _anexar_consolidado(caminho: Path, linhas: list[dict], novo: bool, colunas: list[str] = COLUNAS) -> None:
+    modo = "w" if novo else "a"
+    with open(caminho, modo, newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=colunas, extrasaction="ignore")
+        if novo:
+            writer.writeheader()
+        writer.writerows(linhas)
+
+
+def montar_resumo(contagem: Counter, chaves: list[str]) -> list[dict]:
+    """Converter contagens agregadas em linhas ordenadas (n decrescente por grupo)."""
+    grupos = chaves[:-1]
+    linhas = [{**dict(zip(chaves, k)), "n": n} for k, n in contagem.items()]
+    linhas.sort(key=lambda r: r["n"], reverse=True)
+    linhas.sort(key=lambda r: tuple(r[g] for g in grupos))
+    return linhas
+
+
+def _gravar_resumo(caminho: Path, linhas: list[dict], colunas: list[str]) -> None:
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=colunas)
+        writer.writeheader()
+        writer.writerows(linhas)
+
+
+def gerar_resumos(estado: EstadoConsolidacao, saida: Path) -> dict[str, list[dict]]:
+    """Gravar resumo_total/resumo_tematica/resumo_por_item a partir dos agregados."""
+    resumo_total = montar_resumo(estado.agregados["total"], AGREGADOS["total"])
+    total = sum(r["n"] for r in resumo_total)
+    for r in resumo_total:
+        r["percentual"] = round(r["n"] / total * 100, 2) if total else 0.0
+    resumo_tematica = montar_resumo(estado.agregados["tematica"], AGREGADOS["tematica"])
+    resumo_item = montar_resumo(estado.agregados["item"], AGREGADOS["item"])
+
+    _gravar_resumo(saida / "resumo_total.csv", resumo_total, [*AGREGADOS["total"], "n", "percentual"])
+    _gravar_resumo(saida / "resumo_tematica.csv", resumo_tematica, [*AGREGADOS["tematica"], "n"])
+    _gravar_resumo(saida / "resumo_por_item.csv", resumo_item, [*AGREGADOS["item"], "n"])
+    return {"resumo_total": resumo_total, "resumo_tematica": resumo_tematica, "resumo_por_item": resumo_item}
+
+
+def gerar_xlsx(saida: Path, resumos: dict[str, list[dict]]) -> None:
+    """
+    Planilha completa (reescrita integral; use apenas quando necessário).
+
+    O openpyxl em modo write-only grava as linhas em fluxo: o consolidado é
+    lido linha a linha do CSV e a memória não cresce com o acervo. Acima do
+    limite do Excel, as respostas continuam em respostas_2, respostas_3...
+    """
+    from openpyxl import Workbook  # dependência opcional, só para --xlsx
+
+    wb = Workbook(write_only=True)
+    with open(saida / "consolidado_respostas.csv", newline="", encoding="utf-8") as f:
+        leitor = csv.reader(f)
+        cabecalho = next(leitor, COLUNAS)
+        aba, n = None, LINHAS_POR_ABA_XLSX
+        for linha in leitor:
+            if n == LINHAS_POR_ABA_XLSX:
+                aba = wb.create_sheet("respostas" if aba is None else f"respostas_{len(wb.worksheets) + 1}")
+                aba.append(cabecalho)
+                n = 0
+            aba.append(linha)
+            n += 1
+        if aba is None:
+            wb.create_sheet("respostas").append(cabecalho)
+
+    for nome, linhas in resumos.items():
+        aba = wb.create_sheet(nome)
+        if linhas:
+            aba.append(list(linhas[0]))
+            for linha in linhas:
+                aba.append(list(linha.values()))
+    wb.save(saida / "consolidado_respostas.xlsx")
+
+
+def gerar_parquet(saida: Path, linhas_por_lote: int = 65_536) -> Path:
+    """
+    Função: gerar_parquet
+
+    Objetivo:
+        Exportar o consolidado como dataset Parquet particionado por
+        rodada/bloco (estilo Hive: bloco=bloco1/...), para que ferramentas de
+        BI leiam só as colunas e partições necessárias.
+
+    Regras:
+        - leitura do CSV em lotes (memória limitada, independente do acervo),
+          aceitando quebras de linha dentro dos valores (comentários)
+        - texto repetitivo (COLUNAS_DICIONARIO) gravado com codificação
+          por dicionário; grau_relevancia como inteiro
+        - reescrita integral de consolidado_parquet/ a cada execução
+
+    Saídas:
+        Path: pasta do dataset.
+    """
+    import pyarrow as pa  # dependência opcional, só para --parquet
+    import pyarrow.dataset as ds
+    from pyarrow import csv as pacsv
+
+    destino = saida / "consolidado_parquet"
+    shutil.rmtree(destino, ignore_errors=True)
+    colunas = _cabecalho(saida / "consolidado_respostas.csv") or COLUNAS_ANONIMAS
+    tipos = {c: pa.string() for c in colunas}
+    tipos.update({c: pa.dictionary(pa.int32(), pa.string()) for c in COLUNAS_DICIONARIO if c in tipos})
+    tipos["grau_relevancia"] = pa.int8()
+    leitor = pacsv.open_csv(
+        saida / "consolidado_respostas.csv",
+        read_options=pacsv.ReadOptions(block_size=max(1 << 20, linhas_por_lote * 256)),
+        # Comentários do st.text_area trazem quebras de linha dentro das aspas
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            column_types=tipos, include_columns=colunas, strings_can_be_null=False,
+        ),
     )
-    total = resumo_total["n"].sum()
-    resumo_total["percentual"] = (resumo_total["n"] / total * 100).round(2)
-
-    # Resumo por temática x voto
-    resumo_tematica = (
-        df.groupby(["tematica", "voto_delphi"])
-        .size()
-        .reset_index(name="n")
-        .sort_values(["tematica", "n"], ascending=[True, False])
+    particoes = [c for c in COLUNAS_PARTICAO if c in colunas]
+    formato = ds.ParquetFileFormat()
+    ds.write_dataset(
+        leitor,
+        destino,
+        format=formato,
+        file_options=formato.make_write_options(compression="zstd", use_dictionary=[c for c in COLUNAS_DICIONARIO if c in colunas]),
+        partitioning=ds.partitioning(pa.schema([leitor.schema.field(c) for c in particoes]), flavor="hive"),
+        max_rows_per_group=linhas_por_lote,
+        existing_data_behavior="overwrite_or_ignore",
     )
+    return destino
+
+
+def consolidar(
+    entrada: Path = OUTPUTS,
+    saida: Path = OUTPUTS,
+    estado_dir: Path = ESTADO_DIR,
+    recursivo: bool = False,
+    reconstruir: bool = False,
+    xlsx: bool = False,
+    parquet: bool = False,
+    identificado: bool = False,
+    chave: bytes | None = None,
+    banco: Path | None = None,
+) -> dict:
+    """
+    Consolidar incrementalmente as submissões de `entrada` em `saida`,
+    mantendo só a versão mais recente (timestamp, submissao_id) de cada
+    avaliador por bloco e rodada: uma versão nova retira a anterior do
+    consolidado e dos agregados; uma versão mais antiga que chegue depois é
+    ignorada.
+
+    Além dos CSVs exportados, lê as submissões gravadas no `banco` SQLite
+    (padrão: entrada/submissoes.db, se existir) que não têm CSV, como as
+    gravadas com DELPHI_EXPORTAR_CSV=0.
 
-    # Resumo por item (codigo) x voto
-    resumo_item = (
-        df.groupby(["codigo", "voto_delphi"])
-        .size()
-        .reset_index(name="n")
-        .sort_values(["codigo", "n"], ascending=[True, False])
+    Por padrão o consolidado (e o XLSX/Parquet derivados) sai sem
+    identificadores diretos (anonimizar_linhas), com pseudônimos da `chave`
+    (padrão: carregar_chave em pasta_chave(saida), criada na primeira
+    execução).
+    `identificado` mantém nome, e-mail e CPF (uso restrito, auditoria).
+
+    Saídas:
+        dict: estatísticas da execução (arquivos novos, linhas, versões
+        substituídas, reconstrução).
+    """
+    saida.mkdir(parents=True, exist_ok=True)
+    estado = EstadoConsolidacao(estado_dir)
+    consolidado_csv = saida / "consolidado_respostas.csv"
+
+    colunas = colunas_exportacao(identificado)
+    if not identificado:
+        chave = chave or carregar_chave(str(pasta_chave(saida)), criar=True)
+        avaliadores, origens = Pseudonimizador(chave, "avaliador"), Pseudonimizador(chave, "arquivo")
+
+    banco = banco or entrada / BANCO_SUBMISSOES
+    arquivos = descobrir_submissoes(entrada, recursivo)
+    novos, mudou = classificar_arquivos(estado, arquivos)
+    # Troca de modo (anônimo/identificado), consolidado anterior à
+    # anonimização ou banco já consolidado que sumiu: refaz com as colunas atuais
+    reconstruir = (
+        reconstruir or mudou or estado.formato_antigo() or _cabecalho(consolidado_csv) != colunas
+        or (estado.tem_banco() and not banco.is_file())
     )
+    if reconstruir:
+        estado.limpar()
+        novos = arquivos
+
+    conhecidos = estado.hashes_processados()
+    vigentes = estado.vigentes()
+    substituidas: set[str] = set()
+    linhas_novas: list[dict] = []
+    duplicados = 0
+    erros = 0
+    for fp in novos:
+        st_ = os.stat(fp)
+        h = _hash_arquivo(fp)
+        registro = {"tamanho": st_.st_size, "mtime_ns": st_.st_mtime_ns, "hash": h, "linhas": 0}
+        if h in conhecidos:
+            # Mesma submissão em outro caminho (ex.: cópia do backup)
+            duplicados += 1
+            estado.manifesto[fp] = registro
+            continue
+        try:
+            linhas = ler_submissao(fp)
+        except (OSError, csv.Error, UnicodeDecodeError) as e:
+            registrar_erro_leitura(fp, type(e).__name__, str(e), estado_dir / "erros_leitura.jsonl")
+            erros += 1
+            continue
+        conhecidos.add(h)
+        linhas_novas.extend(_incorporar(estado, vigentes, substituidas, fp, registro, linhas))
+
+    # Submissões só no banco (DELPHI_EXPORTAR_CSV=0); as que também têm CSV
+    # exportado já entraram pelo arquivo
+    lidas_banco = 0
+    if banco.is_file():
+        exportadas = estado.submissoes_processadas()
+        do_banco, estado.marca_banco = ler_banco(banco, estado.marca_banco)
+        for origem, linhas in do_banco.items():
+            if linhas[0]["submissao_id"] in exportadas:
+                continue
+            lidas_banco += 1
+            registro = {"banco": True, "hash": origem, "linhas": 0}
+            linhas_novas.extend(_incorporar(estado, vigentes, substituidas, origem, registro, linhas))
+
+    if substituidas:
+        linhas_novas = [linha for linha in linhas_novas if linha["arquivo_origem"] not in substituidas]
+        if not identificado:
+            substituidas = set(origens.mapear(substituidas))
+        if not reconstruir:
+            _remover_do_consolidado(consolidado_csv, substituidas, estado, colunas)
+
+    if not identificado:
+        anonimizar_linhas(linhas_novas, avaliadores, origens)
+    if reconstruir or linhas_novas:
+        _anexar_consolidado(consolidado_csv, linhas_novas, novo=reconstruir, colunas=colunas)
+        estado.somar(linhas_novas)
+
+    resumos = gerar_resumos(estado, saida)
+    if xlsx:
+        gerar_xlsx(saida, resumos)
+    if parquet:
+        gerar_parquet(saida)
+    estado.salvar()
+
+    return {
+        "arquivos": len(arquivos),
+        "novos": len(novos),
+        "banco": lidas_banco,
+        "banco_total": sum(bool(m.get("banco")) for m in estado.manifesto.values()),
+        "duplicados": duplicados,
+        "substituidos": sum(bool(m.get("substituido")) for m in estado.manifesto.values()),
+        "linhas_novas": len(linhas_novas),
+        "erros": erros,
+        "reconstruido": reconstruir,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Consolidação incremental das submissões Delphi.")
+    parser.add_argument("--entrada", type=Path, default=None,
+                        help="pasta com submissões (busca recursiva); padrão: outputs/")
+    parser.add_argument("--reconstruir", action="store_true", help="ignora o manifesto e refaz tudo")
+    parser.add_argument("--xlsx", action="store_true", help="gera também consolidado_respostas.xlsx")
+    parser.add_argument("--parquet", action="store_true",
+                        help="gera também consolidado_parquet/ (particionado por rodada/bloco)")
+    parser.add_argument("--identificado", action="store_true",
+                        help="mantém nome, e-mail e CPF no consolidado (uso restrito; padrão: pseudônimos)")
+    parser.add_argument("--banco", type=Path, default=None,
+                        help="banco SQLite das submissões; padrão: <entrada>/submissoes.db, se existir")
+    args = parser.parse_args()
+
+    OUTPUTS.mkdir(parents=True, exist_ok=True)
+    entrada = args.entrada or OUTPUTS
+    r = consolidar(entrada, recursivo=args.entrada is not None, reconstruir=args.reconstruir,
+                   xlsx=args.xlsx, parquet=args.parquet, identificado=args.identificado, banco=args.banco)
+
+    if not r["arquivos"] and not r["banco_total"]:
+        print(f"Nenhum arquivo encontrado em {entrada} com padrão {PADRAO_SUBMISSOES} "
+              f"nem submissão em {args.banco or entrada / BANCO_SUBMISSOES}")
+        return
 
-    resumo_csv = OUTPUTS / "resumo_contagens.csv"
-    with pd.ExcelWriter(OUTPUTS / "consolidado_respostas.xlsx") as xw:
-        df.to_excel(xw, sheet_name="respostas", index=False)
-        resumo_total.to_excel(xw, sheet_name="resumo_total", index=False)
-        resumo_tematica.to_excel(xw, sheet_name="resumo_tematica", index=False)
-        resumo_item.to_excel(xw, sheet_name="resumo_por_item", index=False)
-
-    # Também salvar os resumos em CSV
-    resumo_total.to_csv(OUTPUTS / "resumo_total.csv", index=False)
-    resumo_tematica.to_csv(OUTPUTS / "resumo_tematica.csv", index=False)
-    resumo_item.to_csv(OUTPUTS / "resumo_por_item.csv", index=False)
-
-    print(f"OK. Arquivos gerados em {OUTPUTS}")
-    print(f"- {consolidado_csv.name}")
-    print(f"- consolidado_respostas.xlsx")
-    print(f"- resumo_total.csv / resumo_tematica.csv / resumo_por_item.csv")
+    modo = "reconstrução completa" if r["reconstruido"] else "incremental"
+    print(f"OK ({modo}). {r['novos']} arquivo(s) novo(s), {r['banco']} submissão(ões) nova(s) só no banco, "
+          f"{r['linhas_novas']} linha(s) adicionada(s).")
+    if r["substituidos"]:
+        print(f"{r['substituidos']} versão(ões) substituída(s) por envio mais recente do mesmo avaliador/bloco")
+    print(f"Arquivos gerados em {OUTPUTS}")
+    print("- consolidado_respostas.csv" + (" (identificado: uso restrito)" if args.identificado else
+                                            " (avaliadores pseudonimizados)"))
+    if args.xlsx:
+        print("- consolidado_respostas.xlsx")
+    if args.parquet:
+        print(f"- consolidado_parquet/ (particionado por {'/'.join(c for c in COLUNAS_PARTICAO if c in COLUNAS)})")
+    print("- resumo_total.csv / resumo_tematica.csv / resumo_por_item.csv")
+    if r["erros"]:
+        print(f"{r['erros']} arquivo(s) ilegível(is); detalhes em {ERROS_LEITURA}")
 
 
 if __name__ == "__main__":
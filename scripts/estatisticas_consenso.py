@@ -0,0 +1,230 @@
+import argparse
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from consolidar_respostas import OUTPUTS
+from regras_consenso import LIMIARES_CONSENSO, condicoes_consenso  # app/ no sys.path via consolidar_respostas
+
+
+NIVEIS = 5  # escala de relevância 1..5
+
+# Limiares de consenso (app/regras_consenso.py; configuráveis via linha de comando)
+LIMIARES_PADRAO = LIMIARES_CONSENSO
+
+CHAVES_ITEM = ["bloco", "codigo"]
+CHAVES_RESUMO = {
+    "bloco": ["bloco"],
+    "secao": ["bloco", "secao"],
+    "tematica": ["tematica"],
+}
+
+
+def quantis_por_histograma(contagens: np.ndarray, q: float) -> np.ndarray:
+    """
+    Quantil (interpolação linear, igual a numpy/pandas) de cada linha de um
+    histograma G x NIVEIS de notas inteiras 1..NIVEIS, sem expandir as notas.
+    """
+    n = contagens.sum(axis=1)
+    acum = contagens.cumsum(axis=1)
+    h = (n - 1).clip(min=0) * q
+    lo = np.floor(h).astype(np.int64)
+    hi = np.minimum(lo + 1, (n - 1).clip(min=0))
+    # nota na posição k (0-based) = 1 + nº de níveis cuja contagem acumulada <= k
+    v_lo = 1 + (acum <= lo[:, None]).sum(axis=1)
+    v_hi = 1 + (acum <= hi[:, None]).sum(axis=1)
+    out = v_lo + (h - lo) * (v_hi - v_lo)
+    return np.where(n > 0, out, np.nan)
+
+
+def cvr_critico(n: np.ndarray, alfa: float = 0.05) -> np.ndarray:
+    """
+    CVR crítico de Lawshe pelo cálculo binomial exato (Ayre & Scally, 2014):
+    menor número de "essenciais" com P(X >= k | p=0,5) <= alfa, unilateral.
+    Calculado uma vez por tamanho de painel distinto.
+    """
+    n = np.asarray(n, dtype=np.int64)
+    criticos = {}
+    for tamanho in np.unique(n):
+        tamanho = int(tamanho)
+        if tamanho <= 0:
+            criticos[tamanho] = np.nan
+            continue
+        k = np.arange(1, tamanho + 1)
+        log_comb = np.concatenate(([0.0], np.cumsum(np.log((tamanho - k + 1) / k))))
+        log_pmf = log_comb - tamanho * math.log(2)
+        cauda = np.exp(log_pmf)[::-1].cumsum()[::-1]  # P(X >= k)
+        validos = np.nonzero(cauda <= alfa)[0]
+        # Painéis muito pequenos (N < 5) não atingem significância
+        criticos[tamanho] = (validos[0] - tamanho / 2) / (tamanho / 2) if len(validos) else np.nan
+    return np.array([criticos[int(t)] for t in n], dtype=float)
+
+
+def _eh_sim(serie: pd.Series) -> np.ndarray:
+    """Máscara booleana de valores "Sim" (categorias comparadas uma única vez)."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        cats = np.append(serie.cat.categories.astype(str).str.strip() == "Sim", False)
+        return cats[serie.cat.codes.to_numpy()]  # código -1 (nulo) cai no último
+    return (serie.astype("string").str.strip() == "Sim").to_numpy(dtype=bool, na_value=False)
+
+
+def estatisticas_por_grupo(df: pd.DataFrame, chaves: list[str]) -> pd.DataFrame:
+    """
+    Estatísticas Delphi por grupo em uma única passada vetorizada:
+    n, mediana, Q1, Q3, IQR e média do grau de relevância, % de notas 4–5,
+    CVR de Lawshe ("essencial" = nota 4–5), % de aceitação e % de
+    aplicabilidade nacional.
+
+    As notas são acumuladas em um histograma G x 5 (np.bincount), de onde
+    saem os quantis, sem laços Python por item.
+    """
+    grupos = df.groupby(chaves, sort=True, observed=True, dropna=False)
+    codigos = grupos.ngroup().to_numpy()
+    chaves_df = grupos.size().reset_index(name="n_respostas")
+    g = len(chaves_df)
+
+    grau = pd.to_numeric(df["grau_relevancia"], errors="coerce").to_numpy(dtype=float)
+    valido = (grau >= 1) & (grau <= NIVEIS) & (grau == np.floor(grau))
+    nivel = np.where(valido, grau, 1).astype(np.int64) - 1
+    contagens = np.bincount(
+        codigos[valido] * NIVEIS + nivel[valido], minlength=g * NIVEIS
+    ).reshape(g, NIVEIS)
+
+    n = contagens.sum(axis=1)
+    soma = (contagens * np.arange(1, NIVEIS + 1)).sum(axis=1)
+    n_relevante = contagens[:, 3:].sum(axis=1)
+
+    aceita = _eh_sim(df["aceitacao_item"])
+    aplic = _eh_sim(df["aplicabilidade_nacional"])
+    n_aceita = np.bincount(codigos, weights=aceita, minlength=g)
+    n_aplic = np.bincount(codigos, weights=aplic, minlength=g)
+    n_total = chaves_df["n_respostas"].to_numpy()
+
+    q1 = quantis_por_histograma(contagens, 0.25)
+    q3 = quantis_por_histograma(contagens, 0.75)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = chaves_df.assign(
+            n=n,
+            mediana=quantis_por_histograma(contagens, 0.5),
+            q1=q1,
+            q3=q3,
+            iqr=q3 - q1,
+            media=np.where(n > 0, soma / n, np.nan),
+            pct_relevante=np.where(n > 0, n_relevante / n, np.nan),
+            cvr=np.where(n > 0, (n_relevante - n / 2) / (n / 2), np.nan),
+            cvr_critico=cvr_critico(n),
+            pct_aceitacao=n_aceita / n_total,
+            pct_aplicabilidade=n_aplic / n_total,
+        )
+    for nivel_i in range(NIVEIS):
+        out[f"n_grau_{nivel_i + 1}"] = contagens[:, nivel_i]
+    return out
+
+
+def classificar_consenso(itens: pd.DataFrame, limiares: dict = LIMIARES_PADRAO) -> pd.Series:
+    """
+    Decisão por item (vetorizada): manter / revisar / descartar.
+
+    - manter: mediana, IQR, % de notas 4–5 e % de aceitação dentro dos limiares
+    - descartar: mediana baixa ou concordância baixa
+    - revisar: demais casos
+
+    A regra e os limiares são os de app/regras_consenso.py (os mesmos do
+    painel de consenso ao vivo).
+    """
+    manter, descartar = condicoes_consenso(itens, limiares)
+    decisao = np.select([manter, descartar], ["manter", "descartar"], default="revisar")
+    return pd.Series(decisao, index=itens.index, name="decisao")
+
+
+def calcular_consenso(df: pd.DataFrame, limiares: dict = LIMIARES_PADRAO) -> dict[str, pd.DataFrame]:
+    """
+    Calcular a tabela de consenso por item e os resumos por bloco, seção
+    e temática.
+
+    Entradas:
+        df (pd.DataFrame): consolidado (uma linha por avaliador x item).
+        limiares (dict): limiares de decisão (ver LIMIARES_PADRAO).
+
+    Saídas:
+        dict[str, pd.DataFrame]: "consenso_por_item" e "consenso_por_<nível>".
+    """
+    itens = estatisticas_por_grupo(df, CHAVES_ITEM)
+    atributos = df.drop_duplicates(CHAVES_ITEM, keep="last")[[*CHAVES_ITEM, "secao", "tematica"]]
+    itens = itens.merge(atributos, on=CHAVES_ITEM, how="left")
+    itens["decisao"] = classificar_consenso(itens, limiares)
+
+    saidas = {"consenso_por_item": itens}
+    for nivel, chaves in CHAVES_RESUMO.items():
+        resumo = estatisticas_por_grupo(df, chaves)
+        decisoes = pd.crosstab(
+            [itens[c] for c in chaves], itens["decisao"]
+        ).reindex(columns=["manter", "revisar", "descartar"], fill_value=0).add_prefix("itens_")
+        saidas[f"consenso_por_{nivel}"] = resumo.merge(decisoes.reset_index(), on=chaves, how="left")
+    return saidas
+
+
+def filtrar_rodada(df: pd.DataFrame, rodada: int | None = None) -> tuple[pd.DataFrame, int]:
+    """
+    Manter só as linhas de uma rodada (padrão: a mais recente presente).
+    Linhas sem rodada (consolidados anteriores às rodadas) são da 1ª.
+
+    Saídas:
+        (df, rodada): linhas da rodada, sem a coluna "rodada", e a rodada usada.
+    """
+    if "rodada" not in df.columns:
+        return (df if rodada in (None, 1) else df.iloc[0:0]), 1 if rodada is None else rodada
+    rodadas = pd.to_numeric(df["rodada"].astype("string").replace("", pd.NA), errors="coerce").fillna(1).astype(int)
+    if rodada is None:
+        rodada = int(rodadas.max()) if len(rodadas) else 1
+    return df[(rodadas == rodada).to_numpy()].drop(columns="rodada"), rodada
+
+
+def carregar_consolidado(caminho: Path) -> pd.DataFrame:
+    """
+    Ler o consolidado (CSV, arquivo Parquet ou o dataset particionado
+    consolidado_parquet/) apenas com as colunas usadas (e a rodada, se houver).
+    """
+    colunas = ["bloco", "secao", "codigo", "tematica",
+               "grau_relevancia", "aplicabilidade_nacional", "aceitacao_item"]
+    if caminho.is_dir() or caminho.suffix == ".parquet":
+        return pd.read_parquet(caminho, columns=[*colunas, "rodada"])
+    tipos = {c: "category" for c in [*colunas, "rodada"]}
+    tipos["grau_relevancia"] = "float32"
+    return pd.read_csv(caminho, usecols=lambda c: c in tipos, dtype=tipos, keep_default_na=False,
+                       na_values={"grau_relevancia": [""]})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Estatísticas de consenso Delphi por item.")
+    parser.add_argument("--entrada", type=Path, default=OUTPUTS / "consolidado_respostas.csv",
+                        help="consolidado (CSV, Parquet ou a pasta consolidado_parquet/)")
+    parser.add_argument("--saida", type=Path, default=OUTPUTS)
+    parser.add_argument("--rodada", type=int, default=None, help="rodada a analisar (padrão: a mais recente)")
+    for nome, valor in LIMIARES_PADRAO.items():
+        parser.add_argument(f"--{nome.replace('_', '-')}", type=float, default=valor)
+    args = parser.parse_args()
+
+    if not args.entrada.exists():
+        print(f"Consolidado não encontrado: {args.entrada}. Rode scripts/consolidar_respostas.py antes.")
+        return
+
+    limiares = {nome: getattr(args, nome) for nome in LIMIARES_PADRAO}
+    df, rodada = filtrar_rodada(carregar_consolidado(args.entrada), args.rodada)
+    saidas = calcular_consenso(df, limiares)
+
+    args.saida.mkdir(parents=True, exist_ok=True)
+    for nome, tabela in saidas.items():
+        tabela.to_csv(args.saida / f"{nome}.csv", index=False)
+
+    decisoes = saidas["consenso_por_item"]["decisao"].value_counts()
+    print(f"OK. Rodada {rodada}, {len(saidas['consenso_por_item'])} item(ns): "
+          + ", ".join(f"{k}={decisoes.get(k, 0)}" for k in ("manter", "revisar", "descartar")))
+    for nome in saidas:
+        print(f"- {nome}.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+import argparse
+import hashlib
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from consolidar_respostas import OUTPUTS, ROOT
+
+sys.path.insert(0, str(ROOT / "app"))
+
+from armazenamento import SubmissaoDuplicada, criar_armazenamento  # noqa: E402
+from backup_fila import FilaBackup  # noqa: E402
+from catalogo_blocos import Catalogo, diretorio_rodada  # noqa: E402
+from submissao import hash_conteudo, linha_resposta, persistir_submissao  # noqa: E402
+
+
+IMPORTACAO_DIR = OUTPUTS / "importacao"
+LINHAS_POR_LOTE = 50_000
+
+# Colunas esperadas (layout do CSV exportado pelo app; uma linha por item)
+COLUNAS_OBRIGATORIAS = [
+    "bloco", "codigo", "grau_relevancia", "aplicabilidade_nacional", "aceitacao_item",
+    "nome", "email", "consentimento", "concordancia_instr_delphi",
+]
+COLUNAS_OPCIONAIS = ["comentarios_sugestoes", "cpf", "timestamp", "submissao_id"]
+
+# Grafias aceitas na digitação de formulários em papel
+NORMALIZAR_SIM_NAO = {"sim": "Sim", "s": "Sim", "não": "Não", "nao": "Não", "n": "Não"}
+
+# Chave de uma submissão: linhas consecutivas com os mesmos valores
+CHAVE_SUBMISSAO = ["submissao_id", "bloco_id", "email", "nome", "timestamp"]
+COLUNAS_RESPOSTA = ["codigo", "grau_relevancia", "aplicabilidade_nacional", "aceitacao_item", "comentarios_sugestoes"]
+
+
+# ============================================================
+# LEITURA EM LOTES (CSV / XLSX)
+# ============================================================
+
+def ler_em_lotes(caminho: Path, linhas_por_lote: int = LINHAS_POR_LOTE) -> Iterator[pd.DataFrame]:
+    """
+    Ler CSV ou XLSX em lotes de `linhas_por_lote`, tudo como texto, com a
+    coluna `linha` (número da linha na planilha de origem, cabeçalho = 1).
+    """
+    inicio = 2
+    if caminho.suffix.lower() in (".xlsx", ".xlsm"):
+        lotes = _ler_xlsx(caminho, linhas_por_lote)
+    else:
+        lotes = pd.read_csv(caminho, dtype=str, keep_default_na=False, chunksize=linhas_por_lote,
+                            encoding="utf-8-sig")
+    for lote in lotes:
+        lote.columns = [str(c).strip().lower() for c in lote.columns]
+        lote.insert(0, "linha", np.arange(inicio, inicio + len(lote)))
+        inicio += len(lote)
+        yield lote
+
+
+def _ler_xlsx(caminho: Path, linhas_por_lote: int) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook  # dependência opcional, só para .xlsx
+
+    wb = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        linhas = wb.worksheets[0].iter_rows(values_only=True)
+        cabecalho = [str(c or "").strip() for c in next(linhas, [])]
+        buffer = []
+        for linha in linhas:
+            buffer.append(["" if v is None else str(v) for v in linha[:len(cabecalho)]])
+            if len(buffer) >= linhas_por_lote:
+                yield pd.DataFrame(buffer, columns=cabecalho)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=cabecalho)
+    finally:
+        wb.close()
+
+
+# ============================================================
+# VALIDAÇÃO VETORIZADA
+# ============================================================
+
+def indice_catalogo(catalogo: Catalogo) -> tuple[dict[str, str], dict[str, str], dict[tuple, dict]]:
+    """
+    Mapas para validação: nome de bloco (bloco_id ou arquivo) -> bloco_id,
+    bloco -> erro de validação do CSV, e (bloco_id, codigo) -> item.
+    """
+    nomes, erros, itens = {}, {}, {}
+    for b in catalogo.blocos():
+        nomes[b["bloco_id"]] = nomes[b["arquivo"]] = b["bloco_id"]
+        if b["erro"]:
+            erros[b["bloco_id"]] = b["erro"]
+        for item in b["itens"]:
+            itens[(b["bloco_id"], item["codigo"])] = item
+    return nomes, erros, itens
+
+
+def validar_lote(lote: pd.DataFrame, nomes: dict, erros_bloco: dict, itens: dict) -> pd.DataFrame:
+    """
+    Aplicar as regras metodológicas como máscaras sobre o lote inteiro:
+
+    - bloco conhecido e válido no catálogo; codigo existente no bloco
+    - grau_relevancia inteiro de 1 a 5
+    - aplicabilidade_nacional e aceitacao_item em Sim/Não
+    - comentário obrigatório quando Aceitação ou Aplicabilidade = Não
+    - nome, e-mail, consentimento e concordância com as instruções Delphi
+      presentes
+
+    A cobertura do bloco (uma linha por item, sem repetição) é conferida
+    por submissão, ao agrupar (Importador._gravar).
+
+    Saídas:
+        pd.DataFrame: lote normalizado com as colunas `bloco_id` e `erros`
+        ("" = linha válida).
+    """
+    for c in COLUNAS_OPCIONAIS:
+        if c not in lote:
+            lote[c] = ""
+    for c in lote.columns.drop("linha"):
+        lote[c] = lote[c].astype(str).str.strip()
+
+    lote["bloco_id"] = lote["bloco"].map(nomes).fillna("")
+    grau = pd.to_numeric(lote["grau_relevancia"].str.replace(",", ".", regex=False), errors="coerce")
+    for c in ("aplicabilidade_nacional", "aceitacao_item"):
+        lote[c] = lote[c].str.lower().map(NORMALIZAR_SIM_NAO).fillna(lote[c])
+    nao = (lote["aplicabilidade_nacional"] == "Não") | (lote["aceitacao_item"] == "Não")
+    chaves_item = pd.MultiIndex.from_arrays([lote["bloco_id"], lote["codigo"]])
+    sim = lambda s: s.str.lower().isin(["sim", "s", "true", "1", "x"])  # noqa: E731
+
+    regras = [
+        (lote["bloco_id"] == "", "bloco desconhecido"),
+        (lote["bloco_id"].isin(list(erros_bloco)), "bloco com erro no catálogo"),
+        ((lote["bloco_id"] != "") & ~chaves_item.isin(list(itens)), "codigo fora do bloco"),
+        (~(grau.between(1, 5) & (grau == np.floor(grau))), "grau_relevancia deve ser 1 a 5"),
+        (~lote["aplicabilidade_nacional"].isin(["Sim", "Não"]), "aplicabilidade_nacional deve ser Sim ou Não"),
+        (~lote["aceitacao_item"].isin(["Sim", "Não"]), "aceitacao_item deve ser Sim ou Não"),
+        (nao & (lote["comentarios_sugestoes"] == ""), "comentário obrigatório (Aceitação ou Aplicabilidade = Não)"),
+        ((lote["nome"] == "") | (lote["email"] == ""), "identificação (nome e e-mail) obrigatória"),
+        (~sim(lote["consentimento"]), "consentimento obrigatório"),
+        (~sim(lote["concordancia_instr_delphi"]), "concordância com as instruções do Método Delphi obrigatória"),
+    ]
+    erros = np.full(len(lote), "", dtype=object)
+    for mascara, mensagem in regras:
+        m = mascara.to_numpy(dtype=bool)
+        erros[m] = erros[m] + np.where(erros[m] == "", "", "; ") + mensagem
+    lote["erros"] = erros
+    lote["grau_relevancia"] = grau.round().astype("Int64")
+    return lote
+
+
+# ============================================================
+# GRAVAÇÃO
+# ============================================================
+
+def _id_importacao(arquivo: str, chave: tuple, rodada: int, conteudo: str, importado_em: str) -> str:
+    """
+    submissao_id de uma submissão importada: arquivo, avaliador, rodada e
+    hash do conteúdo, prefixado pelo horário da importação. Reimportar o
+    mesmo conteúdo é barrado pelo hash (versão vigente); um arquivo
+    corrigido vira nova versão e, com o mesmo timestamp da planilha, vence
+    a anterior no desempate por submissao_id.
+    """
+    return f"imp-{importado_em}-" + hashlib.sha256(
+        "|".join((arquivo, *map(str, chave), str(rodada), conteudo)).encode("utf-8")
+    ).hexdigest()[:24]
+
+
+class Importador:
+    """
+    Classe: Importador
+
+    Objetivo:
+        Agrupar linhas válidas em submissões (linhas consecutivas com o
+        mesmo bloco, e-mail, nome e timestamp, ou o mesmo submissao_id) e
+        gravá-las pelo mesmo caminho do app (persistir_submissao), com o CSV
+        exportado na fila de backup. A última submissão de cada lote fica
+        retida até o lote seguinte, pois pode continuar nele.
+
+        Como na API, só entra a submissão que avalia todos os itens do bloco
+        uma única vez: se alguma linha foi rejeitada, as demais da mesma
+        submissão também são (nada de submissões parciais).
+    """
+
+    def __init__(self, arquivo: Path, catalogo_itens: dict, output_dir: Path, tipo: str,
+                 exportar_csv: bool, relatorio: Path, workers: int = 8, rodada: int = 1):
+        self.arquivo = arquivo
+        self.rodada = rodada
+        self.itens = catalogo_itens
+        self.codigos_bloco: dict[str, set[str]] = {}
+        for bloco_id, codigo in catalogo_itens:
+            self.codigos_bloco.setdefault(bloco_id, set()).add(codigo)
+        self.output_dir = str(output_dir)
+        self.exportar_csv = exportar_csv
+        self.armazenamento = criar_armazenamento(tipo, self.output_dir)
+        self.fila = FilaBackup(output_dir / "backup" / "fila")
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.relatorio = relatorio
+        self._relatorio_aberto = False
+        self._gravadas: set[tuple] = set()
+        self._importado_em = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        self._retido: pd.DataFrame | None = None
+        self.r = {"linhas": 0, "linhas_validas": 0, "linhas_rejeitadas": 0,
+                  "submissoes": 0, "duplicadas": 0}
+
+    def rejeitar(self, linhas: pd.DataFrame) -> None:
+        if linhas.empty:
+            return
+        self.r["linhas_rejeitadas"] += len(linhas)
+        self.relatorio.parent.mkdir(parents=True, exist_ok=True)
+        linhas[["linha", "bloco", "codigo", "email", "erros"]].to_csv(
+            self.relatorio, mode="a" if self._relatorio_aberto else "w",
+            header=not self._relatorio_aberto, index=False,
+        )
+        self._relatorio_aberto = True
+
+    def processar(self, lote: pd.DataFrame) -> None:
+        self.r["linhas"] += len(lote)
+        self.rejeitar(lote[lote["erros"] != ""])
+        validas = lote[lote["erros"] == ""]
+        if self._retido is not None:
+            validas = pd.concat([self._retido, validas], ignore_index=True)
+            self._retido = None
+        if validas.empty:
+            return
+
+        # Rótulo de grupo: muda a cada troca de chave entre linhas consecutivas
+        chave = validas[CHAVE_SUBMISSAO]
+        validas = validas.assign(_grupo=(chave != chave.shift()).any(axis=1).cumsum())
+        ultimo = validas["_grupo"] == validas["_grupo"].iloc[-1]
+        self._retido = validas[ultimo].drop(columns="_grupo")
+        self._gravar(validas[~ultimo])
+
+    def finalizar(self) -> dict:
+        if self._retido is not None:
+            self._gravar(self._retido.assign(_grupo=0))
+            self._retido = None
+        self.pool.shutdown()
+        self.armazenamento.fechar()
+        return self.r
+
+    def _gravar(self, validas: pd.DataFrame) -> None:
+        if validas.empty:
+            return
+        # Fatiar colunas como listas Python: indexar o DataFrame por grupo custa
+        # milissegundos por submissão e domina o tempo de importação
+        colunas = {
+            c: validas[c].tolist()
+            for c in (*CHAVE_SUBMISSAO, *COLUNAS_RESPOSTA, "cpf", "consentimento", "concordancia_instr_delphi")
+        }
+        grupos = validas["_grupo"].to_numpy()
+        inicios = np.flatnonzero(np.r_[True, grupos[1:] != grupos[:-1]])
+        fins = np.r_[inicios[1:], len(grupos)]
+
+        futuros = []
+        for i, f in zip(inicios.tolist(), fins.tolist()):
+            chave = tuple(colunas[c][i] for c in CHAVE_SUBMISSAO)
+            if chave in self._gravadas:
+                # Linhas da mesma submissão separadas por outras: não mescla
+                self.rejeitar(validas.iloc[i:f].assign(erros="submissão em linhas não consecutivas"))
+                continue
+            self._gravadas.add(chave)
+            grupo = {c: v[i:f] for c, v in colunas.items()}
+            erro = self._cobertura(chave[1], grupo["codigo"])
+            if erro:
+                self.rejeitar(validas.iloc[i:f].assign(erros=erro))
+                continue
+            futuros.append((f - i, self.pool.submit(self._gravar_submissao, chave, grupo)))
+        for n, futuro in futuros:
+            status = futuro.result()
+            if status == "duplicada":
+                self.r["duplicadas"] += 1
+            else:
+                self.r["submissoes"] += 1
+                self.r["linhas_validas"] += n
+
+    def _cobertura(self, bloco_id: str, codigos: list[str]) -> str:
+        """Erro de cobertura do bloco pela submissão ("" = um item de cada)."""
+        repetidos = sorted(c for c, n in Counter(codigos).items() if n > 1)
+        if repetidos:
+            return f"codigo repetido na submissão: {', '.join(repetidos)}"
+        faltantes = sorted(self.codigos_bloco.get(bloco_id, set()) - set(codigos))
+        if faltantes:
+            return f"submissão incompleta: sem resposta para {', '.join(faltantes)}"
+        return ""
+
+    def _gravar_submissao(self, chave: tuple, grupo: dict[str, list]) -> str:
+        submissao_id, bloco_id, email, nome, timestamp = chave
+        registro = {
+            "bloco": bloco_id,
+            "rodada": self.rodada,
+            "nome": nome,
+            "email": email,
+            "cpf": grupo["cpf"][0],
+            "concordancia_instr_delphi": grupo["concordancia_instr_delphi"][0],
+            "consentimento": grupo["consentimento"][0],
+            "timestamp": timestamp or datetime.now().isoformat(timespec="seconds"),
+        }
+        respostas = []
+        for codigo, grau, aplic, aceita, coment in zip(*(grupo[c] for c in COLUNAS_RESPOSTA)):
+            respostas.append(linha_resposta(self.itens[(bloco_id, codigo)], {
+                "grau_relevancia": int(grau),
+                "aplicabilidade_nacional": aplic,
+                "aceitacao_item": aceita,
+                "comentarios_sugestoes": coment,
+            }))
+        registro["submissao_id"] = submissao_id or _id_importacao(
+            self.arquivo.name, chave, self.rodada, hash_conteudo(registro, respostas), self._importado_em
+        )
+        try:
+            csv_path = persistir_submissao(self.armazenamento, registro, respostas, self.output_dir, self.exportar_csv)
+        except SubmissaoDuplicada:
+            return "duplicada"
+        if csv_path:
+            self.fila.enfileirar(csv_path, bloco_id)
+        return "gravada"
+
+
+def importar(
+    arquivo: Path,
+    output_dir: Path = OUTPUTS,
+    base_dir: Path = ROOT / "base",
+    tipo: str = "sqlite",
+    exportar_csv: bool = True,
+    linhas_por_lote: int = LINHAS_POR_LOTE,
+    relatorio: Path | None = None,
+    rodada: int = 1,
+) -> dict:
+    """
+    Importar avaliações coletadas fora do app (CSV/XLSX, uma linha por item)
+    em lotes, validando cada lote de forma vetorizada. Todas as submissões
+    do arquivo são da `rodada` informada (itens de base/rodadaN/, se houver).
+
+    Saídas:
+        dict: linhas lidas, válidas, rejeitadas, submissões gravadas e
+        duplicadas (já importadas antes), e o caminho do relatório de erros.
+    """
+    blocos_dir = diretorio_rodada(str(base_dir), rodada)
+    nome_catalogo = "catalogo_blocos.json" if blocos_dir == str(base_dir) else f"catalogo_blocos_rodada{rodada}.json"
+    catalogo = Catalogo(blocos_dir, str(output_dir / nome_catalogo))
+    nomes, erros_bloco, itens = indice_catalogo(catalogo)
+    relatorio = relatorio or IMPORTACAO_DIR / f"erros_{arquivo.stem}_{datetime.now():%Y%m%d_%H%M%S}.csv"
+    importador = Importador(arquivo, itens, output_dir, tipo, exportar_csv, relatorio, rodada=rodada)
+
+    try:
+        for lote in ler_em_lotes(arquivo, linhas_por_lote):
+            faltantes = [c for c in COLUNAS_OBRIGATORIAS if c not in lote.columns]
+            if faltantes:
+                raise ValueError(f"Colunas obrigatórias ausentes em {arquivo.name}: {', '.join(faltantes)}")
+            importador.processar(validar_lote(lote, nomes, erros_bloco, itens))
+    finally:
+        r = importador.finalizar()
+    r["relatorio_erros"] = str(relatorio) if r["linhas_rejeitadas"] else ""
+    return r
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Importar avaliações digitadas (CSV/XLSX) com validação em lote.")
+    parser.add_argument("arquivo", type=Path, help="planilha com uma linha por item avaliado")
+    parser.add_argument("--saida", type=Path, default=OUTPUTS, help="diretório de saída do app (padrão: outputs/)")
+    parser.add_argument("--base", type=Path, default=ROOT / "base")
+    parser.add_argument("--armazenamento", choices=["sqlite", "csv"], default="sqlite")
+    parser.add_argument("--sem-csv", action="store_true", help="não exportar o CSV individual de cada submissão")
+    parser.add_argument("--linhas-por-lote", type=int, default=LINHAS_POR_LOTE)
+    parser.add_argument("--relatorio", type=Path, default=None, help="CSV de linhas rejeitadas")
+    parser.add_argument("--rodada", type=int, default=1, help="rodada Delphi das avaliações importadas")
+    args = parser.parse_args()
+
+    r = importar(args.arquivo, args.saida, args.base, args.armazenamento, not args.sem_csv,
+                 args.linhas_por_lote, args.relatorio, args.rodada)
+    print(f"OK. {r['linhas']} linha(s): {r['linhas_validas']} válida(s) em {r['submissoes']} submissão(ões), "
+          f"{r['linhas_rejeitadas']} rejeitada(s), {r['duplicadas']} submissão(ões) já importada(s)")
+    if r["relatorio_erros"]:
+        print(f"Linhas rejeitadas: {r['relatorio_erros']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+import argparse
+import json
+import os
+import random
+import resource
+import sqlite3
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from benchmark_delphi import APP_DIR, BENCH_DIR, criar_repo_bare
+from consolidar_respostas import ROOT
+
+APP_PATH = APP_DIR / "app_delphi.py"
+CARGA_DIR = BENCH_DIR / "carga"
+TEMPO_LIMITE_RERUN_S = 120
+ESPERA_BACKUP_S = 120
+
+
+# ============================================================
+# AVALIADOR SIMULADO
+# ============================================================
+
+class Coletor:
+    """Latências de rerun e eventos de todas as sessões (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reruns_ms: list[float] = []
+        self.submissoes: list[dict] = []
+        self.falhas: list[dict] = []
+
+    def rerun(self, ms: float) -> None:
+        with self._lock:
+            self.reruns_ms.append(ms)
+
+    def submissao(self, info: dict) -> None:
+        with self._lock:
+            self.submissoes.append(info)
+
+    def falha(self, info: dict) -> None:
+        with self._lock:
+            self.falhas.append(info)
+
+
+def _preparar_apptest_concorrente() -> None:
+    """
+    AppTest foi feito para um teste por vez: cada run() instala e remove um
+    Runtime simulado global e liga/desliga a opção global.appTest. Para
+    várias sessões no mesmo processo, o harness mantém o último Runtime
+    simulado disponível, deixa global.appTest ligado durante todo o teste e
+    serializa só a compilação do script (ast.parse concorrente falha no
+    CPython 3.11). A execução dos reruns continua concorrente.
+    """
+    from contextlib import nullcontext
+
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test
+
+    ultimo = {}
+
+    def _instancia(cls):
+        if cls._instance is not None:
+            ultimo["runtime"] = cls._instance
+        return cls._instance if cls._instance is not None else ultimo["runtime"]
+
+    Runtime.instance = classmethod(_instancia)
+    config.get_config_options()
+    config._set_option("global.appTest", True, "teste_carga")
+    app_test.patch_config_options = lambda _opcoes: nullcontext()
+
+    compilar = ScriptCache.get_bytecode
+    trava = threading.Lock()
+
+    def _compilar_serial(self, script_path):
+        with trava:
+            return compilar(self, script_path)
+
+    ScriptCache.get_bytecode = _compilar_serial
+
+
+def _rodar(at, coletor: Coletor):
+    inicio = time.perf_counter()
+    at.run()
+    coletor.rerun((time.perf_counter() - inicio) * 1000)
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return at
+
+
+def resposta_aleatoria(rng: random.Random) -> dict:
+    grau = rng.choices(range(1, 6), weights=[1, 1, 2, 4, 4])[0]
+    aplic = rng.choice(["Sim", "Sim", "Não"])
+    aceita = rng.choice(["Sim", "Sim", "Sim", "Não"])
+    exige = grau <= 2 or aplic == "Não" or aceita == "Não"
+    return {
+        "grau_relevancia": grau,
+        "aplicabilidade_nacional": aplic,
+        "aceitacao_item": aceita,
+        "comentarios_sugestoes": "Comentário de teste de carga." if exige else "",
+    }
+
+
+def avaliador(indice: int, blocos: list[str], coletor: Coletor, semente: int, pausa_s: float) -> None:
+    """
+    Percorrer o fluxo real do run_app em uma sessão AppTest: concordância,
+    escolha do bloco, identificação, todos os itens (um rerun por item,
+    com navegação entre páginas) e submissão.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(semente * 100_003 + indice)
+    email = f"carga{indice:05d}@exemplo.org"
+    at = AppTest.from_file(str(APP_PATH), default_timeout=TEMPO_LIMITE_RERUN_S)
+    try:
+        _rodar(at, coletor)
+        at.checkbox(key="delphi_ok_checkbox").check()
+        _rodar(at, coletor)
+
+        arquivo = rng.choice(blocos)
+        at.sidebar.selectbox[0].select(arquivo)
+        _rodar(at, coletor)
+        bloco_id = arquivo.replace("_itens.csv", "")
+
+        at.text_input(key="nome").input(f"Carga {indice:05d}")
+        at.text_input(key="email").input(email)
+        at.checkbox(key="consent").check()
+        _rodar(at, coletor)
+
+        preenchidas = {}
+        paginas = [r for r in at.radio if r.key == f"pagina_{bloco_id}"]
+        n_paginas = len(paginas[0].options) if paginas else 1
+        for pagina in range(1, n_paginas + 1):
+            if pagina > 1:
+                at.radio(key=f"pagina_{bloco_id}").set_value(pagina)
+                _rodar(at, coletor)
+            for r in [r for r in at.radio if r.key and r.key.startswith("grau_")]:
+                uid = r.key[len("grau_"):]
+                resposta = resposta_aleatoria(rng)
+                at.radio(key=f"grau_{uid}").set_value(resposta["grau_relevancia"])
+                at.radio(key=f"aplic_{uid}").set_value(resposta["aplicabilidade_nacional"])
+                at.radio(key=f"aceita_{uid}").set_value(resposta["aceitacao_item"])
+                at.text_area(key=f"coment_{uid}").input(resposta["comentarios_sugestoes"])
+                _rodar(at, coletor)
+                preenchidas[uid.split("__")[1]] = resposta
+                time.sleep(pausa_s * rng.random())
+
+        at.button[0].click()
+        inicio = time.time()
+        _rodar(at, coletor)
+        sucesso = [s.value for s in at.success if "Submissão salva" in s.value]
+        if not sucesso:
+            erros = [e.value for e in at.error]
+            raise RuntimeError(f"submissão não confirmada: {erros}")
+        coletor.submissao({"email": email, "bloco": bloco_id, "t": inicio, "respostas": preenchidas})
+    except Exception as e:
+        coletor.falha({"avaliador": indice, "erro": f"{type(e).__name__}: {e}"})
+
+
+# ============================================================
+# VERIFICAÇÃO (submissões perdidas / duplicadas)
+# ============================================================
+
+def verificar(trabalho: Path, remoto: str, coletor: Coletor) -> dict:
+    """
+    Comparar o que os avaliadores confirmaram com o banco de submissões e
+    com o repositório de backup: submissões ausentes, duplicadas, respostas
+    divergentes e CSVs exportados que não chegaram ao backup.
+    """
+    saidas = trabalho / "outputs"
+    conn = sqlite3.connect(saidas / "submissoes.db")
+    por_email: dict[str, list[str]] = {}
+    for sid, email in conn.execute("SELECT submissao_id, email FROM submissoes"):
+        por_email.setdefault(email, []).append(sid)
+
+    esperados = {s["email"]: s for s in coletor.submissoes}
+    perdidas = sorted(e for e in esperados if e not in por_email)
+    duplicadas = sorted(e for e, ids in por_email.items() if len(ids) > 1)
+
+    divergentes = 0
+    for email, info in esperados.items():
+        for sid in por_email.get(email, [])[:1]:
+            gravadas = {
+                codigo: (grau, aplic, aceita)
+                for codigo, grau, aplic, aceita in conn.execute(
+                    "SELECT codigo, grau_relevancia, aplicabilidade_nacional, aceitacao_item "
+                    "FROM respostas WHERE submissao_id = ?", (sid,))
+            }
+            for codigo, r in info["respostas"].items():
+                if gravadas.get(codigo) != (r["grau_relevancia"], r["aplicabilidade_nacional"], r["aceitacao_item"]):
+                    divergentes += 1
+    conn.close()
+
+    exportados = {p.name for p in saidas.glob("delphi_*.csv")}
+    no_backup = subprocess.run(
+        ["git", "--git-dir", remoto, "ls-tree", "-r", "--name-only", "main"],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    nomes_backup = [os.path.basename(p) for p in no_backup if p.startswith("respostas/")]
+    return {
+        "submissoes_confirmadas": len(esperados),
+        "submissoes_no_banco": sum(len(v) for v in por_email.values()),
+        "perdidas": perdidas,
+        "duplicadas": duplicadas,
+        "respostas_divergentes": divergentes,
+        "csv_exportados": len(exportados),
+        "csv_no_backup": len(set(nomes_backup)),
+        "ausentes_no_backup": sorted(exportados - set(nomes_backup)),
+        "duplicados_no_backup": len(nomes_backup) - len(set(nomes_backup)),
+    }
+
+
+# ============================================================
+# EXECUÇÃO
+# ============================================================
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    if len(valores) < 2:
+        return valores[0] if valores else float("nan")
+    return statistics.quantiles(valores, n=100, method="inclusive")[int(p) - 1]
+
+
+def executar(sessoes: int, blocos: list[str], trabalho: Path, rampa_s: float, pausa_s: float, semente: int) -> dict:
+    """
+    Rodar `sessoes` avaliadores simultâneos em um único processo (como o
+    servidor Streamlit: uma thread por sessão, recursos @st.cache_resource
+    compartilhados) a partir de `trabalho`, com base/ apontando para o
+    repositório e backup para um repositório bare local.
+    """
+    trabalho.mkdir(parents=True, exist_ok=True)
+    remoto = criar_repo_bare(trabalho / "git")
+    (trabalho / "base").unlink(missing_ok=True)
+    (trabalho / "base").symlink_to(ROOT / "base", target_is_directory=True)
+    os.environ["BACKUP_REMOTE_URL"] = remoto
+    os.chdir(trabalho)
+    _preparar_apptest_concorrente()
+
+    coletor = Coletor()
+    rss_inicial = _rss_mb()
+    rss_pico = rss_inicial
+    parar_amostragem = threading.Event()
+
+    def _amostrar_rss() -> None:
+        nonlocal rss_pico
+        while not parar_amostragem.wait(0.2):
+            rss_pico = max(rss_pico, _rss_mb())
+
+    threading.Thread(target=_amostrar_rss, daemon=True).start()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessoes) as pool:
+        for i in range(sessoes):
+            pool.submit(avaliador, i, blocos, coletor, semente, pausa_s)
+            time.sleep(rampa_s / max(sessoes, 1))
+    duracao = time.perf_counter() - inicio
+    parar_amostragem.set()
+
+    # Aguarda o trabalhador de backup esvaziar a fila
+    from backup_fila import FilaBackup
+
+    fila = FilaBackup(trabalho / "outputs" / "backup" / "fila")
+    limite = time.time() + ESPERA_BACKUP_S
+    while fila.tamanho() and time.time() < limite:
+        time.sleep(1)
+
+    tempos_sub = sorted(s["t"] for s in coletor.submissoes)
+    janela = (tempos_sub[-1] - tempos_sub[0]) if len(tempos_sub) > 1 else 0.0
+    reruns = coletor.reruns_ms
+    return {
+        "meta": {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "sessoes": sessoes,
+            "blocos": blocos,
+            "rampa_s": rampa_s,
+            "cpus": os.cpu_count(),
+        },
+        "duracao_s": round(duracao, 2),
+        "reruns": len(reruns),
+        "rerun_ms_p50": round(_percentil(reruns, 50), 1),
+        "rerun_ms_p95": round(_percentil(reruns, 95), 1),
+        "rerun_ms_p99": round(_percentil(reruns, 99), 1),
+        "rerun_ms_max": round(max(reruns, default=float("nan")), 1),
+        "submissoes_por_s": round(len(tempos_sub) / janela, 2) if janela else None,
+        "rss_inicial_mb": round(rss_inicial, 1),
+        "rss_pico_mb": round(rss_pico, 1),
+        "mb_por_sessao": round((rss_pico - rss_inicial) / max(sessoes, 1), 2),
+        "pico_maxrss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "backup_pendentes": fila.tamanho(),
+        "falhas": coletor.falhas,
+        "verificacao": verificar(trabalho, remoto, coletor),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Teste de carga: avaliadores simultâneos no fluxo real do app (AppTest).")
+    parser.add_argument("--sessoes", type=int, default=20)
+    parser.add_argument("--blocos", default="bloco1_itens.csv,bloco2_itens.csv",
+                        help="blocos sorteados entre os avaliadores (arquivos em base/)")
+    parser.add_argument("--rampa-s", type=float, default=5.0, help="intervalo para iniciar todas as sessões")
+    parser.add_argument("--pausa-s", type=float, default=0.2, help="pausa máxima entre itens (tempo de leitura)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--trabalho", type=Path, default=CARGA_DIR / datetime.now().strftime("%Y%m%d_%H%M%S"))
+    parser.add_argument("--saida", type=Path, default=None, help="JSON do resultado (padrão: <trabalho>/resultado.json)")
+    args = parser.parse_args()
+
+    trabalho = args.trabalho.resolve()
+    saida = (args.saida or trabalho / "resultado.json").resolve()
+    r = executar(args.sessoes, args.blocos.split(","), trabalho, args.rampa_s, args.pausa_s, args.semente)
+
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(r, ensure_ascii=False, indent=2), encoding="utf-8")
+    v = r["verificacao"]
+    print(f"{args.sessoes} sessões em {r['duracao_s']} s | {r['reruns']} reruns | "
+          f"p50={r['rerun_ms_p50']} ms p95={r['rerun_ms_p95']} ms p99={r['rerun_ms_p99']} ms")
+    print(f"throughput={r['submissoes_por_s']} submissões/s | ~{r['mb_por_sessao']} MB/sessão (RSS)")
+    print(f"confirmadas={v['submissoes_confirmadas']} banco={v['submissoes_no_banco']} "
+          f"perdidas={len(v['perdidas'])} duplicadas={len(v['duplicadas'])} divergentes={v['respostas_divergentes']} | "
+          f"backup {v['csv_no_backup']}/{v['csv_exportados']} (pendentes={r['backup_pendentes']})")
+    if r["falhas"]:
+        print(f"{len(r['falhas'])} sessão(ões) falharam; detalhes em {saida}")
+    print(f"Resultado em {saida}")
+
+
+if __name__ == "__main__":
+    main()